@@ -1,5 +1,6 @@
 class Api::V1::SongsController < ApplicationController
   include EncryptedTokenAuthentication
+  include SongUploads
 
   # Columns a client is allowed to sort by. Anything else falls back to
   # the default below — this prevents user input from being interpolated
@@ -7,6 +8,13 @@ class Api::V1::SongsController < ApplicationController
   ALLOWED_SORT_COLUMNS = %w[created_at title duration track_number processing_status].freeze
   DEFAULT_SORT_COLUMN = 'created_at'
 
+  # Upper bound on checksums accepted by a single check_duplicates request.
+  MAX_DUPLICATE_CHECKSUMS = 1000
+  # Upper bound on files accepted by a single bulk_upload_batch request.
+  MAX_BATCH_UPLOAD_FILES = 50
+  # Upper bound on song ids accepted by a single processing_statuses request.
+  MAX_STATUS_IDS = 1000
+
   skip_before_action :verify_authenticity_token
   # Media reads (show/download/stream) are fetched by the browser player's
   # <audio> element, which CANNOT send a Bearer header — so for those actions we
@@ -15,7 +23,7 @@ class Api::V1::SongsController < ApplicationController
   skip_before_action :authenticate_encrypted_token_user!, only: [:show, :download, :stream]
   before_action :authenticate_media_request!, only: [:show, :download, :stream]
   before_action :set_song, only: [:show, :download, :stream]
-  before_action :ensure_upload_permission!, only: [:bulk_upload, :bulk_create, :bulk_update, :direct_upload, :create_from_blob]
+  before_action :ensure_upload_permission!, only: [:bulk_upload, :bulk_upload_batch, :check_duplicates, :processing_statuses, :bulk_create, :bulk_update, :direct_upload, :create_from_blob]
 
   def index
     # Parse pagination params
@@ -145,93 +153,13 @@ class Api::V1::SongsController < ApplicationController
     end
 
     begin
-      # Create new song with uploaded file
-      @song = Song.new
-      @song.audio_file.attach(params[:audio_file])
-      
-      # Store original filename
-      @song.original_filename = params[:filename] || params[:audio_file].original_filename
-      
-      # Set optional metadata if provided
-      @song.title = params[:title] if params[:title].present?
-      @song.track_number = params[:track_number] if params[:track_number].present?
-      @song.duration = params[:duration] if params[:duration].present?
-      
-      # Handle artist
-      if params[:artist_name].present?
-        @song.artist = Artist.find_or_create_by!(name: params[:artist_name])
-      end
-      
-      # Handle album
-      if params[:album_title].present?
-        @song.album = Album.find_or_create_by!(title: params[:album_title])
-      end
-      
-      # Handle genre
-      if params[:genre_name].present?
-        @song.genre = Genre.find_or_create_by!(name: params[:genre_name])
-      end
-      
-      # Set processing status
-      @song.processing_status = 'needs_review'
-      
-      if @song.save
-        # Extract metadata from file if not skipped
-        unless params[:skip_post_processing] == 'true' || params[:skip_post_processing] == true
-          if @song.audio_file.attached?
-            metadata = @song.extract_metadata_from_file
-            
-            if metadata[:error].blank?
-              # Update with extracted metadata
-              @song.title ||= metadata[:title] if metadata[:title].present?
-              @song.track_number ||= metadata[:track_number] if metadata[:track_number].present?
-              @song.duration ||= metadata[:duration] if metadata[:duration].present?
-              @song.file_format = metadata[:file_format] if metadata[:file_format].present?
-              @song.file_size = metadata[:file_size] if metadata[:file_size].present?
-              
-              # Handle artist from metadata
-              if metadata[:artist].present? && @song.artist.nil?
-                @song.artist = Artist.find_or_create_by!(name: metadata[:artist])
-              end
-              
-              # Handle album from metadata
-              if metadata[:album].present? && @song.album.nil?
-                @song.album = Album.find_or_create_by!(title: metadata[:album])
-              end
-              
-              # Handle genre from metadata
-              if metadata[:genre].present? && @song.genre.nil?
-                @song.genre = Genre.find_or_create_by!(name: metadata[:genre])
-              end
-              
-              # Determine processing status based on metadata completeness
-              if @song.has_complete_metadata?
-                @song.processing_status = 'completed'
-              else
-                @song.processing_status = 'needs_review'
-              end
-              
-              @song.save
-            else
-              @song.processing_status = 'failed'
-              @song.processing_error = metadata[:error]
-              @song.save
-            end
-          end
-        end
-        
+      @song = create_song_from_upload(params[:audio_file], params)
+
+      if @song.persisted?
         render json: {
           success: true,
           message: "Song uploaded successfully",
-          song: {
-            id: @song.id,
-            title: @song.title,
-            artist: @song.artist&.name,
-            album: @song.album&.title,
-            genre: @song.genre&.name,
-            processing_status: @song.processing_status,
-            created_at: @song.created_at
-          }
+          song: uploaded_song_json(@song)
         }, status: :created
       else
         render json: {
@@ -251,6 +179,114 @@ class Api::V1::SongsController < ApplicationController
     end
   end
 
+  # Multi-file variant of bulk_upload for libraries of small tracks: one
+  # request carries up to MAX_BATCH_UPLOAD_FILES files as files[N][audio_file],
+  # each with the same optional fields bulk_upload takes (files[N][filename],
+  # files[N][title], ...). Every file is saved on its own, so one bad file does
+  # not fail the batch; results come back in request order.
+  def bulk_upload_batch
+    entries = params[:files].is_a?(Array) ? params[:files] : params[:files]&.values
+
+    if entries.blank?
+      render json: {
+        success: false,
+        message: "No audio files provided"
+      }, status: :unprocessable_entity
+      return
+    end
+
+    if entries.size > MAX_BATCH_UPLOAD_FILES
+      render json: {
+        success: false,
+        message: "Too many files (maximum #{MAX_BATCH_UPLOAD_FILES} per request)"
+      }, status: :unprocessable_entity
+      return
+    end
+
+    results = entries.each_with_index.map do |entry, index|
+      unless entry[:audio_file].present?
+        next { index: index, success: false, message: "No audio file provided" }
+      end
+
+      begin
+        song = create_song_from_upload(entry[:audio_file], entry,
+                                       skip_post_processing: params[:skip_post_processing])
+        if song.persisted?
+          { index: index, success: true, song: uploaded_song_json(song) }
+        else
+          { index: index, success: false, message: "Failed to save song", errors: song.errors.full_messages }
+        end
+      rescue => e
+        Rails.logger.error "Bulk upload batch error (file #{index}): #{e.message}"
+        Rails.logger.error e.backtrace.join("\n")
+        { index: index, success: false, message: "Upload failed: #{e.message}" }
+      end
+    end
+
+    render json: {
+      success: results.all? { |result| result[:success] },
+      uploaded: results.count { |result| result[:success] },
+      failed: results.count { |result| !result[:success] },
+      results: results
+    }, status: :ok
+  end
+
+  # Tell a bulk uploader which files the archive already has, before it sends
+  # any bytes. Checksums are in ActiveStorage's own format (base64-encoded MD5
+  # of the file content), so every previously uploaded song is covered without
+  # a backfill. Responds with a checksum => song id map of the hits only.
+  def check_duplicates
+    checksums = Array(params[:checksums]).map(&:to_s).reject(&:blank?).uniq
+
+    if checksums.size > MAX_DUPLICATE_CHECKSUMS
+      render json: {
+        success: false,
+        message: "Too many checksums (maximum #{MAX_DUPLICATE_CHECKSUMS} per request)"
+      }, status: :unprocessable_entity
+      return
+    end
+
+    existing = ActiveStorage::Attachment
+      .where(record_type: 'Song', name: 'audio_file')
+      .joins(:blob)
+      .where(active_storage_blobs: { checksum: checksums })
+      .pluck('active_storage_blobs.checksum', :record_id)
+      .to_h
+
+    render json: { success: true, existing: existing }
+  end
+
+  # Let a bulk uploader follow up on songs it uploaded: the processing status
+  # (and error) of up to MAX_STATUS_IDS songs in one request, so polling costs
+  # one query per batch rather than one request per song. Once a status has
+  # settled, processing_seconds is the time from upload until it settled
+  # (Song#processed_at; null for songs settled before that was recorded).
+  # Ids that no longer exist are listed under missing.
+  def processing_statuses
+    ids = Array(params[:ids]).map(&:to_s).reject(&:blank?).uniq
+
+    if ids.size > MAX_STATUS_IDS
+      render json: {
+        success: false,
+        message: "Too many song ids (maximum #{MAX_STATUS_IDS} per request)"
+      }, status: :unprocessable_entity
+      return
+    end
+
+    songs = Song.where(id: ids)
+      .pluck(:id, :processing_status, :processing_error, :created_at, :processed_at)
+      .to_h do |id, status, error, created_at, processed_at|
+        settled = !Song::UNSETTLED_PROCESSING_STATUSES.include?(status)
+        [id.to_s, {
+          processing_status: status,
+          processing_error: error,
+          processing_seconds: settled && processed_at ? (processed_at - created_at).round(3) : nil
+        }]
+      end
+
+    render json: { success: true, songs: songs, missing: ids - songs.keys }
+  end
+
   private
 
   # Allow media reads from either a logged-in browser session (the player's
@@ -264,13 +300,4 @@ class Api::V1::SongsController < ApplicationController
   def set_song
     @song = Song.includes(:artist, :album, :genre).find(params[:id])
   end
-  
-  def ensure_upload_permission!
-    unless @current_api_user&.moderator? || @current_api_user&.admin?
-      render json: {
-        success: false,
-        message: "Insufficient permissions. Moderator or admin role required."
-      }, status: :forbidden
-    end
-  end
 end
\ No newline at end of file
@@ -0,0 +1,152 @@
+# Resumable chunked uploads (see UploadSession). Flow for one file:
+#
+#   POST /api/v1/upload_sessions                    filename, byte_size, content_type, checksum
+#   PUT  /api/v1/upload_sessions/:id/chunk?offset=N raw chunk body, Content-MD5 header
+#   GET  /api/v1/upload_sessions/:id                received_bytes, to resume after a disconnect
+#   POST /api/v1/upload_sessions/:id/finalize       optional bulk_upload metadata fields
+#
+# Finalize turns the assembled file into a Song exactly like bulk_upload does.
+# Only one finalize runs per session; a concurrent one gets 409 Conflict and a
+# repeated one after success gets the same song back.
+class Api::V1::UploadSessionsController < ApplicationController
+  include EncryptedTokenAuthentication
+  include SongUploads
+
+  skip_before_action :verify_authenticity_token
+  before_action :ensure_upload_permission!
+  before_action :set_upload_session, only: [:show, :chunk, :finalize]
+
+  def create
+    upload_session = @current_api_user.upload_sessions.new(
+      filename: params[:filename],
+      content_type: params[:content_type].presence || "application/octet-stream",
+      byte_size: params[:byte_size],
+      checksum: params[:checksum].presence
+    )
+
+    if upload_session.save
+      render json: { success: true, upload_session: upload_session_json(upload_session) }, status: :created
+    else
+      render json: {
+        success: false,
+        message: "Failed to open upload session",
+        errors: upload_session.errors.full_messages
+      }, status: :unprocessable_entity
+    end
+  end
+
+  def show
+    render json: { success: true, upload_session: upload_session_json(@upload_session) }
+  end
+
+  def chunk
+    data = request.raw_post
+    offset = Integer(params[:offset], exception: false)
+
+    if offset.nil? || offset.negative? || data.empty? || data.bytesize > UploadSession::MAX_CHUNK_BYTES
+      render json: {
+        success: false,
+        message: "A non-empty chunk of at most #{UploadSession::MAX_CHUNK_BYTES} bytes and a valid offset are required"
+      }, status: :unprocessable_entity
+      return
+    end
+
+    received_bytes = @upload_session.write_chunk!(offset, data, request.headers["Content-MD5"])
+    render json: { success: true, received_bytes: received_bytes }
+  rescue UploadSession::OffsetMismatch => e
+    render json: { success: false, message: e.message, received_bytes: @upload_session.reload.received_bytes },
+           status: :conflict
+  rescue UploadSession::ChunkError => e
+    render json: { success: false, message: e.message }, status: :unprocessable_entity
+  end
+
+  def finalize
+    return render_finalized if @upload_session.status == "completed"
+    return render_finalizing if @upload_session.status == "finalizing"
+
+    unless @upload_session.complete?
+      render json: {
+        success: false,
+        message: "Upload incomplete: received #{@upload_session.received_bytes} of #{@upload_session.byte_size} bytes",
+        received_bytes: @upload_session.received_bytes
+      }, status: :unprocessable_entity
+      return
+    end
+
+    unless @upload_session.checksum_matches?
+      render json: { success: false, message: "Assembled file does not match its checksum" }, status: :unprocessable_entity
+      return
+    end
+
+    unless @upload_session.claim_for_finalize!
+      return render_finalized if @upload_session.status == "completed"
+      return render_finalizing
+    end
+
+    begin
+      song = File.open(@upload_session.part_path, "rb") do |io|
+        create_song_from_upload(
+          { io: io, filename: @upload_session.filename, content_type: @upload_session.content_type },
+          params.merge(filename: @upload_session.filename)
+        )
+      end
+
+      if song.persisted?
+        @upload_session.update!(status: "completed", song_id: song.id)
+        @upload_session.discard_part_file
+
+        render json: {
+          success: true,
+          message: "Song uploaded successfully",
+          song: uploaded_song_json(song)
+        }, status: :created
+      else
+        @upload_session.release!
+        render json: {
+          success: false,
+          message: "Failed to save song",
+          errors: song.errors.full_messages
+        }, status: :unprocessable_entity
+      end
+    rescue => e
+      Rails.logger.error "Upload session finalize error: #{e.message}"
+      Rails.logger.error e.backtrace.join("\n")
+      @upload_session.release! if @upload_session.status == "finalizing"
+
+      render json: {
+        success: false,
+        message: "Upload failed: #{e.message}"
+      }, status: :internal_server_error
+    end
+  end
+
+  private
+
+  def render_finalized
+    song = Song.find(@upload_session.song_id)
+    render json: { success: true, message: "Song uploaded successfully", song: uploaded_song_json(song) }
+  end
+
+  def render_finalizing
+    render json: { success: false, message: "Upload session is already being finalized" }, status: :conflict
+  end
+
+  def set_upload_session
+    @upload_session = @current_api_user.upload_sessions.find_by(id: params[:id])
+    return if @upload_session
+
+    render json: { success: false, message: "Upload session not found" }, status: :not_found
+  end
+
+  def upload_session_json(upload_session)
+    {
+      id: upload_session.id,
+      filename: upload_session.filename,
+      byte_size: upload_session.byte_size,
+      received_bytes: upload_session.received_bytes,
+      status: upload_session.status,
+      song_id: upload_session.song_id,
+      max_chunk_bytes: UploadSession::MAX_CHUNK_BYTES
+    }
+  end
+end
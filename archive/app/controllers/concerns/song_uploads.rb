@@ -0,0 +1,132 @@
+# frozen_string_literal: true
+
+# Song creation shared by the upload endpoints (bulk_upload, bulk_upload_batch
+# and finalized resumable upload sessions), so every path attaches the file,
+# applies the optional metadata fields and runs metadata extraction the same way.
+module SongUploads
+  extend ActiveSupport::Concern
+
+  private
+
+  # Create a song from one uploaded file (or an attachable hash such as
+  # { io:, filename:, content_type: }) and the optional bulk_upload fields in
+  # attrs, then extract metadata from the file unless post-processing is
+  # skipped. With client_metadata=true the fields are the file's own tags, read
+  # by the uploader: they are normalized like extracted tags and used as they
+  # are, and no extraction runs at all. Returns the song; it is not persisted
+  # if validation failed.
+  def create_song_from_upload(audio_file, attrs, skip_post_processing: attrs[:skip_post_processing])
+    client_metadata = ActiveModel::Type::Boolean.new.cast(attrs[:client_metadata])
+    text = ->(value) { client_metadata ? AudioFileProcessor.clean_string(value) : value.presence }
+
+    song = Song.new
+    song.audio_file.attach(audio_file)
+    
+    # Store original filename
+    song.original_filename = attrs[:filename] || audio_file.original_filename
+    
+    # Set optional metadata if provided
+    song.title = text.(attrs[:title]) if attrs[:title].present?
+    song.track_number = attrs[:track_number] if attrs[:track_number].present?
+    song.duration = attrs[:duration] if attrs[:duration].present?
+    
+    # Handle artist
+    if (artist_name = text.(attrs[:artist_name]))
+      song.artist = Artist.find_or_create_by!(name: artist_name)
+    end
+    
+    # Handle album
+    if (album_title = text.(attrs[:album_title]))
+      song.album = Album.find_or_create_by!(title: album_title)
+    end
+    
+    # Handle genre
+    if (genre_name = text.(attrs[:genre_name]))
+      song.genre = Genre.find_or_create_by!(name: genre_name)
+    end
+    
+    if client_metadata
+      # The client already did what extraction would do
+      song.file_format = attrs[:file_format] if Song::FILE_FORMATS.include?(attrs[:file_format])
+      song.file_size = song.audio_file.blob&.byte_size
+      song.processing_status = song.has_complete_metadata? ? 'completed' : 'needs_review'
+      song.skip_processing_job = true
+      song.save
+      return song
+    end
+
+    # Set processing status; a song whose processing job is queued stays
+    # pending until the job settles it (the job passes over completed songs only)
+    queued = song.queues_processing_job?
+    song.processing_status = queued ? 'pending' : 'needs_review'
+    
+    return song unless song.save
+
+    # Extract metadata from file if not skipped
+    unless skip_post_processing == 'true' || skip_post_processing == true
+      if song.audio_file.attached?
+        metadata = song.extract_metadata_from_file
+        
+        if metadata[:error].blank?
+          # Update with extracted metadata
+          song.title ||= metadata[:title] if metadata[:title].present?
+          song.track_number ||= metadata[:track_number] if metadata[:track_number].present?
+          song.duration ||= metadata[:duration] if metadata[:duration].present?
+          song.file_format = metadata[:file_format] if metadata[:file_format].present?
+          song.file_size = metadata[:file_size] if metadata[:file_size].present?
+          
+          # Handle artist from metadata
+          if metadata[:artist].present? && song.artist.nil?
+            song.artist = Artist.find_or_create_by!(name: metadata[:artist])
+          end
+          
+          # Handle album from metadata
+          if metadata[:album].present? && song.album.nil?
+            song.album = Album.find_or_create_by!(title: metadata[:album])
+          end
+          
+          # Handle genre from metadata
+          if metadata[:genre].present? && song.genre.nil?
+            song.genre = Genre.find_or_create_by!(name: metadata[:genre])
+          end
+          
+          # Determine processing status based on metadata completeness
+          if song.has_complete_metadata?
+            song.processing_status = 'completed'
+          else
+            song.processing_status = queued ? 'pending' : 'needs_review'
+          end
+          
+          song.save
+        else
+          song.processing_status = queued ? 'pending' : 'failed'
+          song.processing_error = metadata[:error]
+          song.save
+        end
+      end
+    end
+
+    song
+  end
+
+  def uploaded_song_json(song)
+    {
+      id: song.id,
+      title: song.title,
+      artist: song.artist&.name,
+      album: song.album&.title,
+      genre: song.genre&.name,
+      processing_status: song.processing_status,
+      created_at: song.created_at
+    }
+  end
+
+  def ensure_upload_permission!
+    unless @current_api_user&.moderator? || @current_api_user&.admin?
+      render json: {
+        success: false,
+        message: "Insufficient permissions. Moderator or admin role required."
+      }, status: :forbidden
+    end
+  end
+end
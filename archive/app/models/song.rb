@@ -12,11 +12,20 @@ class Song < ApplicationRecord
   # Active Storage for audio file
   has_one_attached :audio_file
 
+  FILE_FORMATS = %w[mp3 m4a mp4 ogg flac wav aac].freeze
+
+  # Processing statuses that can still change without anyone editing the song
+  UNSETTLED_PROCESSING_STATUSES = %w[pending processing].freeze
+
+  # Set when the uploader already supplied the file's tags, so no background
+  # extraction is queued for the new song
+  attr_accessor :skip_processing_job
+
   # Validations
   validates :title, length: { minimum: 1, maximum: 200 }, allow_blank: true
   validates :track_number, numericality: { only_integer: true, greater_than: 0 }, allow_blank: true
   validates :duration, numericality: { only_integer: true, greater_than: 0 }, allow_blank: true
-  validates :file_format, inclusion: { in: %w[mp3 m4a mp4 ogg flac wav aac], message: "%{value} is not a supported format" }, allow_blank: true
+  validates :file_format, inclusion: { in: FILE_FORMATS, message: "%{value} is not a supported format" }, allow_blank: true
   validates :file_size, numericality: { only_integer: true, greater_than: 0 }, allow_blank: true
   validates :processing_status, inclusion: { in: %w[pending processing completed failed needs_review new], message: "%{value} is not a valid status" }, allow_blank: true
   validates :original_filename, length: { maximum: 255 }, allow_blank: true
@@ -57,12 +66,11 @@ class Song < ApplicationRecord
   }
 
   # Callbacks
-  # When inline processing is enabled, do not enqueue background jobs from the model
-  unless Rails.configuration.x.inline_audio_processing
-    after_commit :schedule_processing, on: :create
-    after_commit :schedule_processing, on: :update, if: :should_reschedule_processing?
-  end
+  # When inline processing is enabled, no background jobs are enqueued (see queues_processing_job?)
+  after_commit :schedule_processing, on: :create
+  after_commit :schedule_processing, on: :update, if: :should_reschedule_processing?
   before_save :auto_complete_if_ready
+  before_save :stamp_processed_at, if: :processing_status_changed?
   
   # Sync tracking
   after_create :track_sync_change
@@ -101,6 +109,12 @@ class Song < ApplicationRecord
     processing_status == 'needs_review'
   end
 
+  # True when saving this song enqueues AudioFileProcessingJob, which then
+  # settles its processing status; until it runs the song should stay pending
+  def queues_processing_job?
+    !Rails.configuration.x.inline_audio_processing && !skip_processing_job && audio_file.attached?
+  end
+
 
 
 
@@ -151,7 +165,20 @@ class Song < ApplicationRecord
     end
   end
 
+  # processed_at records when processing first settled, so uploaders can be
+  # told how long the archive took; later edits of a settled song keep it,
+  # and reprocessing (back to pending/processing) clears it
+  def stamp_processed_at
+    if UNSETTLED_PROCESSING_STATUSES.include?(processing_status)
+      self.processed_at = nil
+    elsif processing_status.present?
+      self.processed_at ||= Time.current
+    end
+  end
+
   def schedule_processing
+    return unless queues_processing_job?
+
     AudioFileProcessingJob.perform_later(id)
   end
 
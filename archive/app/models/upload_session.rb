@@ -0,0 +1,114 @@
+require "digest"
+require "fileutils"
+
+# Server side of resumable chunked uploads for large files.
+#
+# A client opens a session with the file's name, size and (optionally) its
+# whole-file checksum, PUTs fixed-size chunks at explicit byte offsets, each with
+# its own MD5, and finally asks for the assembled file to become a Song. Chunks
+# are written into a part file under tmp/ at their offset, so:
+#
+#   - a chunk resent after its acknowledgement was lost is accepted as a no-op,
+#   - received_bytes tells a reconnecting client exactly where to continue,
+#   - a dropped connection costs at most one chunk, not the whole file.
+#
+# Sessions a client abandoned are destroyed (with their part file) by
+# `rails upload_sessions:expire` once idle for EXPIRE_AFTER.
+class UploadSession < ApplicationRecord
+  STORAGE_DIR = Rails.root.join("tmp", "upload_sessions")
+  MAX_CHUNK_BYTES = 64.megabytes
+  STATUSES = %w[open finalizing completed].freeze
+  EXPIRE_AFTER = 7.days
+
+  class ChunkError < StandardError; end
+
+  # The chunk does not start where the session left off; the client should
+  # continue from received_bytes.
+  class OffsetMismatch < ChunkError; end
+
+  belongs_to :user
+
+  validates :filename, presence: true
+  validates :byte_size, numericality: { only_integer: true, greater_than: 0 }
+  validates :status, inclusion: { in: STATUSES }
+
+  after_create :create_part_file
+  after_destroy :discard_part_file
+
+  scope :unfinished, -> { where.not(status: "completed") }
+
+  # Destroy sessions that never completed and have been idle since before
+  # the given time; returns how many were destroyed.
+  def self.expire_idle!(before = EXPIRE_AFTER.ago)
+    unfinished.where(updated_at: ...before).find_each.count(&:destroy)
+  end
+
+  def part_path
+    STORAGE_DIR.join(id)
+  end
+
+  def open?
+    status == "open"
+  end
+
+  def complete?
+    received_bytes == byte_size
+  end
+
+  # Store one chunk at offset and return the number of bytes received so far.
+  # The chunk's base64 MD5 is verified before anything is written.
+  def write_chunk!(offset, data, chunk_checksum)
+    if chunk_checksum.present? && Digest::MD5.base64digest(data) != chunk_checksum
+      raise ChunkError, "Chunk checksum mismatch"
+    end
+
+    with_lock do
+      raise ChunkError, "Upload session is #{status}" unless open?
+
+      # A chunk we already stored (its acknowledgement was lost) is a no-op
+      if offset + data.bytesize > received_bytes
+        raise OffsetMismatch, "Expected chunk at offset #{received_bytes}, got #{offset}" if offset != received_bytes
+        raise ChunkError, "Chunk extends past the declared file size" if offset + data.bytesize > byte_size
+
+        File.open(part_path, "r+b") do |file|
+          file.seek(offset)
+          file.write(data)
+          file.fsync
+        end
+        update!(received_bytes: offset + data.bytesize)
+      end
+    end
+
+    received_bytes
+  end
+
+  # Atomically move an open session to finalizing; false when another request
+  # got there first (or the session is no longer open).
+  def claim_for_finalize!
+    claimed = self.class.where(id: id, status: "open")
+                        .update_all(status: "finalizing", updated_at: Time.current) == 1
+    reload
+    claimed
+  end
+
+  # Reopen a session whose finalize failed so it can be retried.
+  def release!
+    update!(status: "open")
+  end
+
+  # True when no whole-file checksum was declared or the assembled file matches it.
+  def checksum_matches?
+    checksum.blank? || Digest::MD5.file(part_path).base64digest == checksum
+  end
+
+  def discard_part_file
+    FileUtils.rm_f(part_path)
+  end
+
+  private
+
+  def create_part_file
+    FileUtils.mkdir_p(STORAGE_DIR)
+    FileUtils.touch(part_path)
+  end
+end
@@ -5,6 +5,7 @@ class User < ApplicationRecord
   # Associations
   has_many :playlists, dependent: :destroy
   has_many :jukeboxes, foreign_key: :owner_id, dependent: :destroy
+  has_many :upload_sessions, dependent: :destroy
 
   # Enums.
   # NOTE: roles are capability-based (see the predicate methods below), not a
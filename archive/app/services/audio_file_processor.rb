@@ -176,7 +176,9 @@ class AudioFileProcessor
     metadata
   end
 
-  def clean_string(str)
+  # Tag text normalization, shared with tags read by the uploading client so
+  # both produce the same artist/album/genre names
+  def self.clean_string(str)
     return nil if str.blank?
     
     # Remove common separators and clean up
@@ -188,6 +190,10 @@ class AudioFileProcessor
     cleaned.presence
   end
 
+  def clean_string(str)
+    self.class.clean_string(str)
+  end
+
   # Placeholder methods for when audio gems are available
   def extract_mp3_metadata
     # This would use taglib-ruby or ruby-mp3info when available
@@ -182,11 +182,22 @@ Rails.application.routes.draw do
           put :bulk_update
           delete :bulk_destroy
           post :bulk_upload
+          post :bulk_upload_batch
+          post :check_duplicates
+          post :processing_statuses
           post :direct_upload
           post :create_from_blob
           get :export
         end
       end
+
+      # Resumable chunked uploads for large files (admin/moderator only)
+      resources :upload_sessions, only: [:create, :show] do
+        member do
+          put :chunk
+          post :finalize
+        end
+      end
       
       # Artist management
       resources :artists, only: [:index, :show] do
@@ -0,0 +1,6 @@
+class AddChecksumIndexToActiveStorageBlobs < ActiveRecord::Migration[8.0]
+  def change
+    # Bulk uploaders ask which content checksums already exist before sending files
+    add_index :active_storage_blobs, :checksum, name: 'index_active_storage_blobs_on_checksum'
+  end
+end
@@ -0,0 +1,18 @@
+class CreateUploadSessions < ActiveRecord::Migration[8.0]
+  def change
+    create_table :upload_sessions, id: :uuid, default: -> { 'gen_random_uuid()' } do |t|
+      t.references :user, null: false, foreign_key: true, type: :uuid
+      t.string :filename, null: false
+      t.string :content_type
+      t.bigint :byte_size, null: false
+      t.string :checksum
+      t.bigint :received_bytes, default: 0, null: false
+      t.string :status, default: 'open', null: false
+      t.uuid :song_id
+
+      t.timestamps
+    end
+
+    add_index :upload_sessions, :status
+  end
+end
@@ -0,0 +1,7 @@
+class AddProcessedAtToSongs < ActiveRecord::Migration[8.0]
+  def change
+    # When processing settled; updated_at moves with every later edit of the song.
+    # Left null for existing songs, whose processing time isn't known.
+    add_column :songs, :processed_at, :datetime
+  end
+end
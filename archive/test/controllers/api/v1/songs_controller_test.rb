@@ -91,6 +91,38 @@ class Api::V1::SongsControllerTest < ActionDispatch::IntegrationTest
     assert_equal "completed", song.processing_status
   end
 
+  test "should trust client metadata and skip extraction" do
+    audio_file = fixture_file_upload("files/test.mp3", "audio/mpeg")
+
+    assert_no_enqueued_jobs only: AudioFileProcessingJob do
+      post api_v1_songs_bulk_upload_url,
+           params: {
+             audio_file: audio_file,
+             client_metadata: "true",
+             file_format: "mp3",
+             title: "Client_Song",
+             artist_name: "Client Artist",
+             album_title: "Client Album",
+             genre_name: "Jazz",
+             track_number: "4",
+             duration: "215"
+           },
+           headers: { "Authorization" => "Bearer #{@api_token}" }
+    end
+
+    assert_response :created
+
+    song = Song.last
+    assert_equal "Client Song", song.title
+    assert_equal "Client Artist", song.artist.name
+    assert_equal "Client Album", song.album.title
+    assert_equal "Jazz", song.genre.name
+    assert_equal 4, song.track_number
+    assert_equal 215, song.duration
+    assert_equal "mp3", song.file_format
+    assert_equal "completed", song.processing_status
+  end
+
   test "should upload song with skip metadata extraction" do
     audio_file = fixture_file_upload("files/test.mp3", "audio/mpeg")
     
@@ -168,6 +200,159 @@ class Api::V1::SongsControllerTest < ActionDispatch::IntegrationTest
     assert_equal "Insufficient permissions for upload", json["message"]
   end
 
+  test "should upload several songs in one batch request" do
+    assert_difference "Song.count", 2 do
+      post bulk_upload_batch_api_v1_songs_url,
+           params: {
+             files: {
+               "0" => { audio_file: fixture_file_upload("files/test.mp3", "audio/mpeg"), title: "First Song" },
+               "1" => { audio_file: fixture_file_upload("files/test.mp3", "audio/mpeg"), filename: "second.mp3" }
+             }
+           },
+           headers: { "Authorization" => "Bearer #{@api_token}" }
+    end
+
+    assert_response :success
+
+    json = JSON.parse(response.body)
+    assert json["success"]
+    assert_equal 2, json["uploaded"]
+    assert_equal [0, 1], json["results"].map { |result| result["index"] }
+    assert_equal "First Song", Song.find(json["results"][0]["song"]["id"]).title
+    assert_equal "second.mp3", Song.find(json["results"][1]["song"]["id"]).original_filename
+  end
+
+  test "should report per file failures in a batch request" do
+    assert_difference "Song.count", 1 do
+      post bulk_upload_batch_api_v1_songs_url,
+           params: {
+             files: {
+               "0" => { filename: "missing.mp3" },
+               "1" => { audio_file: fixture_file_upload("files/test.mp3", "audio/mpeg") }
+             }
+           },
+           headers: { "Authorization" => "Bearer #{@api_token}" }
+    end
+
+    assert_response :success
+
+    json = JSON.parse(response.body)
+    assert_not json["success"]
+    assert_equal 1, json["failed"]
+    assert_not json["results"][0]["success"]
+    assert_equal "No audio file provided", json["results"][0]["message"]
+    assert json["results"][1]["success"]
+  end
+
+  test "should require files for batch upload" do
+    post bulk_upload_batch_api_v1_songs_url,
+         headers: { "Authorization" => "Bearer #{@api_token}" }
+
+    assert_response :unprocessable_entity
+  end
+
+  test "should report existing songs by content checksum" do
+    audio_file = fixture_file_upload("files/test.mp3", "audio/mpeg")
+    post api_v1_songs_bulk_upload_url,
+         params: { audio_file: audio_file },
+         headers: { "Authorization" => "Bearer #{@api_token}" }
+    song = Song.last
+    checksum = song.audio_file.blob.checksum
+
+    post check_duplicates_api_v1_songs_url,
+         params: { checksums: [checksum, "not-a-real-checksum"] },
+         headers: { "Authorization" => "Bearer #{@api_token}" },
+         as: :json
+
+    assert_response :success
+
+    json = JSON.parse(response.body)
+    assert json["success"]
+    assert_equal({ checksum => song.id }, json["existing"])
+  end
+
+  test "should reject too many checksums in one lookup" do
+    checksums = Array.new(Api::V1::SongsController::MAX_DUPLICATE_CHECKSUMS + 1) { |i| "checksum-#{i}" }
+
+    post check_duplicates_api_v1_songs_url,
+         params: { checksums: checksums },
+         headers: { "Authorization" => "Bearer #{@api_token}" },
+         as: :json
+
+    assert_response :unprocessable_entity
+  end
+
+  test "should report processing statuses of uploaded songs" do
+    @song.update_columns(processed_at: @song.created_at + 2.5, updated_at: @song.created_at + 600)
+    pending_song = songs(:two)
+    pending_song.update_column(:processing_status, "pending")
+
+    post processing_statuses_api_v1_songs_url,
+         params: { ids: [@song.id, pending_song.id, 0] },
+         headers: { "Authorization" => "Bearer #{@api_token}" },
+         as: :json
+
+    assert_response :success
+
+    json = JSON.parse(response.body)
+    assert json["success"]
+    assert_equal @song.processing_status, json["songs"][@song.id.to_s]["processing_status"]
+    # Time until processing settled, not until the song was last edited
+    assert_equal 2.5, json["songs"][@song.id.to_s]["processing_seconds"]
+    assert_equal "pending", json["songs"][pending_song.id.to_s]["processing_status"]
+    assert_nil json["songs"][pending_song.id.to_s]["processing_seconds"]
+    assert_equal ["0"], json["missing"]
+  end
+
+  test "should not report processing time for songs settled before it was recorded" do
+    @song.update_column(:processed_at, nil)
+
+    post processing_statuses_api_v1_songs_url,
+         params: { ids: [@song.id] },
+         headers: { "Authorization" => "Bearer #{@api_token}" },
+         as: :json
+
+    assert_response :success
+    assert_nil JSON.parse(response.body)["songs"][@song.id.to_s]["processing_seconds"]
+  end
+
+  test "should report an upload as pending until its processing job settles it" do
+    with_background_processing do
+      AudioFileProcessor.stub :new, ->(*args) { raise "Unreadable tags" } do
+        assert_enqueued_with(job: AudioFileProcessingJob) do
+          post api_v1_songs_bulk_upload_url,
+               params: { audio_file: fixture_file_upload("files/test.mp3", "audio/mpeg") },
+               headers: { "Authorization" => "Bearer #{@api_token}" }
+        end
+        assert_response :created
+        song_id = JSON.parse(response.body)["song"]["id"].to_s
+        assert_equal "pending", JSON.parse(response.body)["song"]["processing_status"]
+
+        status = processing_status_of(song_id)
+        assert_equal "pending", status["processing_status"]
+        assert_nil status["processing_seconds"]
+
+        perform_enqueued_jobs only: AudioFileProcessingJob
+
+        status = processing_status_of(song_id)
+        assert_equal "failed", status["processing_status"]
+        assert_equal "Unreadable tags", status["processing_error"]
+        assert_not_nil status["processing_seconds"]
+      end
+    end
+  end
+
+  test "should reject too many ids in one status request" do
+    ids = Array.new(Api::V1::SongsController::MAX_STATUS_IDS + 1) { |i| i + 1 }
+
+    post processing_statuses_api_v1_songs_url,
+         params: { ids: ids },
+         headers: { "Authorization" => "Bearer #{@api_token}" },
+         as: :json
+
+    assert_response :unprocessable_entity
+  end
+
   test "should handle bulk create" do
     songs_data = [
       {
@@ -264,6 +449,24 @@ class Api::V1::SongsControllerTest < ActionDispatch::IntegrationTest
 
   private
 
+  # Run with processing in AudioFileProcessingJob rather than inline
+  def with_background_processing
+    inline = Rails.configuration.x.inline_audio_processing
+    Rails.configuration.x.inline_audio_processing = false
+    yield
+  ensure
+    Rails.configuration.x.inline_audio_processing = inline
+  end
+
+  def processing_status_of(song_id)
+    post processing_statuses_api_v1_songs_url,
+         params: { ids: [song_id] },
+         headers: { "Authorization" => "Bearer #{@api_token}" },
+         as: :json
+    assert_response :success
+    JSON.parse(response.body)["songs"][song_id]
+  end
+
   def create_api_token(user)
     payload = {
       user_id: user.id,
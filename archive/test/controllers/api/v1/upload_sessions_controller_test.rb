@@ -0,0 +1,138 @@
+require "test_helper"
+
+class Api::V1::UploadSessionsControllerTest < ActionDispatch::IntegrationTest
+  def setup
+    @user = users(:admin)
+    @api_token = create_api_token(@user)
+    @data = file_fixture("test.mp3").binread
+    @half = @data.bytesize / 2
+  end
+
+  test "should upload a file in chunks and finalize it into a song" do
+    upload_session = open_session_for(@data)
+
+    put_chunk(upload_session["id"], 0, @data.byteslice(0, @half))
+    assert_response :success
+    assert_equal @half, JSON.parse(response.body)["received_bytes"]
+
+    put_chunk(upload_session["id"], @half, @data.byteslice(@half..))
+    assert_response :success
+    assert_equal @data.bytesize, JSON.parse(response.body)["received_bytes"]
+
+    assert_difference "Song.count", 1 do
+      post finalize_api_v1_upload_session_url(upload_session["id"]),
+           params: { title: "Chunked Song" },
+           headers: auth_headers
+    end
+
+    assert_response :created
+    song = Song.find(JSON.parse(response.body)["song"]["id"])
+    assert_equal "Chunked Song", song.title
+    assert_equal "test.mp3", song.original_filename
+    assert_equal Digest::MD5.base64digest(@data), song.audio_file.checksum
+  end
+
+  test "should report progress so an interrupted upload can resume" do
+    upload_session = open_session_for(@data)
+    put_chunk(upload_session["id"], 0, @data.byteslice(0, @half))
+
+    get api_v1_upload_session_url(upload_session["id"]), headers: auth_headers
+
+    assert_response :success
+    assert_equal @half, JSON.parse(response.body)["upload_session"]["received_bytes"]
+  end
+
+  test "should accept a resent chunk without storing it twice" do
+    upload_session = open_session_for(@data)
+    put_chunk(upload_session["id"], 0, @data.byteslice(0, @half))
+    put_chunk(upload_session["id"], 0, @data.byteslice(0, @half))
+
+    assert_response :success
+    assert_equal @half, JSON.parse(response.body)["received_bytes"]
+  end
+
+  test "should reject a chunk at the wrong offset" do
+    upload_session = open_session_for(@data)
+    put_chunk(upload_session["id"], @half, @data.byteslice(@half..))
+
+    assert_response :conflict
+    assert_equal 0, JSON.parse(response.body)["received_bytes"]
+  end
+
+  test "should reject a chunk with a bad checksum" do
+    upload_session = open_session_for(@data)
+    put_chunk(upload_session["id"], 0, @data.byteslice(0, @half), checksum: Digest::MD5.base64digest("other"))
+
+    assert_response :unprocessable_entity
+  end
+
+  test "should not finalize an incomplete upload" do
+    upload_session = open_session_for(@data)
+    put_chunk(upload_session["id"], 0, @data.byteslice(0, @half))
+
+    assert_no_difference "Song.count" do
+      post finalize_api_v1_upload_session_url(upload_session["id"]), headers: auth_headers
+    end
+
+    assert_response :unprocessable_entity
+  end
+
+  test "should refuse a finalize while another one is running" do
+    upload_session = open_session_for(@data)
+    put_chunk(upload_session["id"], 0, @data)
+    UploadSession.find(upload_session["id"]).claim_for_finalize!
+
+    assert_no_difference "Song.count" do
+      post finalize_api_v1_upload_session_url(upload_session["id"]), headers: auth_headers
+    end
+
+    assert_response :conflict
+  end
+
+  test "should return the same song when finalize is repeated" do
+    upload_session = open_session_for(@data)
+    put_chunk(upload_session["id"], 0, @data)
+    post finalize_api_v1_upload_session_url(upload_session["id"]), headers: auth_headers
+    song_id = JSON.parse(response.body)["song"]["id"]
+
+    assert_no_difference "Song.count" do
+      post finalize_api_v1_upload_session_url(upload_session["id"]), headers: auth_headers
+    end
+
+    assert_response :success
+    assert_equal song_id, JSON.parse(response.body)["song"]["id"]
+  end
+
+  private
+
+  def auth_headers
+    { "Authorization" => "Bearer #{@api_token}" }
+  end
+
+  def open_session_for(data)
+    post api_v1_upload_sessions_url,
+         params: {
+           filename: "test.mp3",
+           content_type: "audio/mpeg",
+           byte_size: data.bytesize,
+           checksum: Digest::MD5.base64digest(data)
+         },
+         headers: auth_headers
+    assert_response :created
+    JSON.parse(response.body)["upload_session"]
+  end
+
+  def put_chunk(id, offset, chunk, checksum: Digest::MD5.base64digest(chunk))
+    put chunk_api_v1_upload_session_url(id, offset: offset),
+        params: chunk,
+        headers: auth_headers.merge("Content-Type" => "application/octet-stream", "Content-MD5" => checksum)
+  end
+
+  def create_api_token(user)
+    payload = {
+      user_id: user.id,
+      exp: Time.current.to_i + 3600 # 1 hour from now
+    }
+    Base64.urlsafe_encode64(payload.to_json)
+  end
+end
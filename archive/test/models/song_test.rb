@@ -107,6 +107,21 @@ class SongTest < ActiveSupport::TestCase
 
   end
 
+  test "should stamp processed_at when processing settles and keep it on later edits" do
+    song = Song.create!(title: "Test Song", user: @user, processing_status: "pending")
+    assert_nil song.processed_at
+
+    song.update!(processing_status: "completed")
+    processed_at = song.processed_at
+    assert_not_nil processed_at
+
+    song.update!(title: "Renamed Song")
+    assert_equal processed_at, song.reload.processed_at
+
+    song.update!(processing_status: "pending")
+    assert_nil song.processed_at
+  end
+
   test "should validate audio file type" do
     song = Song.new(title: "Test Song", user: @user)
     
@@ -0,0 +1,33 @@
+require "test_helper"
+
+class UploadSessionTest < ActiveSupport::TestCase
+  def setup
+    @user = users(:admin)
+  end
+
+  test "should let only one finalize claim an open session" do
+    upload_session = UploadSession.create!(user: @user, filename: "test.mp3", byte_size: 10)
+
+    assert upload_session.claim_for_finalize!
+    assert_equal "finalizing", upload_session.status
+    assert_not UploadSession.find(upload_session.id).claim_for_finalize!
+
+    upload_session.release!
+    assert upload_session.claim_for_finalize!
+  end
+
+  test "should expire idle unfinished sessions with their part files" do
+    idle = UploadSession.create!(user: @user, filename: "idle.mp3", byte_size: 10)
+    idle.update_columns(updated_at: 8.days.ago)
+    active = UploadSession.create!(user: @user, filename: "active.mp3", byte_size: 10)
+    completed = UploadSession.create!(user: @user, filename: "done.mp3", byte_size: 10)
+    completed.update_columns(status: "completed", updated_at: 8.days.ago)
+
+    assert_equal 1, UploadSession.expire_idle!
+
+    assert_not UploadSession.exists?(idle.id)
+    assert_not File.exist?(idle.part_path)
+    assert UploadSession.exists?(active.id)
+    assert UploadSession.exists?(completed.id)
+  end
+end
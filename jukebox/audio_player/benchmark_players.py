@@ -0,0 +1,693 @@
+#!/usr/bin/env python3
+"""
+Cross-backend playback benchmark for the jukebox players.
+
+Drives every player implementation headless through the same scripted session
+and reports comparable numbers so a backend can be picked on data:
+
+    player          player.py        MPD (spawns a private mpd with a null output)
+    player2         player2.py       pygame (SDL dummy audio driver)
+    player3         player3.py       mpv (ao=null)
+    player4         player4.py       mpv (ao=null)
+    archive_player  player/player    mpv service package (ao=null)
+
+Nothing outside this machine is touched: the benchmark runs a stub jukebox API
+(/api/jukebox/player/next, /api/jukebox/health and the silent WAV tracks it hands
+out) and a small in-process Redis stand-in speaking RESP, so each backend talks to
+them with its normal redis/requests clients. Each backend runs in its own child
+process; CPU time and RSS are sampled for that whole process tree (including
+mpv/mpd/ffmpeg helpers) from /proc, so this script is Linux only.
+
+Metrics (per backend):
+    gap_*_s            Inter-track gap on natural track changes: start of track N+1
+                       minus the nominal end of track N. Negative means overlap
+                       (crossfade).
+    skip_latency_*_s   Time from pushing a skip command to the next track starting.
+    cpu_s_per_hour     CPU seconds (user+sys, whole tree) per hour of session.
+    peak_rss_mb        Peak resident memory of the whole tree.
+
+Track start times are reconstructed from the status each player writes to Redis
+(status timestamp minus elapsed seconds), so they are not limited to the ~1s
+status cadence.
+
+Usage:
+    python3 benchmark_players.py [--backends player3,player4] [options]
+
+Options:
+    --backends LIST       Comma separated backends (default: all)
+    --track-seconds N     Length of each generated silent track (default: 30)
+    --natural-tracks N    Tracks to let play through for gap measurement (default: 4)
+    --skips N             Number of scripted skips (default: 5)
+    --skip-interval N     Seconds between skips (default: 8)
+    --json PATH           Also write the results as JSON
+    -v, --verbose         Show backend output
+
+Dependencies:
+    Each backend's own requirements (redis, requests, python-mpd2, pygame,
+    pydantic-settings) plus the mpv, mpd and ffmpeg binaries it uses. Backends whose
+    requirements are missing are reported as unavailable and skipped.
+"""
+
+import os
+import sys
+import json
+import time
+import wave
+import shutil
+import signal
+import socket
+import argparse
+import logging
+import tempfile
+import threading
+import subprocess
+import socketserver
+import importlib.util
+from pathlib import Path
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+HERE = Path(__file__).resolve().parent
+REPO_ROOT = HERE.parent.parent
+
+STATUS_KEY = "jukebox:player_status"
+CMD_LIST = "jukebox:commands"
+DESIRED = "jukebox:desired_state"
+
+# name -> how to launch it and what it needs on this machine
+BACKENDS = {
+    "player": {"kind": "module", "path": HERE / "player.py", "binaries": ["mpd"], "modules": ["redis", "requests", "mpd"]},
+    "player2": {"kind": "module", "path": HERE / "player2.py", "binaries": ["ffmpeg"], "modules": ["redis", "requests", "pygame"]},
+    "player3": {"kind": "module", "path": HERE / "player3.py", "binaries": ["mpv"], "modules": ["redis", "requests"]},
+    "player4": {"kind": "module", "path": HERE / "player4.py", "binaries": ["mpv"], "modules": ["redis", "requests"]},
+    "archive_player": {"kind": "package", "path": REPO_ROOT / "player", "binaries": ["mpv"], "modules": ["redis", "requests", "pydantic_settings"]},
+}
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+log = logging.getLogger("benchmark")
+
+
+# ------------------- Redis stand-in -------------------
+class RedisStandIn:
+    """
+    Minimal thread-safe key store covering the commands the players use.
+    Values are bytes, like a real server returns them.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.data: Dict[bytes, Any] = {}
+
+    def execute(self, args: List[bytes]):
+        cmd = args[0].upper()
+        with self.lock:
+            if cmd == b"PING":
+                return ("simple", b"PONG")
+            if cmd in (b"SELECT", b"CLIENT", b"READONLY"):
+                return ("simple", b"OK")
+            if cmd == b"GET":
+                val = self.data.get(args[1])
+                return val if isinstance(val, bytes) else None
+            if cmd == b"SET":
+                self.data[args[1]] = args[2]
+                return ("simple", b"OK")
+            if cmd == b"DEL":
+                return sum(1 for k in args[1:] if self.data.pop(k, None) is not None)
+            if cmd == b"EXISTS":
+                return sum(1 for k in args[1:] if k in self.data)
+            if cmd == b"HSET":
+                h = self.data.setdefault(args[1], {})
+                new = 0
+                for i in range(2, len(args) - 1, 2):
+                    new += args[i] not in h
+                    h[args[i]] = args[i + 1]
+                return new
+            if cmd == b"HGETALL":
+                h = self.data.get(args[1], {})
+                return [x for kv in h.items() for x in kv]
+            if cmd == b"RPUSH":
+                lst = self.data.setdefault(args[1], [])
+                lst.extend(args[2:])
+                return len(lst)
+            if cmd == b"LPOP":
+                lst = self.data.get(args[1])
+                return lst.pop(0) if lst else None
+            if cmd == b"LLEN":
+                return len(self.data.get(args[1], []))
+            if cmd == b"LRANGE":
+                lst = self.data.get(args[1], [])
+                start, stop = int(args[2]), int(args[3])
+                stop = len(lst) if stop == -1 else stop + 1
+                return lst[start:stop]
+            if cmd == b"LTRIM":
+                lst = self.data.get(args[1], [])
+                start, stop = int(args[2]), int(args[3])
+                stop = len(lst) if stop == -1 else stop + 1
+                self.data[args[1]] = lst[start:stop]
+                return ("simple", b"OK")
+        return ("error", b"ERR unknown command '" + cmd + b"'")
+
+    # in-process helpers for the benchmark driver
+    def push_command(self, action: str):
+        self.execute([b"RPUSH", CMD_LIST.encode(), json.dumps({"action": action}).encode()])
+
+    def status(self) -> Dict[str, str]:
+        with self.lock:
+            h = dict(self.data.get(STATUS_KEY.encode(), {}))
+        return {k.decode(): v.decode("utf-8", "replace") for k, v in h.items()}
+
+
+class _RespHandler(socketserver.StreamRequestHandler):
+    def _read_command(self) -> Optional[List[bytes]]:
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b"*"):
+            return line.split()  # inline command
+        args = []
+        for _ in range(int(line[1:])):
+            size = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(size + 2)[:-2])
+        return args
+
+    def _encode(self, value) -> bytes:
+        if value is None:
+            return b"$-1\r\n"
+        if isinstance(value, tuple):
+            kind, payload = value
+            return (b"+" if kind == "simple" else b"-") + payload + b"\r\n"
+        if isinstance(value, int):
+            return b":%d\r\n" % value
+        if isinstance(value, bytes):
+            return b"$%d\r\n%s\r\n" % (len(value), value)
+        return b"*%d\r\n" % len(value) + b"".join(self._encode(v) for v in value)
+
+    def handle(self):
+        while True:
+            try:
+                args = self._read_command()
+            except (ValueError, ConnectionError):
+                return
+            if args is None:
+                return
+            if not args:
+                continue
+            self.wfile.write(self._encode(self.server.store.execute(args)))
+
+
+class RespServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, store: RedisStandIn):
+        self.store = store
+        super().__init__(("127.0.0.1", 0), _RespHandler)
+
+
+# ------------------- stub jukebox API -------------------
+class StubJukeboxAPI(ThreadingHTTPServer):
+    """Hands out an endless sequence of songs that point at the generated tracks."""
+    daemon_threads = True
+
+    def __init__(self, tracks: List[Path], track_seconds: float):
+        super().__init__(("127.0.0.1", 0), _StubHandler)
+        self.tracks = tracks
+        self.track_seconds = track_seconds
+        self.lock = threading.Lock()
+        self.next_id = 1
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def next_song(self) -> Dict[str, Any]:
+        with self.lock:
+            song_id = self.next_id
+            self.next_id += 1
+        index = (song_id - 1) % len(self.tracks)
+        return {
+            "id": song_id,
+            "title": f"Benchmark Track {song_id}",
+            "artist": "Benchmark",
+            "album": "Silence",
+            "duration": self.track_seconds,
+            "stream_url": f"{self.base_url}/media/{index}.wav",
+        }
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.startswith("/api/jukebox/player/next"):
+            self._send_json(self.server.next_song())
+        elif self.path.startswith("/api/jukebox/health"):
+            self._send_json({"status": "ok"})
+        elif self.path.startswith("/media/"):
+            try:
+                track = self.server.tracks[int(self.path.rsplit("/", 1)[1].split(".")[0])]
+            except (ValueError, IndexError):
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "audio/wav")
+            self.send_header("Content-Length", str(track.stat().st_size))
+            self.end_headers()
+            with open(track, "rb") as f:
+                shutil.copyfileobj(f, self.wfile)
+        else:
+            self.send_error(404)
+
+    do_HEAD = do_GET
+
+
+def write_silent_tracks(directory: Path, count: int, seconds: float) -> List[Path]:
+    """Generate silent 44.1kHz stereo 16-bit WAV tracks."""
+    tracks = []
+    frames = int(44100 * seconds)
+    chunk = b"\0" * 4 * 44100
+    for i in range(count):
+        path = directory / f"{i}.wav"
+        with wave.open(str(path), "wb") as w:
+            w.setnchannels(2)
+            w.setsampwidth(2)
+            w.setframerate(44100)
+            remaining = frames
+            while remaining > 0:
+                n = min(remaining, 44100)
+                w.writeframes(chunk[:n * 4])
+                remaining -= n
+        tracks.append(path)
+    return tracks
+
+
+# ------------------- process tree sampling -------------------
+CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+
+def _proc_stat(pid: int):
+    """Return (ppid, cpu_seconds incl. reaped children) or None."""
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as f:
+            raw = f.read()
+    except OSError:
+        return None
+    rest = raw[raw.rindex(b")") + 2:].split()
+    utime, stime, cutime, cstime = (int(x) for x in rest[11:15])
+    return int(rest[1]), (utime + stime + cutime + cstime) / CLK_TCK
+
+
+def _proc_rss_kb(pid: int) -> int:
+    try:
+        with open(f"/proc/{pid}/status", "rb") as f:
+            for line in f:
+                if line.startswith(b"VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def process_tree(root: int) -> List[int]:
+    children: Dict[int, List[int]] = {}
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            st = _proc_stat(int(entry))
+            if st:
+                children.setdefault(st[0], []).append(int(entry))
+    tree, stack = [], [root]
+    while stack:
+        pid = stack.pop()
+        tree.append(pid)
+        stack.extend(children.get(pid, []))
+    return tree
+
+
+class TreeSampler(threading.Thread):
+    """Samples CPU seconds and RSS of a process tree every `interval` seconds."""
+    def __init__(self, root: int, interval: float = 0.5):
+        super().__init__(daemon=True)
+        self.root = root
+        self.interval = interval
+        self.cpu_seconds = 0.0
+        self.peak_rss_kb = 0
+        self._done = threading.Event()
+
+    def sample(self):
+        cpu, rss = 0.0, 0
+        for pid in process_tree(self.root):
+            st = _proc_stat(pid)
+            if st:
+                cpu += st[1]
+                rss += _proc_rss_kb(pid)
+        self.cpu_seconds = max(self.cpu_seconds, cpu)
+        self.peak_rss_kb = max(self.peak_rss_kb, rss)
+
+    def run(self):
+        while not self._done.wait(self.interval):
+            self.sample()
+
+    def stop(self):
+        self._done.set()
+        self.sample()
+
+
+# ------------------- scripted session -------------------
+def _song_id(status: Dict[str, str]) -> Optional[str]:
+    if status.get("song_id"):
+        return status["song_id"]
+    try:
+        meta = json.loads(status.get("current_song_metadata") or "{}")
+    except ValueError:
+        return None
+    return str(meta["id"]) if meta.get("id") is not None else None
+
+
+def _is_playing(status: Dict[str, str]) -> bool:
+    return status.get("actual_state") in ("play", "playing")
+
+
+class SessionRecorder(threading.Thread):
+    """Polls the status hash and reconstructs when each track started."""
+    def __init__(self, store: RedisStandIn, interval: float = 0.1):
+        super().__init__(daemon=True)
+        self.store = store
+        self.interval = interval
+        self.track_starts: Dict[str, float] = {}
+        self.order: List[str] = []
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.wait(self.interval):
+            status = self.store.status()
+            song = _song_id(status)
+            if not song or not _is_playing(status) or song in self.track_starts:
+                continue
+            try:
+                elapsed = float(status.get("elapsed_seconds") or 0)
+                stamp = float(status.get("timestamp") or status.get("timestamp_unix") or time.time())
+            except ValueError:
+                continue
+            if elapsed <= 0:
+                continue
+            self.track_starts[song] = stamp - elapsed
+            self.order.append(song)
+
+    def stop(self):
+        self._done.set()
+
+
+def run_session(store: RedisStandIn, args) -> Dict[str, Any]:
+    """Push the identical command script and derive gap/skip metrics."""
+    recorder = SessionRecorder(store)
+    recorder.start()
+    commands = []
+
+    def push(action: str):
+        commands.append((time.time(), action))
+        store.push_command(action)
+
+    session_start = time.time()
+    push("play")
+    time.sleep(args.natural_tracks * args.track_seconds + 2)
+    skip_times = []
+    for _ in range(args.skips):
+        skip_times.append(time.time())
+        push("skip")
+        time.sleep(args.skip_interval)
+    push("pause")
+    time.sleep(3)
+    push("play")
+    time.sleep(3)
+    push("stop")
+    time.sleep(2)
+    recorder.stop()
+    session_seconds = time.time() - session_start
+
+    starts = [(recorder.track_starts[s], s) for s in recorder.order]
+    starts.sort()
+    first_skip = skip_times[0] if skip_times else float("inf")
+    gaps = [
+        b - (a + args.track_seconds)
+        for (a, _), (b, _) in zip(starts, starts[1:])
+        if b < first_skip
+    ]
+    latencies = []
+    for t in skip_times:
+        later = [s for s, _ in starts if s > t - 0.5]
+        if later:
+            latencies.append(max(0.0, later[0] - t))
+
+    return {
+        "session_seconds": session_seconds,
+        "tracks_started": len(starts),
+        "gaps": gaps,
+        "skip_latencies": latencies,
+        "skips_missed": len(skip_times) - len(latencies),
+    }
+
+
+def _summary(values: List[float], prefix: str) -> Dict[str, Optional[float]]:
+    if not values:
+        return {f"{prefix}_mean_s": None, f"{prefix}_max_s": None}
+    return {
+        f"{prefix}_mean_s": round(sum(values) / len(values), 3),
+        f"{prefix}_max_s": round(max(values), 3),
+    }
+
+
+# ------------------- backend child process -------------------
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _missing_requirements(name: str) -> Optional[str]:
+    spec = BACKENDS[name]
+    for binary in spec["binaries"]:
+        if not shutil.which(binary):
+            return f"{binary} not found in PATH"
+    for module in spec["modules"]:
+        if importlib.util.find_spec(module) is None:
+            return f"python module '{module}' not installed"
+    return None
+
+
+def _kill_descendants():
+    for pid in reversed(process_tree(os.getpid())[1:]):
+        try:
+            os.kill(pid, signal.SIGKILL)
+        except OSError:
+            pass
+
+
+def _start_private_mpd(workdir: Path, port: int) -> subprocess.Popen:
+    for sub in ("music", "playlists"):
+        (workdir / sub).mkdir(exist_ok=True)
+    conf = workdir / "mpd.conf"
+    conf.write_text(
+        f'music_directory "{workdir / "music"}"\n'
+        f'playlist_directory "{workdir / "playlists"}"\n'
+        f'db_file "{workdir / "mpd.db"}"\n'
+        f'state_file "{workdir / "mpd.state"}"\n'
+        'bind_to_address "127.0.0.1"\n'
+        f'port "{port}"\n'
+        'audio_output {\n    type "null"\n    name "benchmark"\n}\n'
+    )
+    proc = subprocess.Popen(["mpd", "--no-daemon", str(conf)],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+            return proc
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("private mpd did not come up")
+
+
+def run_child(name: str):
+    """Entry point inside the child process: run one backend until SIGTERM."""
+    def _terminate(_s, _f):
+        _kill_descendants()
+        os._exit(0)
+    signal.signal(signal.SIGTERM, _terminate)
+
+    spec = BACKENDS[name]
+    api_url = os.environ["JUKEBOX_API_URL"]
+
+    if spec["kind"] == "package":
+        sys.path.insert(0, str(spec["path"]))
+        from player.player_logic import Player
+        app = Player()
+        signal.signal(signal.SIGTERM, lambda _s, _f: (app.shutdown(), _terminate(_s, _f)))
+        app.run()
+        _terminate(None, None)
+
+    module_spec = importlib.util.spec_from_file_location(f"bench_{name}", spec["path"])
+    backend = importlib.util.module_from_spec(module_spec)
+    module_spec.loader.exec_module(backend)
+
+    if name == "player":
+        # player.py hardcodes the docker host for MPD and the API; point both at the bench
+        port = _free_port()
+        _start_private_mpd(Path(os.environ["BENCH_WORKDIR"]), port)
+
+        class BenchMPDClient(backend.MPDClient):
+            def connect(self, host, port_=None, *a, **kw):
+                return super().connect("127.0.0.1", port)
+        backend.MPDClient = BenchMPDClient
+
+        original_config = backend.JukeboxPlayer.load_config
+        backend.JukeboxPlayer.load_config = lambda self: {**original_config(self), "jukebox_api_url": api_url}
+        backend.JukeboxPlayer().run()
+    elif name == "player2":
+        backend.JukeboxPlayer().run()
+    else:
+        backend.Jukebox().run()
+    _terminate(None, None)
+
+
+def benchmark_backend(name: str, api: StubJukeboxAPI, args) -> Dict[str, Any]:
+    missing = _missing_requirements(name)
+    if missing:
+        return {"backend": name, "available": False, "reason": missing}
+
+    store = RedisStandIn()
+    store.execute([b"SET", DESIRED.encode(), b"stopped"])
+    redis_server = RespServer(store)
+    threading.Thread(target=redis_server.serve_forever, daemon=True).start()
+    redis_port = str(redis_server.server_address[1])
+
+    with tempfile.TemporaryDirectory(prefix=f"bench_{name}_") as workdir:
+        mpv_home = Path(workdir) / "mpv"
+        mpv_home.mkdir()
+        (mpv_home / "mpv.conf").write_text("ao=null\n")
+        env = dict(os.environ)
+        env.update({
+            "REDIS_HOST": "127.0.0.1", "REDIS_PORT": redis_port, "REDIS_DB": "1",
+            "PLAYER_REDIS_HOST": "127.0.0.1", "PLAYER_REDIS_PORT": redis_port, "PLAYER_REDIS_DB": "1",
+            "JUKEBOX_API_URL": f"{api.base_url}/api",
+            "PLAYER_API_URL": f"{api.base_url}/api",
+            "JUKEBOX_MPV_SOCKET": str(Path(workdir) / "mpv.sock"),
+            "PLAYER_MPV_SOCKET": str(Path(workdir) / "mpv.sock"),
+            "JUKEBOX_LOG_FILE": str(Path(workdir) / "player.log"),
+            "MPV_HOME": str(mpv_home),
+            "SDL_AUDIODRIVER": "dummy",
+            "BENCH_WORKDIR": workdir,
+        })
+        output = None if args.verbose else subprocess.DEVNULL
+        child = subprocess.Popen([sys.executable, str(Path(__file__).resolve()), "--child", name],
+                                 cwd=workdir, env=env, stdout=output, stderr=output)
+        sampler = TreeSampler(child.pid)
+        sampler.start()
+        try:
+            deadline = time.time() + 30
+            while not store.status() and time.time() < deadline:
+                if child.poll() is not None:
+                    return {"backend": name, "available": False,
+                            "reason": f"backend exited with code {child.returncode} during startup"}
+                time.sleep(0.2)
+            if not store.status():
+                return {"backend": name, "available": False, "reason": "no status written within 30s"}
+
+            cpu_before = sampler.cpu_seconds
+            log.info(f"[{name}] running scripted session")
+            session = run_session(store, args)
+            sampler.stop()
+        finally:
+            sampler.stop()
+            if child.poll() is None:
+                child.terminate()
+                try:
+                    child.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    child.kill()
+            redis_server.shutdown()
+            redis_server.server_close()
+
+    cpu = sampler.cpu_seconds - cpu_before
+    result = {
+        "backend": name,
+        "available": True,
+        "tracks_started": session["tracks_started"],
+        "skips_missed": session["skips_missed"],
+        "session_seconds": round(session["session_seconds"], 1),
+        "cpu_s_per_hour": round(cpu / session["session_seconds"] * 3600, 1),
+        "peak_rss_mb": round(sampler.peak_rss_kb / 1024, 1),
+    }
+    result.update(_summary(session["gaps"], "gap"))
+    result.update(_summary(session["skip_latencies"], "skip_latency"))
+    return result
+
+
+def print_results(results: List[Dict[str, Any]]):
+    columns = ["gap_mean_s", "gap_max_s", "skip_latency_mean_s", "skip_latency_max_s",
+               "cpu_s_per_hour", "peak_rss_mb", "tracks_started", "skips_missed"]
+    print()
+    print(f"{'backend':<16}" + "".join(f"{c:>21}" for c in columns))
+    for r in results:
+        if not r["available"]:
+            print(f"{r['backend']:<16}  unavailable: {r['reason']}")
+            continue
+        cells = ("-" if r.get(c) is None else str(r[c]) for c in columns)
+        print(f"{r['backend']:<16}" + "".join(f"{c:>21}" for c in cells))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the jukebox player backends against each other.")
+    parser.add_argument("--backends", default=",".join(BACKENDS),
+                        help=f"Comma separated backends (default: {','.join(BACKENDS)})")
+    parser.add_argument("--track-seconds", type=float, default=30, help="Length of each silent track (default: 30)")
+    parser.add_argument("--natural-tracks", type=int, default=4, help="Tracks to play through for gap measurement (default: 4)")
+    parser.add_argument("--skips", type=int, default=5, help="Number of scripted skips (default: 5)")
+    parser.add_argument("--skip-interval", type=float, default=8, help="Seconds between skips (default: 8)")
+    parser.add_argument("--json", help="Write results to this JSON file")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Show backend output")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child)
+        return
+
+    names = [n.strip() for n in args.backends.split(",") if n.strip()]
+    unknown = [n for n in names if n not in BACKENDS]
+    if unknown:
+        print(f"Error: unknown backend(s): {', '.join(unknown)}")
+        sys.exit(1)
+    if not os.path.isdir("/proc"):
+        print("Error: /proc is required for CPU/RSS sampling (Linux only)")
+        sys.exit(1)
+
+    with tempfile.TemporaryDirectory(prefix="bench_tracks_") as tmp:
+        tracks = write_silent_tracks(Path(tmp), 3, args.track_seconds)
+        api = StubJukeboxAPI(tracks, args.track_seconds)
+        threading.Thread(target=api.serve_forever, daemon=True).start()
+        results = []
+        try:
+            for name in names:
+                log.info(f"Benchmarking {name}")
+                results.append(benchmark_backend(name, api, args))
+        finally:
+            api.shutdown()
+
+    print_results(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"settings": {k: v for k, v in vars(args).items() if k != "child"},
+                       "results": results}, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -73,7 +73,8 @@ from tqdm import tqdm
 from urllib.parse import urljoin
 
 # Import the shared tracking module
-from import_tracker import BulkImportTracker, start_job_with_defaults, resume_from_last_job
+from import_tracker import BulkImportTracker, start_job_with_defaults, resume_from_last_job, remove_database
+from multipart_stream import MultipartFileEncoder
 
 # Default API URL
 DEFAULT_API_URL = "http://localhost:3000"
@@ -202,12 +203,12 @@ def upload_file(filepath, api_url, api_key, dry_run=False, verbose=False):
     headers = {"Authorization": f"Bearer {api_key}"}
     mime_type, _ = mimetypes.guess_type(filepath)
     
-    # Prepare form data - only send filename and audio file
-    files = {"audio_file": (filename, open(filepath, "rb"), mime_type or "application/octet-stream")}
-    data = {"filename": filename}  # Required filename parameter
-    
     try:
-        response = requests.post(url, headers=headers, files=files, data=data, timeout=60)
+        # Stream the multipart body from disk - only send filename and audio file
+        body = MultipartFileEncoder({"filename": filename}, "audio_file", filepath, filename,
+                                    mime_type or "application/octet-stream")
+        headers.update(body.headers())
+        response = requests.post(url, headers=headers, data=body, timeout=60)
         
         if response.status_code == 201:
             result = response.json()
@@ -279,8 +280,8 @@ def main():
 
     # Handle clear-db mode (no authentication needed)
     if args.clear_db:
-        if os.path.exists(args.tracking_db):
-            os.remove(args.tracking_db)
+        tracker.close()
+        if remove_database(args.tracking_db):
             print("🗑️  Cleared tracking database")
         else:
             print("📝 No tracking database found to clear")
@@ -355,8 +356,8 @@ def main():
     # Handle resume logic
     if args.start_over or args.clear_db:
         # Clear tracking data and start fresh
-        if os.path.exists(args.tracking_db):
-            os.remove(args.tracking_db)
+        tracker.close()
+        if remove_database(args.tracking_db):
             print("🗑️  Cleared existing tracking data")
         tracker = BulkImportTracker(args.tracking_db)
     
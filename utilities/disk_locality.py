@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Music Archive Disk Locality Helpers
+
+On spinning disks (typical NAS boxes) the cost of an import is dominated by
+seeks: files read in directory-walk order, by several upload workers at once,
+send the heads back and forth across the platters. These helpers keep the
+reads close to sequential:
+
+- ordering: files are sorted by (device, inode) or by directory before upload.
+  Inode numbers roughly follow on-disk placement on ext4/XFS, and files of
+  one directory are usually written together, so either order turns a
+  scattered walk into mostly forward reads. A stream of paths is sorted in
+  windows, so uploads start before a large scan has finished.
+- hints: posix_fadvise(SEQUENTIAL) on every upload read widens the kernel's
+  read-ahead for that file, and prefetch() (WILLNEED) lets the kernel start
+  reading the next file in line while the current one is still being sent.
+
+The hints are advisory; where posix_fadvise doesn't exist (macOS, Windows)
+they do nothing and only the ordering applies.
+
+Usage:
+    files = locality_ordered(find_audio_files(root), 'inode', window=10000)
+
+    with open(path, 'rb') as f:
+        advise_sequential(f.fileno())
+        ...
+    prefetch(next_path)   # before it is needed; returns immediately
+"""
+
+import itertools
+import logging
+import os
+from typing import Iterable, Iterator, Tuple
+
+logger = logging.getLogger(__name__)
+
+READ_ORDERS = ('scan', 'inode', 'directory')
+
+# Files sorted together when ordering a stream of paths
+DEFAULT_ORDER_WINDOW = 10000
+
+# Most bytes of a file requested ahead of time (a long WAV shouldn't flood the page cache)
+PREFETCH_BYTES = 32 * 1024 * 1024
+
+_FADVISE = hasattr(os, 'posix_fadvise')
+
+
+def inode_key(filepath: str) -> Tuple[int, int]:
+    """(device, inode) of a file; unreadable files sort last and fail at upload."""
+    try:
+        st = os.stat(filepath)
+    except OSError:
+        return (2 ** 63, 0)
+    return (st.st_dev, st.st_ino)
+
+
+def directory_key(filepath: str) -> Tuple[str, str]:
+    """(directory, filename): each directory's files together, directories in path order."""
+    return os.path.split(filepath)
+
+
+def locality_ordered(filepaths: Iterable[str], order: str, window: int = DEFAULT_ORDER_WINDOW):
+    """
+    Reorder files for disk locality.
+
+    Args:
+        filepaths: Paths to upload; a list is sorted as a whole, any other
+            iterable window files at a time
+        order: 'inode', 'directory', or 'scan' (unchanged)
+        window: Files sorted together when streaming (0: the whole stream,
+            which delays the first upload until the scan has finished)
+
+    Returns:
+        A sorted list for a list, otherwise a generator
+    """
+    if order == 'scan':
+        return filepaths
+    key = inode_key if order == 'inode' else directory_key
+    if isinstance(filepaths, list):
+        return sorted(filepaths, key=key)
+    return _ordered_windows(filepaths, key, window)
+
+
+def _ordered_windows(filepaths: Iterable[str], key, window: int) -> Iterator[str]:
+    paths = iter(filepaths)
+    while True:
+        chunk = list(itertools.islice(paths, window) if window > 0 else paths)
+        if not chunk:
+            return
+        yield from sorted(chunk, key=key)
+
+
+def advise_sequential(fd: int):
+    """Tell the kernel the open file will be read front to back (larger read-ahead)."""
+    if _FADVISE:
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        except OSError:
+            pass
+
+
+def prefetch(filepath: str) -> bool:
+    """
+    Ask the kernel to start reading a file into the page cache in the background.
+
+    Returns:
+        True if the hint was given
+    """
+    if not _FADVISE:
+        return False
+    try:
+        fd = os.open(filepath, os.O_RDONLY)
+    except OSError as e:
+        logger.debug(f"Cannot prefetch {filepath}: {e}")
+        return False
+    try:
+        os.posix_fadvise(fd, 0, PREFETCH_BYTES, os.POSIX_FADV_WILLNEED)
+        return True
+    except OSError:
+        return False
+    finally:
+        os.close(fd)
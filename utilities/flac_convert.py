@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Music Archive Lossless FLAC Conversion
+
+Converts uncompressed PCM audio (WAV and AIFF) to FLAC before upload. FLAC is
+lossless and typically about half the size of the PCM it encodes, so this
+roughly halves the bytes sent for those formats on slow uplinks while the
+archive still receives bit-identical audio.
+
+Every conversion is verified: the source and the FLAC file are both decoded
+and the MD5 of their PCM samples must match, otherwise the FLAC file is
+discarded and the original is uploaded. Only integer PCM that FLAC stores
+exactly (16- and 24-bit) is converted; float and 32-bit PCM are left alone.
+
+The FLAC file for a source is written to
+<work_dir>/<dev>-<inode>-<mtime>/<name>.flac, so an interrupted run finds it
+again (and a resumable upload of it can continue) instead of converting from
+scratch, while a source that has changed since gets a fresh conversion.
+
+Usage:
+    from flac_convert import find_ffmpeg, needs_conversion, convert_to_flac
+
+    ffmpeg = find_ffmpeg()
+    if ffmpeg and needs_conversion(path):
+        flac_path, original_size, converted_size = convert_to_flac(ffmpeg, path, work_dir)
+
+Dependencies:
+    ffmpeg and ffprobe on the PATH (or passed explicitly)
+"""
+
+import logging
+import os
+import re
+import shutil
+import subprocess
+from typing import Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Extensions of files that may hold uncompressed PCM
+CONVERTIBLE_EXTENSIONS = {'.wav', '.aif', '.aiff'}
+
+# PCM codecs (as named by ffprobe) that FLAC can store bit for bit
+LOSSLESS_PCM_CODECS = {'pcm_s16le', 'pcm_s16be', 'pcm_s24le', 'pcm_s24be'}
+
+# Converted file: (flac path, original size, converted size)
+ConvertedFile = Tuple[str, int, int]
+
+# Seconds allowed for converting or decoding one file
+CONVERT_TIMEOUT = 600
+
+
+class ConversionError(Exception):
+    """A file could not be converted to FLAC losslessly."""
+
+
+def find_ffmpeg(ffmpeg_path: Optional[str] = None) -> Optional[str]:
+    """
+    Locate ffmpeg (with ffprobe next to it or on the PATH).
+
+    Args:
+        ffmpeg_path: ffmpeg executable or the directory holding it
+
+    Returns:
+        Path to ffmpeg, or None if ffmpeg or ffprobe is not available
+    """
+    if ffmpeg_path and os.path.isdir(ffmpeg_path):
+        ffmpeg_path = os.path.join(ffmpeg_path, 'ffmpeg')
+    ffmpeg = shutil.which(ffmpeg_path or 'ffmpeg')
+    if ffmpeg is None or _ffprobe_for(ffmpeg) is None:
+        return None
+    return ffmpeg
+
+
+def _ffprobe_for(ffmpeg: str) -> Optional[str]:
+    """ffprobe from the same directory as ffmpeg, else from the PATH."""
+    directory, name = os.path.split(ffmpeg)
+    sibling = os.path.join(directory, name.replace('ffmpeg', 'ffprobe'))
+    return shutil.which(sibling) or shutil.which('ffprobe')
+
+
+def needs_conversion(filepath: str) -> bool:
+    """Whether the file's extension marks it as a candidate for FLAC conversion."""
+    return os.path.splitext(filepath)[1].lower() in CONVERTIBLE_EXTENSIONS
+
+
+def converted_path(filepath: str, work_dir: str) -> str:
+    """Where the FLAC version of a file is written."""
+    stat = os.stat(filepath)
+    name = os.path.splitext(os.path.basename(filepath))[0] + '.flac'
+    return os.path.join(work_dir, f"{stat.st_dev}-{stat.st_ino}-{stat.st_mtime_ns}", name)
+
+
+def _run(command, what: str) -> str:
+    try:
+        result = subprocess.run(command, capture_output=True, text=True, timeout=CONVERT_TIMEOUT)
+    except subprocess.TimeoutExpired:
+        raise ConversionError(f"{what} timed out")
+    if result.returncode != 0:
+        raise ConversionError(f"{what} failed: {result.stderr.strip()[-500:]}")
+    return result.stdout
+
+
+def audio_codec(ffmpeg: str, filepath: str) -> str:
+    """Codec name of the first audio stream, as reported by ffprobe."""
+    output = _run([_ffprobe_for(ffmpeg), '-v', 'error', '-select_streams', 'a:0',
+                   '-show_entries', 'stream=codec_name', '-of', 'csv=p=0', filepath],
+                  'ffprobe')
+    return output.strip()
+
+
+def decoded_audio_md5(ffmpeg: str, filepath: str) -> str:
+    """MD5 of the first audio stream decoded to 32-bit PCM."""
+    output = _run([ffmpeg, '-v', 'error', '-nostdin', '-i', filepath, '-map', '0:a:0',
+                   '-c:a', 'pcm_s32le', '-f', 'md5', '-'], 'decoding')
+    match = re.search(r'MD5=([0-9a-f]{32})', output)
+    if not match:
+        raise ConversionError(f"Unexpected decoder output: {output.strip()[:200]}")
+    return match.group(1)
+
+
+def convert_to_flac(ffmpeg: str, filepath: str, work_dir: str,
+                    compression_level: int = 8) -> ConvertedFile:
+    """
+    Convert one WAV/AIFF file to FLAC and verify the audio survived intact.
+
+    Runs in a worker; all heavy lifting happens in ffmpeg child processes.
+
+    Args:
+        ffmpeg: Path to ffmpeg
+        filepath: Source file
+        work_dir: Directory converted files are written under
+        compression_level: FLAC compression level (0-12)
+
+    Returns:
+        (flac path, original size, converted size)
+
+    Raises:
+        ConversionError: The file is not losslessly convertible, conversion
+            failed, the decoded audio differs, or FLAC is not smaller
+    """
+    original_size = os.path.getsize(filepath)
+    target = converted_path(filepath, work_dir)
+    if os.path.exists(target):
+        # Left by an earlier run; only verified files are ever renamed into place
+        return target, original_size, os.path.getsize(target)
+
+    codec = audio_codec(ffmpeg, filepath)
+    if codec not in LOSSLESS_PCM_CODECS:
+        raise ConversionError(f"Not convertible without loss ({codec or 'no audio stream'})")
+
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    partial = target + '.part'
+    try:
+        # bitexact keeps encoder version tags out, so identical audio gives identical
+        # FLAC files and duplicate checks still match across machines
+        _run([ffmpeg, '-v', 'error', '-nostdin', '-y', '-i', filepath,
+              '-map', '0:a:0', '-map_metadata', '0', '-c:a', 'flac',
+              '-compression_level', str(compression_level),
+              '-fflags', '+bitexact', '-flags:a', '+bitexact', '-f', 'flac', partial],
+             'ffmpeg conversion')
+
+        if decoded_audio_md5(ffmpeg, filepath) != decoded_audio_md5(ffmpeg, partial):
+            raise ConversionError("Decoded audio of the FLAC file differs from the original")
+
+        converted_size = os.path.getsize(partial)
+        if converted_size >= original_size:
+            raise ConversionError("FLAC file is not smaller than the original")
+
+        os.replace(partial, target)
+    except BaseException:
+        discard_converted(partial)
+        raise
+
+    logger.debug(f"Converted {filepath} to FLAC: {original_size} -> {converted_size} bytes")
+    return target, original_size, converted_size
+
+
+def discard_converted(path: str):
+    """Delete a converted file and its per-source directory once it is no longer needed."""
+    try:
+        os.remove(path)
+        os.rmdir(os.path.dirname(path))
+    except OSError:
+        pass
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Music Archive HTTP/2 Transport
+
+Optional HTTP/2 session for the upload engine. Over HTTP/1.1 every upload in
+flight needs its own connection (and TLS handshake) to the archive's reverse
+proxy; over HTTP/2 all uploads, lookups and status polls are multiplexed as
+streams over one connection, so raising the concurrency costs no handshakes
+and no extra proxy connections.
+
+aiohttp has no HTTP/2 client, so the session wraps httpx, exposing just the
+part of the aiohttp ClientSession interface the engine uses (post/get/put as
+async context managers, response.status, text(), json()) and raising
+aiohttp's exception types, so timeouts and connection failures are
+classified and retried exactly as over HTTP/1.1.
+
+https:// URLs negotiate HTTP/2 through ALPN and fall back to HTTP/1.1 if the
+server doesn't offer it; plain http:// URLs speak HTTP/2 from the first byte
+(h2c prior knowledge), as local test servers do.
+
+Usage:
+    engine = UploadEngine(api_url, max_connections=16, http2=True)
+
+Dependencies:
+    pip install 'httpx[http2]'
+"""
+
+import asyncio
+import json
+import logging
+from typing import Any, Dict, Optional
+
+import aiohttp
+
+try:
+    import h2  # noqa: F401  (httpx only speaks HTTP/2 when h2 is installed)
+    import httpx
+except ImportError:  # only needed for --http2
+    httpx = None
+
+logger = logging.getLogger(__name__)
+
+
+def http2_available() -> bool:
+    """Whether the HTTP/2 client libraries are installed."""
+    return httpx is not None
+
+
+class Http2Response:
+    """Fully read response with the aiohttp ClientResponse attributes the engine uses."""
+
+    def __init__(self, response):
+        self.status = response.status_code
+        self.http_version = response.http_version
+        self._content = response.content
+        self._encoding = response.encoding or 'utf-8'
+
+    async def text(self) -> str:
+        return self._content.decode(self._encoding, 'replace')
+
+    async def json(self, content_type: Optional[str] = None) -> Any:
+        return json.loads(self._content)
+
+
+class _Request:
+    """Async context manager sending one request (responses are small JSON documents)."""
+
+    def __init__(self, session: "Http2Session", method: str, url: str, **kwargs):
+        self.session = session
+        self.method = method
+        self.url = url
+        self.kwargs = kwargs
+
+    async def __aenter__(self) -> Http2Response:
+        return await self.session.request(self.method, self.url, **self.kwargs)
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+
+class Http2Session:
+    """httpx-backed stand-in for aiohttp.ClientSession, multiplexing requests over HTTP/2."""
+
+    def __init__(self, base_url: str, max_connections: int, connect_timeout: Optional[float],
+                 read_timeout: Optional[float], keepalive_timeout: float):
+        """
+        Args:
+            base_url: Archive URL (decides between ALPN and prior-knowledge HTTP/2)
+            max_connections: Connections allowed if the server caps streams per
+                connection; normally a single connection carries everything
+            connect_timeout: Seconds allowed to establish a connection
+            read_timeout: Seconds allowed between reads (and writes)
+            keepalive_timeout: Seconds an idle connection is kept open
+        """
+        cleartext = base_url.startswith('http://')
+        self.client = httpx.AsyncClient(
+            http1=not cleartext,
+            http2=True,
+            limits=httpx.Limits(max_connections=max_connections,
+                                max_keepalive_connections=max_connections,
+                                keepalive_expiry=keepalive_timeout),
+            # pool=None: requests wait for a free stream however long uploads take
+            timeout=httpx.Timeout(connect=connect_timeout, read=read_timeout,
+                                  write=read_timeout, pool=None),
+        )
+        self.protocol = None   # HTTP version of the first response
+
+    def post(self, url: str, **kwargs) -> _Request:
+        return _Request(self, 'POST', url, **kwargs)
+
+    def get(self, url: str, **kwargs) -> _Request:
+        return _Request(self, 'GET', url, **kwargs)
+
+    def put(self, url: str, **kwargs) -> _Request:
+        return _Request(self, 'PUT', url, **kwargs)
+
+    async def request(self, method: str, url: str, data: Any = None, json: Any = None,
+                      headers: Optional[Dict[str, str]] = None,
+                      params: Optional[Dict[str, str]] = None) -> Http2Response:
+        if hasattr(data, '__aiter__'):
+            # Multipart bodies are iterable both ways; httpx must get the async
+            # side, or it would read the file on the event loop
+            data = data.__aiter__()
+        try:
+            response = await self.client.request(method, url, content=data, json=json,
+                                                 headers=headers, params=params)
+        except httpx.TimeoutException as e:
+            raise asyncio.TimeoutError(str(e) or type(e).__name__) from e
+        except httpx.TransportError as e:
+            raise aiohttp.ClientConnectionError(str(e) or type(e).__name__) from e
+
+        if self.protocol is None:
+            self.protocol = response.http_version
+            if self.protocol == 'HTTP/2':
+                logger.info("Connected to the archive over HTTP/2")
+            else:
+                logger.warning(f"Archive does not offer HTTP/2; using {self.protocol}")
+        return Http2Response(response)
+
+    async def close(self):
+        await self.client.aclose()
@@ -11,6 +11,16 @@ Features:
 - Detailed error reporting and recovery
 - Cross-script compatibility (multiple scripts can use same tracking DB)
 - Comprehensive statistics and reporting
+- Already-processed files recognised from an in-memory set of packed
+  device/inode keys, loaded once per job, without a query per file
+- Compact schema: directory paths stored once, files by basename and integer
+  device/inode, error text in a side table; older databases are migrated on
+  open and the file_imports view keeps the old columns for reports
+- Retention: prune() removes old jobs while keeping each uploaded file's
+  latest record for skip checks, then vacuums incrementally and re-analyzes
+- Optional write-behind mode: writes are queued and committed in groups by a
+  background thread on a WAL journal, so per-file fsyncs stop limiting the
+  upload rate and readers in other processes never block the writer
 
 Usage:
     from import_tracker import BulkImportTracker
@@ -27,35 +37,412 @@ Usage:
             tracker.record_file_failure(file_id, error_msg, error_type)
     
     tracker.complete_job()
+
+    # Write-behind: the same calls, committed in groups of up to 500 writes or
+    # 1 second; complete_job()/close() (and interpreter exit) commit the rest
+    tracker = BulkImportTracker('import_tracking.db', write_behind=True)
 """
 
+import atexit
 import sqlite3
 import datetime
 import os
 import json
+import queue
+import threading
+import time
 from typing import List, Optional, Tuple, Dict, Any
 
+# Write-behind mode: writes committed together, and the longest a write waits for its commit
+WRITE_BEHIND_GROUP_SIZE = 500
+WRITE_BEHIND_GROUP_SECONDS = 1.0
+
+# Seconds a write waits for another process to release the database lock
+BUSY_TIMEOUT = 30
+
+# Attempts at committing a group of writes while other processes hold the lock
+COMMIT_ATTEMPTS = 3
+
+# record_file_start() result for files already processed
+ALREADY_PROCESSED = -1
+
+# Write-behind state of a file whose last outcome is not committed yet
+_FAILED = 0
+
+# Tracking database layout, kept in PRAGMA user_version. Version 1 had one
+# file_imports table repeating the full path, a "device:inode" string and any
+# error text on every row; version 2 stores directories once, files by
+# basename and integer device/inode, and errors in a side table, with a
+# file_imports view of the old columns (see _ensure_db_exists())
+SCHEMA_VERSION = 2
+
+# Columns of the file_imports view, in the version 1 table's order
+FILE_IMPORT_COLUMNS = (
+    'id', 'job_id', 'file_path', 'file_id_key', 'status', 'error_message', 'error_type',
+    'error_details', 'metadata_extracted', 'file_uploaded', 'created_at', 'updated_at',
+    'file_size', 'duration', 'format', 'processing_time', 'song_id', 'response_status',
+    'upload_method', 'content_hash', 'converted_size', 'failure_class', 'server_status',
+    'server_error', 'server_processing_time',
+)
+_ERROR_COLUMNS = ('error_message', 'error_type', 'error_details')
+_FILE_COLUMNS = tuple(column for column in FILE_IMPORT_COLUMNS
+                      if column not in _ERROR_COLUMNS + ('file_path', 'file_id_key'))
+
+# File records copied per batch when migrating or merging databases
+COPY_BATCH = 10000
+
+# The version 1 file_imports table as a view, so reports and tools reading it keep working
+FILE_IMPORTS_VIEW = '''
+    CREATE VIEW IF NOT EXISTS file_imports AS
+    SELECT f.id, f.job_id, d.path || f.name AS file_path,
+           CASE WHEN f.inode IS NULL THEN d.path || f.name
+                ELSE f.device || ':' || f.inode END AS file_id_key,
+           f.status, e.error_message, e.error_type, e.error_details, f.metadata_extracted,
+           f.file_uploaded, f.created_at, f.updated_at, f.file_size, f.duration, f.format,
+           f.processing_time, f.song_id, f.response_status, f.upload_method, f.content_hash,
+           f.converted_size, f.failure_class, f.server_status, f.server_error,
+           f.server_processing_time
+    FROM files f
+    LEFT JOIN directories d ON d.id = f.directory_id
+    LEFT JOIN file_errors e ON e.file_id = f.id
+'''
+
+
+def _signed(number: int) -> int:
+    """A 64-bit device or inode number as SQLite's signed INTEGER holds it."""
+    return number - 2 ** 64 if number >= 2 ** 63 else number
+
+
+def _file_identity(file_path: str) -> Tuple[Optional[int], Optional[int]]:
+    """(device, inode) of a file, or (None, None) if it can't be stat'ed (it is then known by path)."""
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None, None
+    return _signed(stat.st_dev), _signed(stat.st_ino)
+
+
+def _file_key(device: Optional[int], inode: Optional[int], file_path: str):
+    """
+    A file's identity as it is kept in memory (processed set, write-behind state).
+    
+    Device and inode become one integer (device in the high bits), a fraction
+    of the memory of a "device:inode" string; files that couldn't be stat'ed
+    are known by their path.
+    """
+    if inode is None:
+        return file_path
+    return ((device % 2 ** 64) << 64) | (inode % 2 ** 64)
+
+
+def _parse_file_id_key(file_id_key: Optional[str]) -> Tuple[Optional[int], Optional[int]]:
+    """(device, inode) of a "device:inode" file_id_key; (None, None) for path keys."""
+    device, _, inode = (file_id_key or '').partition(':')
+    # (the file_imports view shows numbers from 2**63 up as negative)
+    if device.lstrip('-').isdigit() and inode.lstrip('-').isdigit():
+        return _signed(int(device)), _signed(int(inode))
+    return None, None
+
+
+def _split_path(file_path: str) -> Tuple[str, str]:
+    """
+    (directory, basename) of a path, cut after its last separator, so the
+    directory keeps its trailing separator and directory + basename is exactly
+    the path again.
+    """
+    cut = max(file_path.rfind('/'), file_path.rfind(os.sep)) + 1
+    return file_path[:cut], file_path[cut:]
+
+
+def _directory_id(cursor, directory: str, cache: Optional[Dict[str, int]] = None) -> int:
+    """Row id of a directory, added to the directories table if new."""
+    if cache is not None and directory in cache:
+        return cache[directory]
+    cursor.execute('SELECT id FROM directories WHERE path = ?', (directory,))
+    row = cursor.fetchone()
+    if row:
+        directory_id = row[0]
+    else:
+        cursor.execute('INSERT INTO directories (path) VALUES (?)', (directory,))
+        directory_id = cursor.lastrowid
+    if cache is not None:
+        cache[directory] = directory_id
+    return directory_id
+
+
+def _insert_file(cursor, job_id: int, file_path: str, device: Optional[int],
+                 inode: Optional[int], created_at) -> int:
+    """Insert the 'processing' record of a file; returns its row id."""
+    directory, name = _split_path(file_path)
+    cursor.execute('''
+        INSERT INTO files (job_id, directory_id, name, device, inode, status, created_at)
+        VALUES (?, ?, ?, ?, ?, 'processing', ?)
+    ''', (job_id, _directory_id(cursor, directory), name, device, inode, created_at))
+    return cursor.lastrowid
+
+
+def _copy_file_imports(cursor, select: str, columns: List[str]) -> int:
+    """
+    Copy file records shaped like the file_imports view into the schema tables.
+    
+    Args:
+        cursor: Cursor writing the records (in the caller's transaction)
+        select: Query returning the records, one column per entry of columns
+        columns: Names of the selected columns, from FILE_IMPORT_COLUMNS;
+            without 'id' the records get new row ids
+            
+    Returns:
+        Number of records copied
+    """
+    file_columns = [column for column in columns if column in _FILE_COLUMNS]
+    insert = f'''
+        INSERT INTO files ({", ".join(file_columns)}, directory_id, name, device, inode)
+        VALUES ({", ".join("?" * (len(file_columns) + 4))})
+    '''
+    directory_ids: Dict[str, int] = {}
+    copied = 0
+    rows = cursor.connection.execute(select)
+    while True:
+        batch = rows.fetchmany(COPY_BATCH)
+        if not batch:
+            return copied
+        for row in batch:
+            record = dict(zip(columns, row))
+            directory, name = _split_path(record.get('file_path') or '')
+            device, inode = _parse_file_id_key(record.get('file_id_key'))
+            cursor.execute(insert, [record[column] for column in file_columns] + [
+                _directory_id(cursor, directory, directory_ids), name, device, inode])
+            errors = [record.get(column) for column in _ERROR_COLUMNS]
+            if any(value is not None for value in errors):
+                cursor.execute('''
+                    INSERT INTO file_errors (file_id, error_message, error_type, error_details)
+                    VALUES (?, ?, ?, ?)
+                ''', [cursor.lastrowid] + errors)
+        copied += len(batch)
+
+
+class _WriteBehind:
+    """
+    Background thread applying queued tracker writes on its own connection.
+    
+    Writes are committed in groups, once group_size of them have queued up or
+    the first has waited group_seconds, so a burst of per-file updates costs
+    one fsync instead of one each. Each write is a callable taking a cursor and
+    the map of provisional to real row ids (see record_file_start()).
+    """
+    
+    _FLUSH = object()
+    _STOP = object()
+    
+    def __init__(self, db_path: str, group_size: int, group_seconds: float):
+        self.group_size = max(1, group_size)
+        self.group_seconds = group_seconds
+        self.queue = queue.Queue()
+        self.row_ids: Dict[int, int] = {}   # only used on the writer thread
+        self.error = None
+        self.conn = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT, check_same_thread=False)
+        # With WAL, NORMAL only risks the last commits on power loss, never corruption
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.thread = threading.Thread(target=self._run, name='tracker-writer', daemon=True)
+        self.thread.start()
+    
+    def submit(self, write, done=None):
+        """Queue write(cursor, row_ids); done() is called on the writer thread once committed."""
+        self._check()
+        self.queue.put((write, done))
+    
+    def flush(self):
+        """Block until every write submitted so far is committed."""
+        committed = threading.Event()
+        self.queue.put((self._FLUSH, committed.set))
+        while not committed.wait(0.5):
+            if not self.thread.is_alive():
+                break
+        self._check()
+    
+    def stop(self):
+        """Commit what is queued and end the writer thread."""
+        if self.thread.is_alive():
+            self.queue.put((self._STOP, None))
+            self.thread.join()
+        self._check()
+    
+    def _check(self):
+        if self.error is not None:
+            raise sqlite3.OperationalError(f"Tracking database writes failed: {self.error}")
+    
+    def _run(self):
+        cursor = self.conn.cursor()
+        stopping = False
+        while not stopping:
+            group = [self.queue.get()]
+            deadline = time.monotonic() + self.group_seconds
+            while len(group) < self.group_size and group[-1][0] not in (self._FLUSH, self._STOP):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    group.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            
+            stopping = group[-1][0] is self._STOP
+            writes = [write for write, _ in group if write not in (self._FLUSH, self._STOP)]
+            try:
+                self._commit(cursor, writes)
+            except sqlite3.Error as e:
+                # Writes can't be applied any more; callers find out on their next write or flush
+                print(f"❌ Tracking database writes failed, {len(writes)} writes lost: {e}")
+                self.error = e
+                stopping = True
+            for _, done in group:
+                if done is not None:
+                    done()
+        self.conn.close()
+    
+    def _commit(self, cursor, writes):
+        for attempt in range(1, COMMIT_ATTEMPTS + 1):
+            try:
+                for write in writes:
+                    write(cursor, self.row_ids)
+                self.conn.commit()
+                return
+            except sqlite3.OperationalError as e:
+                self.conn.rollback()
+                if attempt == COMMIT_ATTEMPTS or 'locked' not in str(e):
+                    raise
+                print(f"⚠️  Tracking database locked by another process; retrying {len(writes)} writes")
+
 
 class BulkImportTracker:
     """Comprehensive tracking system for bulk imports using SQLite."""
     
-    def __init__(self, db_path: str):
+    def __init__(self, db_path: str, write_behind: bool = False,
+                 group_size: int = WRITE_BEHIND_GROUP_SIZE,
+                 group_seconds: float = WRITE_BEHIND_GROUP_SECONDS):
         """
         Initialize the tracker with a SQLite database.
         
         Args:
             db_path: Path to the SQLite database file
+            write_behind: Queue writes for a background thread that commits them
+                in groups on a WAL journal, instead of committing each one; reads
+                through this tracker still see every earlier write
+            group_size: Writes committed together in write-behind mode
+            group_seconds: Longest a write waits for its commit in write-behind mode
         """
         self.db_path = db_path
         self.job_id = None
         self.conn = None
+        self.writer = None
+        self._processed = None   # packed keys of processed files, see _processed_keys()
+        self._row_keys: Dict[int, Any] = {}   # file import ID -> _file_key() of rows still processing
         self._ensure_db_exists()
+        if write_behind:
+            self._start_write_behind(group_size, group_seconds)
+    
+    def _start_write_behind(self, group_size: int, group_seconds: float):
+        """Switch the database to WAL and start the background writer."""
+        conn = sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT)
+        journal_mode = conn.execute('PRAGMA journal_mode=WAL').fetchone()[0]
+        conn.close()
+        if journal_mode != 'wal':
+            # e.g. on network filesystems, which can't share WAL's memory-mapped index
+            print(f"⚠️  Tracking database stays in {journal_mode} journal mode (WAL unavailable)")
+        
+        self.writer = _WriteBehind(self.db_path, group_size, group_seconds)
+        # Files whose latest row isn't settled in the database yet: _file_key() ->
+        # provisional row id while processing, ALREADY_PROCESSED or _FAILED until committed
+        self._unsettled: Dict[Any, int] = {}
+        self._next_row_id = ALREADY_PROCESSED - 1
+        self._lock = threading.Lock()
+        # Writes still queued are committed when the interpreter exits (also after SIGTERM/Ctrl+C)
+        atexit.register(self.close)
+    
+    def _write(self, write, wait: bool = False):
+        """
+        Apply write(cursor, row_ids) and commit, or queue it in write-behind mode.
+        
+        Args:
+            write: Callable executing the statements; row_ids maps provisional
+                row ids to real ones
+            wait: In write-behind mode, wait for the commit and return the result
+            
+        Returns:
+            write's result, unless it was queued without waiting
+        """
+        # Ensure connection exists
+        if self.conn is None:
+            self.conn = sqlite3.connect(self.db_path)
+        if self.writer is None:
+            result = write(self.conn.cursor(), {})
+            self.conn.commit()
+            return result
+        
+        results = []
+        self.writer.submit(lambda cursor, row_ids: results.append(write(cursor, row_ids)))
+        if wait:
+            self.writer.flush()
+            return results[-1]
+        return None
+    
+    def _write_outcome(self, file_id: int, outcome: int, write):
+        """Write a file's final status; in write-behind mode it is kept in memory until committed."""
+        file_key = self._row_keys.pop(file_id, None)
+        if outcome == ALREADY_PROCESSED and file_key is not None:
+            self._processed_keys().add(file_key)
+        if self.writer is None:
+            self._write(write)
+            return
+        
+        writer = self.writer
+        if file_key is not None:
+            with self._lock:
+                self._unsettled[file_key] = outcome
+        
+        def committed():
+            writer.row_ids.pop(file_id, None)
+            if file_key is not None:
+                with self._lock:
+                    if self._unsettled.get(file_key) == outcome:
+                        del self._unsettled[file_key]
+        writer.submit(write, committed)
+    
+    def flush(self):
+        """Block until every queued write is committed (no-op unless write-behind)."""
+        if self.writer is not None:
+            self.writer.flush()
+    
+    def _processed_keys(self) -> set:
+        """
+        _file_key()s of every processed file, loaded on first use.
+        
+        Files processed through this tracker are added as they are recorded;
+        files another process records later are not seen (shards never share
+        files, and an overlap is only uploaded again, or found to be a duplicate).
+        """
+        if self._processed is None:
+            self.flush()
+            # Ensure connection exists
+            if self.conn is None:
+                self.conn = sqlite3.connect(self.db_path)
+            cursor = self.conn.execute('''
+                SELECT device, inode, CASE WHEN inode IS NULL THEN
+                    (SELECT path FROM directories WHERE id = directory_id) || name END
+                FROM files 
+                WHERE status IN ('success', 'duplicate')
+            ''')
+            self._processed = {_file_key(device, inode, path) for device, inode, path in cursor}
+        return self._processed
     
     def _ensure_db_exists(self):
         """Create database and tables if they don't exist."""
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT)
         cursor = conn.cursor()
         
+        # Only takes effect on a new database (or through VACUUM); lets prune() return freed pages
+        cursor.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        
         # Import jobs table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS import_jobs (
@@ -73,17 +460,25 @@ class BulkImportTracker:
             )
         ''')
         
-        # File imports table
+        # Directories of recorded files, each path stored once (with its trailing separator)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS directories (
+                id INTEGER PRIMARY KEY,
+                path TEXT UNIQUE
+            )
+        ''')
+        
+        # File records; device and inode are NULL for files that couldn't be
+        # stat'ed, which are then identified by path
         cursor.execute('''
-            CREATE TABLE IF NOT EXISTS file_imports (
+            CREATE TABLE IF NOT EXISTS files (
                 id INTEGER PRIMARY KEY,
                 job_id INTEGER,
-                file_path TEXT,
-                file_id_key TEXT,
+                directory_id INTEGER,
+                name TEXT,
+                device INTEGER,
+                inode INTEGER,
                 status TEXT,
-                error_message TEXT,
-                error_type TEXT,
-                error_details TEXT,
                 metadata_extracted BOOLEAN,
                 file_uploaded BOOLEAN,
                 created_at TIMESTAMP,
@@ -94,36 +489,155 @@ class BulkImportTracker:
                 processing_time REAL,
                 song_id TEXT,
                 response_status TEXT,
-                upload_method TEXT
+                upload_method TEXT,
+                content_hash TEXT,
+                converted_size INTEGER,
+                failure_class TEXT,
+                server_status TEXT,
+                server_error TEXT,
+                server_processing_time REAL
+            )
+        ''')
+        
+        # Error text of failed files, only stored for the rows that have it
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS file_errors (
+                file_id INTEGER PRIMARY KEY,
+                error_message TEXT,
+                error_type TEXT,
+                error_details TEXT
             )
         ''')
         
-        # Add file_id_key column if it doesn't exist (for existing databases)
+        # Add telemetry column if it doesn't exist (for existing databases)
         try:
-            cursor.execute('ALTER TABLE file_imports ADD COLUMN file_id_key TEXT')
+            cursor.execute('ALTER TABLE import_jobs ADD COLUMN telemetry TEXT')
         except sqlite3.OperationalError:
             # Column already exists
             pass
         
+        # Resumable upload sessions, keyed by file identity (device + inode,
+        # signed like the files table's)
+        cursor.execute("SELECT 1 FROM pragma_table_info('chunked_uploads') WHERE name = 'file_id_key'")
+        if cursor.fetchone():
+            cursor.execute('ALTER TABLE chunked_uploads RENAME TO chunked_uploads_v1')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS chunked_uploads (
+                device INTEGER,
+                inode INTEGER,
+                file_path TEXT,
+                session_id TEXT,
+                file_size INTEGER,
+                file_mtime REAL,
+                chunk_size INTEGER,
+                acknowledged_bytes INTEGER,
+                created_at TIMESTAMP,
+                updated_at TIMESTAMP,
+                PRIMARY KEY (device, inode)
+            )
+        ''')
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'chunked_uploads_v1'")
+        if cursor.fetchone():
+            # Sessions recorded under the old unsigned "device:inode" text key
+            cursor.execute('''
+                SELECT file_id_key, file_path, session_id, file_size, file_mtime, chunk_size,
+                       acknowledged_bytes, created_at, updated_at
+                FROM chunked_uploads_v1
+            ''')
+            sessions = [_parse_file_id_key(row[0]) + row[1:] for row in cursor.fetchall()]
+            cursor.executemany('''
+                INSERT OR REPLACE INTO chunked_uploads (
+                    device, inode, file_path, session_id, file_size, file_mtime, chunk_size,
+                    acknowledged_bytes, created_at, updated_at
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', [session for session in sessions if session[1] is not None])
+            cursor.execute('DROP TABLE chunked_uploads_v1')
+        
+        # Directory mtime index for incremental rescans
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS directory_index (
+                path TEXT PRIMARY KEY,
+                mtime REAL,
+                subdirs TEXT,
+                pending_files TEXT,
+                complete BOOLEAN,
+                updated_at TIMESTAMP
+            )
+        ''')
+        
         # Create indexes for better performance
         cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_file_imports_job_id 
-            ON file_imports(job_id)
+            CREATE INDEX IF NOT EXISTS idx_files_job_id 
+            ON files(job_id)
         ''')
         
         cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_file_imports_status 
-            ON file_imports(status)
+            CREATE INDEX IF NOT EXISTS idx_files_status 
+            ON files(status)
         ''')
         
         cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_file_imports_file_path 
-            ON file_imports(file_path)
+            CREATE INDEX IF NOT EXISTS idx_files_directory_name 
+            ON files(directory_id, name)
         ''')
         
+        # Lookups by file identity (record_file_start)
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_files_identity_status 
+            ON files(inode, device, status)
+        ''')
+        
+        conn.commit()
+        
+        cursor.execute("SELECT type FROM sqlite_master WHERE name = 'file_imports'")
+        existing = cursor.fetchone()
+        if existing and existing[0] == 'table':
+            self._migrate_file_imports(conn)
+        elif not existing:
+            cursor.execute(FILE_IMPORTS_VIEW)
+        cursor.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
         conn.commit()
         conn.close()
     
+    def _migrate_file_imports(self, conn):
+        """
+        Move the file records of a version 1 database into the version 2 tables.
+        
+        Runs as one transaction (an interrupted migration leaves the database
+        as it was), then VACUUMs so the space the old table held is returned.
+        Row and job IDs are kept.
+        """
+        size = os.path.getsize(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('BEGIN IMMEDIATE')
+        try:
+            cursor.execute("SELECT type FROM sqlite_master WHERE name = 'file_imports'")
+            if cursor.fetchone() != ('table',):
+                # Another process migrated it while we waited for the lock
+                conn.rollback()
+                return
+            print(f"🗜️  Migrating tracking database {self.db_path} to the compact schema...")
+            
+            # Older databases lack the columns added later
+            present = {row[1] for row in cursor.execute('PRAGMA table_info(file_imports)')}
+            columns = [column for column in FILE_IMPORT_COLUMNS if column in present]
+            migrated = _copy_file_imports(
+                cursor, f'SELECT {", ".join(columns)} FROM file_imports ORDER BY id', columns)
+            
+            cursor.execute('DROP TABLE file_imports')
+            cursor.execute(FILE_IMPORTS_VIEW)
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        
+        conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        conn.execute('VACUUM')
+        conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        print(f"   {migrated} file records migrated, database {size / 1e6:.1f} MB -> "
+              f"{os.path.getsize(self.db_path) / 1e6:.1f} MB")
+    
     def start_job(self, total_files: int, command_line: str, script_name: str = "unknown", 
                   upload_method: str = "unknown", notes: str = None):
         """
@@ -136,22 +650,42 @@ class BulkImportTracker:
             upload_method: Method used for upload (e.g., 'rails_api', 'direct_fs')
             notes: Optional notes about the job
         """
-        self.conn = sqlite3.connect(self.db_path)
-        cursor = self.conn.cursor()
+        started_at = datetime.datetime.now()
         
-        cursor.execute('''
-            INSERT INTO import_jobs (
-                started_at, status, total_files, processed_files, failed_files, 
-                command_line, script_name, upload_method, notes
-            )
-            VALUES (?, 'running', ?, 0, 0, ?, ?, ?, ?)
-        ''', (datetime.datetime.now(), total_files, command_line, script_name, upload_method, notes))
+        def write(cursor, row_ids):
+            cursor.execute('''
+                INSERT INTO import_jobs (
+                    started_at, status, total_files, processed_files, failed_files, 
+                    command_line, script_name, upload_method, notes
+                )
+                VALUES (?, 'running', ?, 0, 0, ?, ?, ?, ?)
+            ''', (started_at, total_files, command_line, script_name, upload_method, notes))
+            return cursor.lastrowid
         
-        self.job_id = cursor.lastrowid
-        self.conn.commit()
-        print(f"📊 Started import job {self.job_id} with {total_files} files")
+        self.job_id = self._write(write, wait=True)
+        self._processed_keys()
+        if total_files:
+            print(f"📊 Started import job {self.job_id} with {total_files} files")
+        else:
+            print(f"📊 Started import job {self.job_id}")
         print(f"   Script: {script_name}, Method: {upload_method}")
     
+    def record_job_totals(self, total_files: int, telemetry: Dict[str, Any]):
+        """
+        Store the final file count and throughput/stage-timing totals on the current job.
+        
+        Args:
+            total_files: Files the job went through (known only at the end when streaming)
+            telemetry: Totals from UploadTelemetry.totals() (stored as JSON)
+        """
+        if self.job_id is None:
+            return
+        job_id = self.job_id
+        self._write(lambda cursor, row_ids: cursor.execute('''
+            UPDATE import_jobs SET total_files = ?, telemetry = ?
+            WHERE id = ?
+        ''', (total_files, json.dumps(telemetry), job_id)))
+    
     def record_file_start(self, file_path: str) -> int:
         """
         Record the start of processing a file.
@@ -160,7 +694,10 @@ class BulkImportTracker:
             file_path: Full path to the file being processed
             
         Returns:
-            File import ID for tracking this specific file, or -1 if already processed
+            File import ID for tracking this specific file, or -1 if already processed.
+            In write-behind mode a new row's ID is only known once the writer has
+            inserted it, so a provisional ID (below -1) is returned instead; pass
+            it to the other record_file_* methods like a real one.
         """
         # Ensure connection exists
         if self.conn is None:
@@ -168,48 +705,67 @@ class BulkImportTracker:
             
         cursor = self.conn.cursor()
         
-        # Get unique file identifier (inode + device)
-        try:
-            stat = os.stat(file_path)
-            file_id_key = f"{stat.st_dev}:{stat.st_ino}"
-        except OSError:
-            # Fallback to path if stat fails
-            file_id_key = file_path
+        # Get unique file identifier (inode + device), or the path if stat fails
+        device, inode = _file_identity(file_path)
+        file_key = _file_key(device, inode, file_path)
         
         # Check if file was already processed successfully by unique ID - NEVER REPROCESS
-        cursor.execute('''
-            SELECT id FROM file_imports 
-            WHERE file_id_key = ? AND status = 'success'
-        ''', (file_id_key,))
+        # (a duplicate of a song already in the archive counts as processed)
+        if file_key in self._processed_keys():
+            return ALREADY_PROCESSED
         
-        existing = cursor.fetchone()
-        if existing:
-            # File was already successfully processed - SKIP IT
-            return -1
-        
-        # Check if file is currently being processed
-        cursor.execute('''
-            SELECT id FROM file_imports 
-            WHERE file_id_key = ? AND status = 'processing'
-        ''', (file_id_key,))
+        # Outcomes still queued in write-behind mode take precedence over the database
+        state = None
+        if self.writer is not None:
+            with self._lock:
+                state = self._unsettled.get(file_key)
+            if state is not None and state not in (ALREADY_PROCESSED, _FAILED):
+                return state
         
-        existing = cursor.fetchone()
-        if existing:
-            # File is already being processed, return existing ID
-            return existing[0]
+        if state is None:
+            # Check if file is currently being processed
+            if inode is not None:
+                cursor.execute('''
+                    SELECT id FROM files 
+                    WHERE inode = ? AND device = ? AND status = 'processing'
+                ''', (inode, device))
+            else:
+                directory, name = _split_path(file_path)
+                cursor.execute('''
+                    SELECT f.id FROM files f JOIN directories d ON d.id = f.directory_id
+                    WHERE d.path = ? AND f.name = ? AND f.inode IS NULL AND f.status = 'processing'
+                ''', (directory, name))
+            
+            existing = cursor.fetchone()
+            if existing:
+                # File is already being processed, return existing ID
+                self._row_keys[existing[0]] = file_key
+                return existing[0]
         
         # Create new record with unique file identifier
-        cursor.execute('''
-            INSERT INTO file_imports (job_id, file_path, file_id_key, status, created_at)
-            VALUES (?, ?, ?, 'processing', ?)
-        ''', (self.job_id or 0, file_path, file_id_key, datetime.datetime.now()))
-        return cursor.lastrowid
+        job_id, created_at = self.job_id or 0, datetime.datetime.now()
+        if self.writer is None:
+            file_id = _insert_file(cursor, job_id, file_path, device, inode, created_at)
+            self._row_keys[file_id] = file_key
+            return file_id
+        
+        file_id = self._next_row_id
+        self._next_row_id -= 1
+        self._row_keys[file_id] = file_key
+        with self._lock:
+            self._unsettled[file_key] = file_id
+        
+        def write(cursor, row_ids):
+            row_ids[file_id] = _insert_file(cursor, job_id, file_path, device, inode, created_at)
+        self.writer.submit(write)
+        return file_id
     
     def record_file_success(self, file_id: int, metadata_extracted: bool = True, 
                            file_uploaded: bool = True, file_size: Optional[int] = None,
                            duration: Optional[float] = None, format_type: Optional[str] = None,
                            processing_time: Optional[float] = None, song_id: Optional[str] = None,
-                           response_status: Optional[str] = None, upload_method: Optional[str] = None):
+                           response_status: Optional[str] = None, upload_method: Optional[str] = None,
+                           content_hash: Optional[str] = None, converted_size: Optional[int] = None):
         """
         Record successful file processing.
         
@@ -224,35 +780,111 @@ class BulkImportTracker:
             song_id: ID of the song in the database
             response_status: HTTP response status
             upload_method: Method used for upload
+            content_hash: Base64 MD5 of the file content (ActiveStorage checksum format)
+            converted_size: Size actually uploaded when the file was converted (e.g. WAV to FLAC);
+                file_size is then the original size
+        """
+        job_id, updated_at = self.job_id, datetime.datetime.now()
+        
+        def write(cursor, row_ids):
+            cursor.execute('''
+                UPDATE files 
+                SET status = 'success', metadata_extracted = ?, file_uploaded = ?, 
+                    updated_at = ?, file_size = ?, duration = ?, format = ?, processing_time = ?,
+                    song_id = ?, response_status = ?, upload_method = ?, content_hash = ?,
+                    converted_size = ?
+                WHERE id = ?
+            ''', (metadata_extracted, file_uploaded, updated_at, 
+                  file_size, duration, format_type, processing_time, song_id, response_status, 
+                  upload_method, content_hash, converted_size, row_ids.get(file_id, file_id)))
+            
+            # Only update job stats if we have a valid job_id
+            if job_id:
+                cursor.execute('''
+                    UPDATE import_jobs 
+                    SET processed_files = processed_files + 1
+                    WHERE id = ?
+                ''', (job_id,))
+        
+        self._write_outcome(file_id, ALREADY_PROCESSED, write)
+    
+    def record_file_duplicate(self, file_id: int, song_id: Optional[str], content_hash: str,
+                              processing_time: Optional[float] = None,
+                              upload_method: Optional[str] = None):
+        """
+        Record a file skipped because the archive already holds identical content.
+        
+        Args:
+            file_id: ID returned from record_file_start()
+            song_id: ID of the existing song with the same content
+            content_hash: Base64 MD5 of the file content
+            processing_time: Time taken to hash and look up the file
+            upload_method: Method used for upload
         """
+        job_id, updated_at = self.job_id, datetime.datetime.now()
+        
+        def write(cursor, row_ids):
+            cursor.execute('''
+                UPDATE files 
+                SET status = 'duplicate', file_uploaded = 0, updated_at = ?, processing_time = ?,
+                    song_id = ?, content_hash = ?, upload_method = ?
+                WHERE id = ?
+            ''', (updated_at, processing_time, song_id, content_hash, upload_method,
+                  row_ids.get(file_id, file_id)))
+            
+            # Only update job stats if we have a valid job_id
+            if job_id:
+                cursor.execute('''
+                    UPDATE import_jobs 
+                    SET processed_files = processed_files + 1
+                    WHERE id = ?
+                ''', (job_id,))
+        
+        self._write_outcome(file_id, ALREADY_PROCESSED, write)
+    
+    def record_server_processing(self, outcomes: List[Tuple[str, str, Optional[str], Optional[float]]]):
+        """
+        Store how the archive's processing of uploaded songs ended.
+        
+        Args:
+            outcomes: (song_id, processing_status, processing_error, processing_seconds)
+                per song; processing_status is 'missing' for songs that no longer exist
+        """
+        if not outcomes:
+            return
+        rows = [(status, error, seconds, str(song_id)) for song_id, status, error, seconds in outcomes]
+        self._write(lambda cursor, row_ids: cursor.executemany('''
+            UPDATE files 
+            SET server_status = ?, server_error = ?, server_processing_time = ?
+            WHERE song_id = ? AND status = 'success'
+        ''', rows))
+    
+    def get_unsettled_songs(self) -> List[str]:
+        """
+        Get the ids of uploaded songs whose server processing outcome is not known yet.
+        
+        Returns:
+            Song ids, oldest upload first
+        """
+        self.flush()
         # Ensure connection exists
         if self.conn is None:
             self.conn = sqlite3.connect(self.db_path)
             
         cursor = self.conn.cursor()
         cursor.execute('''
-            UPDATE file_imports 
-            SET status = 'success', metadata_extracted = ?, file_uploaded = ?, 
-                updated_at = ?, file_size = ?, duration = ?, format = ?, processing_time = ?,
-                song_id = ?, response_status = ?, upload_method = ?
-            WHERE id = ?
-        ''', (metadata_extracted, file_uploaded, datetime.datetime.now(), 
-              file_size, duration, format_type, processing_time, song_id, response_status, 
-              upload_method, file_id))
-        
-        # Only update job stats if we have a valid job_id
-        if self.job_id:
-            cursor.execute('''
-                UPDATE import_jobs 
-                SET processed_files = processed_files + 1
-                WHERE id = ?
-            ''', (self.job_id,))
-        
-        self.conn.commit()
+            SELECT song_id FROM files 
+            WHERE status = 'success' AND song_id IS NOT NULL AND song_id != 'unknown'
+                AND (server_status IS NULL OR server_status IN ('pending', 'processing'))
+            GROUP BY song_id
+            ORDER BY MIN(id)
+        ''')
+        return [row[0] for row in cursor.fetchall()]
     
     def record_file_failure(self, file_id: int, error_message: str, 
                            error_type: Optional[str] = None, error_details: Optional[str] = None,
-                           upload_method: Optional[str] = None):
+                           upload_method: Optional[str] = None, response_status: Optional[str] = None,
+                           failure_class: Optional[str] = None):
         """
         Record file processing failure.
         
@@ -262,28 +894,195 @@ class BulkImportTracker:
             error_type: Type of error (e.g., 'UPLOAD_ERROR', 'NETWORK_ERROR')
             error_details: Detailed error information (stack trace, etc.)
             upload_method: Method used for upload
+            response_status: HTTP response status, if the archive answered
+            failure_class: Retry class of the failure (e.g. 'timeout', 'server', 'rejected')
+        """
+        job_id, updated_at = self.job_id, datetime.datetime.now()
+        
+        def write(cursor, row_ids):
+            row_id = row_ids.get(file_id, file_id)
+            cursor.execute('''
+                UPDATE files 
+                SET status = 'failed', updated_at = ?, upload_method = ?, response_status = ?,
+                    failure_class = ?
+                WHERE id = ?
+            ''', (updated_at, upload_method, response_status, failure_class, row_id))
+            if cursor.rowcount:
+                cursor.execute('''
+                    INSERT OR REPLACE INTO file_errors (file_id, error_message, error_type, error_details)
+                    VALUES (?, ?, ?, ?)
+                ''', (row_id, error_message, error_type, error_details))
+            
+            # Only update job stats if we have a valid job_id
+            if job_id:
+                cursor.execute('''
+                    UPDATE import_jobs 
+                    SET failed_files = failed_files + 1
+                    WHERE id = ?
+                ''', (job_id,))
+        
+        self._write_outcome(file_id, _FAILED, write)
+    
+    def get_chunked_upload(self, file_path: str) -> Optional[Dict[str, Any]]:
         """
+        Get the saved resumable upload session for a file.
+        
+        The session is only returned if the file still has the size and mtime it
+        had when the session was opened; otherwise it is dropped.
+        
+        Args:
+            file_path: Full path to the file
+            
+        Returns:
+            Dict with session_id, chunk_size and acknowledged_bytes, or None
+        """
+        self.flush()
         # Ensure connection exists
         if self.conn is None:
             self.conn = sqlite3.connect(self.db_path)
             
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        
         cursor = self.conn.cursor()
         cursor.execute('''
-            UPDATE file_imports 
-            SET status = 'failed', error_message = ?, error_type = ?, error_details = ?, 
-                updated_at = ?, upload_method = ?
-            WHERE id = ?
-        ''', (error_message, error_type, error_details, datetime.datetime.now(), upload_method, file_id))
+            SELECT session_id, file_size, file_mtime, chunk_size, acknowledged_bytes
+            FROM chunked_uploads WHERE device = ? AND inode = ?
+        ''', (_signed(stat.st_dev), _signed(stat.st_ino)))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        
+        session_id, file_size, file_mtime, chunk_size, acknowledged_bytes = row
+        if file_size != stat.st_size or file_mtime != stat.st_mtime:
+            # File changed since the session was opened - its chunks are stale
+            self.clear_chunked_upload(file_path)
+            return None
+        
+        return {
+            'session_id': session_id,
+            'chunk_size': chunk_size,
+            'acknowledged_bytes': acknowledged_bytes
+        }
+    
+    def start_chunked_upload(self, file_path: str, session_id: str, chunk_size: int):
+        """
+        Remember a newly opened resumable upload session for a file.
+        
+        Args:
+            file_path: Full path to the file
+            session_id: Upload session ID from the archive
+            chunk_size: Chunk size used for this session
+        """
+        stat = os.stat(file_path)
+        now = datetime.datetime.now()
+        self._write(lambda cursor, row_ids: cursor.execute('''
+            INSERT OR REPLACE INTO chunked_uploads (
+                device, inode, file_path, session_id, file_size, file_mtime, chunk_size,
+                acknowledged_bytes, created_at, updated_at
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, 0, ?, ?)
+        ''', (_signed(stat.st_dev), _signed(stat.st_ino), file_path, session_id, stat.st_size,
+              stat.st_mtime, chunk_size, now, now)))
+    
+    def record_chunk_progress(self, session_id: str, acknowledged_bytes: int):
+        """
+        Record how many bytes the archive has acknowledged for an upload session.
         
-        # Only update job stats if we have a valid job_id
-        if self.job_id:
+        Args:
+            session_id: Upload session ID from the archive
+            acknowledged_bytes: Bytes of the file the archive has stored
+        """
+        updated_at = datetime.datetime.now()
+        self._write(lambda cursor, row_ids: cursor.execute('''
+            UPDATE chunked_uploads SET acknowledged_bytes = ?, updated_at = ?
+            WHERE session_id = ?
+        ''', (acknowledged_bytes, updated_at, session_id)))
+    
+    def clear_chunked_upload(self, file_path: str):
+        """
+        Forget the resumable upload session of a file (finished or stale).
+        
+        Args:
+            file_path: Full path to the file
+        """
+        device, inode = _file_identity(file_path)
+        if inode is None:
+            return
+        
+        self._write(lambda cursor, row_ids: cursor.execute(
+            'DELETE FROM chunked_uploads WHERE device = ? AND inode = ?', (device, inode)))
+    
+    def get_directory_index(self) -> Dict[str, Tuple[float, List[str], bool]]:
+        """
+        Get the directory mtime index used for incremental rescans.
+        
+        Returns:
+            Dict of directory path -> (mtime, subdirectory paths, complete), where
+            complete means every audio file directly in the directory was processed
+        """
+        self.flush()
+        # Ensure connection exists
+        if self.conn is None:
+            self.conn = sqlite3.connect(self.db_path)
+            
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT path, mtime, subdirs, complete FROM directory_index')
+        return {
+            path: (mtime, json.loads(subdirs or '[]'), bool(complete))
+            for path, mtime, subdirs, complete in cursor.fetchall()
+        }
+    
+    def save_directory_index(self, directories: List[Tuple[str, float, List[str], List[str]]]):
+        """
+        Remember scanned directories for incremental rescans.
+        
+        Args:
+            directories: (path, mtime, subdirectory paths, audio files not yet
+                processed when the directory was listed) per listed directory
+        """
+        now = datetime.datetime.now()
+        rows = [(path, mtime, json.dumps(subdirs), json.dumps(pending), not pending, now)
+                for path, mtime, subdirs, pending in directories]
+        self._write(lambda cursor, row_ids: cursor.executemany('''
+            INSERT OR REPLACE INTO directory_index (path, mtime, subdirs, pending_files, complete, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', rows))
+    
+    def refresh_directory_index(self) -> int:
+        """
+        Mark directories complete once all their pending files have been processed.
+        
+        Returns:
+            Number of directories newly marked complete
+        """
+        self.flush()
+        # Ensure connection exists
+        if self.conn is None:
+            self.conn = sqlite3.connect(self.db_path)
+            
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT path, pending_files FROM directory_index WHERE NOT complete')
+        incomplete = cursor.fetchall()
+        if not incomplete:
+            return 0
+        
+        def processed(file_path):
             cursor.execute('''
-                UPDATE import_jobs 
-                SET failed_files = failed_files + 1
-                WHERE id = ?
-            ''', (self.job_id,))
+                SELECT 1 FROM files f JOIN directories d ON d.id = f.directory_id
+                WHERE d.path = ? AND f.name = ? AND f.status IN ('success', 'duplicate')
+                LIMIT 1
+            ''', _split_path(file_path))
+            return cursor.fetchone() is not None
         
-        self.conn.commit()
+        completed = [(path,) for path, pending in incomplete
+                     if all(processed(f) for f in json.loads(pending or '[]'))]
+        self._write(lambda cursor, row_ids: cursor.executemany('''
+            UPDATE directory_index SET complete = 1, pending_files = '[]' WHERE path = ?
+        ''', completed))
+        return len(completed)
     
     def get_resume_info(self) -> Optional[Tuple]:
         """
@@ -292,6 +1091,7 @@ class BulkImportTracker:
         Returns:
             Tuple of (job_id, processed_files, failed_files, total_files, status) or None
         """
+        self.flush()
         cursor = self.conn.cursor()
         cursor.execute('''
             SELECT id, processed_files, failed_files, total_files, status, script_name, upload_method
@@ -309,8 +1109,10 @@ class BulkImportTracker:
             job_id: Job ID to check (uses current job if None, or ALL jobs if job_id is 'all')
             
         Returns:
-            List of file paths that were successfully processed
+            List of file paths that were successfully processed (uploaded or
+            found to be duplicates of songs already in the archive)
         """
+        self.flush()
         # If no connection exists, return empty list (no files processed yet)
         if self.conn is None:
             return []
@@ -321,12 +1123,12 @@ class BulkImportTracker:
         if job_id is None or job_id == 'all':
             cursor.execute('''
                 SELECT file_path FROM file_imports 
-                WHERE status = 'success'
+                WHERE status IN ('success', 'duplicate')
             ''')
         else:
             cursor.execute('''
                 SELECT file_path FROM file_imports 
-                WHERE job_id = ? AND status = 'success'
+                WHERE job_id = ? AND status IN ('success', 'duplicate')
             ''', (job_id,))
             
         return [row[0] for row in cursor.fetchall()]
@@ -341,26 +1143,31 @@ class BulkImportTracker:
         Returns:
             True if file was successfully processed, False otherwise
         """
-        # Ensure connection exists
-        if self.conn is None:
-            self.conn = sqlite3.connect(self.db_path)
-            
-        cursor = self.conn.cursor()
-        
-        # Get unique file identifier (inode + device)
-        try:
-            stat = os.stat(file_path)
-            file_id_key = f"{stat.st_dev}:{stat.st_ino}"
-        except OSError:
-            # Fallback to path if stat fails
-            file_id_key = file_path
+        # Get unique file identifier (inode + device), or the path if stat fails
+        device, inode = _file_identity(file_path)
+        return _file_key(device, inode, file_path) in self._processed_keys()
+    
+    def is_identity_processed(self, device: int, inode: int, file_path: str) -> bool:
+        """
+        Check a file as is_file_processed() does, by a device and inode the
+        caller already has (os.scandir() gives a file's inode without a stat).
         
-        cursor.execute('''
-            SELECT id FROM file_imports 
-            WHERE file_id_key = ? AND status = 'success'
-        ''', (file_id_key,))
+        Args:
+            device: Device number of the file
+            inode: Inode number of the file
+            file_path: Full path to the file
+        """
+        return _file_key(device, inode, file_path) in self._processed_keys()
+    
+    def load_processed_files(self) -> int:
+        """
+        Load the set of processed files now rather than on first use, so
+        threads without their own connection can check files against it.
         
-        return cursor.fetchone() is not None
+        Returns:
+            Number of processed files
+        """
+        return len(self._processed_keys())
     
     def get_failed_files(self, job_id: Optional[int] = None) -> List[Tuple[str, str, str]]:
         """
@@ -372,6 +1179,7 @@ class BulkImportTracker:
         Returns:
             List of tuples (file_path, error_message, error_type)
         """
+        self.flush()
         # If no connection exists, return empty list
         if self.conn is None:
             return []
@@ -386,6 +1194,31 @@ class BulkImportTracker:
         ''', (job_id,))
         return cursor.fetchall()
     
+    def get_latest_failures(self) -> List[Tuple[str, Optional[str], Optional[str], Optional[str]]]:
+        """
+        Get files whose most recent attempt (across all jobs) failed.
+        
+        Returns:
+            List of tuples (file_path, failure_class, response_status, error_details)
+        """
+        self.flush()
+        # Ensure connection exists
+        if self.conn is None:
+            self.conn = sqlite3.connect(self.db_path)
+            
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            SELECT f.file_path, f.failure_class, f.response_status, f.error_details
+            FROM file_imports f
+            JOIN (SELECT MAX(id) AS id FROM files
+                  GROUP BY inode, device, CASE WHEN inode IS NULL THEN directory_id END,
+                           CASE WHEN inode IS NULL THEN name END) latest
+                ON latest.id = f.id
+            WHERE f.status = 'failed'
+            ORDER BY f.id
+        ''')
+        return cursor.fetchall()
+    
     def get_job_stats(self, job_id: Optional[int] = None) -> Tuple[int, int, int, int]:
         """
         Get comprehensive stats for a job.
@@ -396,6 +1229,7 @@ class BulkImportTracker:
         Returns:
             Tuple of (total, success, failed, processing)
         """
+        self.flush()
         # If no connection exists, return zeros
         if self.conn is None:
             return (0, 0, 0, 0)
@@ -410,7 +1244,7 @@ class BulkImportTracker:
                 SUM(CASE WHEN status = 'success' THEN 1 ELSE 0 END) as success,
                 SUM(CASE WHEN status = 'failed' THEN 1 ELSE 0 END) as failed,
                 SUM(CASE WHEN status = 'processing' THEN 1 ELSE 0 END) as processing
-            FROM file_imports 
+            FROM files 
             WHERE job_id = ?
         ''', (job_id,))
         return cursor.fetchone()
@@ -422,6 +1256,11 @@ class BulkImportTracker:
         Returns:
             List of job dictionaries with stats
         """
+        self.flush()
+        # Ensure connection exists
+        if self.conn is None:
+            self.conn = sqlite3.connect(self.db_path)
+            
         cursor = self.conn.cursor()
         cursor.execute('''
             SELECT 
@@ -450,6 +1289,209 @@ class BulkImportTracker:
         
         return jobs
     
+    def merge_database(self, source_path: str, job_ids: Optional[List[int]] = None) -> Tuple[int, int]:
+        """
+        Copy the jobs and file records of another tracking database into this one.
+        
+        Used to combine the per-shard databases of a --shard import into one
+        database for reporting. Job IDs are renumbered; a job that is already
+        here (same start time and command line) is skipped, so merging the same
+        database twice is harmless. The source may still have the version 1
+        schema; it is read through its file_imports table or view and left as
+        it is. Directory index and chunked upload state are local to the host
+        that made them and are not copied.
+        
+        Args:
+            source_path: Tracking database to merge in
+            job_ids: Only merge these jobs of the source (default: all)
+            
+        Returns:
+            Tuple of (jobs_merged, files_merged)
+        """
+        if not os.path.exists(source_path):
+            raise FileNotFoundError(f"Tracking database not found: {source_path}")
+        self.flush()
+        
+        # Ensure connection exists
+        if self.conn is None:
+            self.conn = sqlite3.connect(self.db_path)
+            
+        cursor = self.conn.cursor()
+        cursor.execute('ATTACH DATABASE ? AS source', (source_path,))
+        try:
+            # Older databases may lack newer columns; copy the ones both sides have
+            def source_columns(table):
+                return {row[1] for row in cursor.execute(f'PRAGMA source.table_info({table})')}
+            
+            theirs = source_columns('import_jobs')
+            job_columns = [row[1] for row in cursor.execute('PRAGMA main.table_info(import_jobs)')
+                           if row[1] in theirs and row[1] != 'id']
+            theirs = source_columns('file_imports')
+            file_columns = [column for column in FILE_IMPORT_COLUMNS
+                            if column in theirs and column not in ('id', 'job_id')]
+            
+            cursor.execute('CREATE TEMP TABLE IF NOT EXISTS merged_jobs (old_id INTEGER PRIMARY KEY, new_id INTEGER)')
+            cursor.execute('DELETE FROM merged_jobs')
+            
+            cursor.execute(f'SELECT id, {", ".join(job_columns)} FROM source.import_jobs ORDER BY id')
+            for old_id, *values in cursor.fetchall():
+                if job_ids is not None and old_id not in job_ids:
+                    continue
+                job = dict(zip(job_columns, values))
+                cursor.execute('''
+                    SELECT 1 FROM import_jobs
+                    WHERE started_at IS ? AND command_line IS ?
+                ''', (job.get('started_at'), job.get('command_line')))
+                if cursor.fetchone():
+                    continue
+                cursor.execute(f'''
+                    INSERT INTO import_jobs ({", ".join(job_columns)})
+                    VALUES ({", ".join("?" * len(job_columns))})
+                ''', values)
+                cursor.execute('INSERT INTO merged_jobs VALUES (?, ?)', (old_id, cursor.lastrowid))
+            
+            files_merged = _copy_file_imports(cursor, f'''
+                SELECT m.new_id, {", ".join("f." + column for column in file_columns)}
+                FROM source.file_imports f
+                JOIN merged_jobs m ON m.old_id = f.job_id
+                ORDER BY f.id
+            ''', ['job_id'] + file_columns)
+            cursor.execute('SELECT COUNT(*) FROM merged_jobs')
+            jobs_merged = cursor.fetchone()[0]
+            self.conn.commit()
+            self._processed = None   # reloaded with the merged files on next use
+        except Exception:
+            self.conn.rollback()
+            raise
+        finally:
+            cursor.execute('DETACH DATABASE source')
+        
+        return jobs_merged, files_merged
+    
+    def get_prunable_jobs(self, before: datetime.datetime) -> List[int]:
+        """
+        Get the jobs prune() would remove.
+        
+        Args:
+            before: Cutoff time
+            
+        Returns:
+            IDs of the jobs started before the cutoff with no file recorded
+            since (a long import still running is kept), except the current job
+        """
+        self.flush()
+        # Ensure connection exists
+        if self.conn is None:
+            self.conn = sqlite3.connect(self.db_path)
+            
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            SELECT id FROM import_jobs j
+            WHERE started_at < ? AND id IS NOT ?
+                AND NOT EXISTS (SELECT 1 FROM files WHERE job_id = j.id AND created_at >= ?)
+            ORDER BY id
+        ''', (before, self.job_id, before))
+        return [row[0] for row in cursor.fetchall()]
+    
+    def prune(self, before: datetime.datetime, archive_path: Optional[str] = None) -> Dict[str, int]:
+        """
+        Remove old jobs and their file records, keeping what skip checks need.
+        
+        The file records of pruned jobs are deleted, except the latest success
+        or duplicate record of each file, which is kept under job 0 (like
+        records made outside a job) so the file is still never uploaded again.
+        Kept records are looked at again by later prunes and dropped once a
+        newer record of the same file supersedes them. Resumable upload
+        sessions not updated since the cutoff are dropped too.
+        
+        Afterwards the freed pages are returned to the filesystem by an
+        incremental vacuum (a database not yet in incremental auto-vacuum mode
+        is converted by one full VACUUM), and ANALYZE refreshes the statistics
+        the query planner uses.
+        
+        Args:
+            before: Jobs started before this time are pruned (see get_prunable_jobs())
+            archive_path: Tracking database the pruned jobs and all their file
+                records are first copied to (see merge_database())
+            
+        Returns:
+            Dict with the number of jobs, files_deleted, files_kept,
+            directories and sessions, and bytes_freed
+        """
+        job_ids = self.get_prunable_jobs(before)
+        if archive_path and job_ids:
+            archive = BulkImportTracker(archive_path)
+            try:
+                archive.merge_database(self.db_path, job_ids)
+            finally:
+                archive.close()
+        
+        size = os.path.getsize(self.db_path)
+        counts = {}
+        self.conn.commit()   # a record_file_start() insert may still be pending
+        cursor = self.conn.cursor()
+        cursor.execute('BEGIN IMMEDIATE')
+        try:
+            cursor.execute('CREATE TEMP TABLE IF NOT EXISTS pruned_jobs (id INTEGER PRIMARY KEY)')
+            cursor.execute('CREATE TEMP TABLE IF NOT EXISTS pruned_files (id INTEGER PRIMARY KEY, keep BOOLEAN)')
+            cursor.execute('DELETE FROM pruned_jobs')
+            cursor.execute('DELETE FROM pruned_files')
+            cursor.executemany('INSERT INTO pruned_jobs VALUES (?)', [(job_id,) for job_id in job_ids])
+            
+            # Records of the pruned jobs and those kept by earlier prunes; keep
+            # each file's success or duplicate record unless a newer one exists
+            cursor.execute('''
+                INSERT INTO pruned_files (id, keep)
+                SELECT f.id, f.status IN ('success', 'duplicate')
+                    AND NOT EXISTS (
+                        SELECT 1 FROM files n
+                        WHERE n.inode = f.inode AND n.device = f.device
+                            AND n.status IN ('success', 'duplicate') AND n.id > f.id)
+                    AND NOT (f.inode IS NULL AND EXISTS (
+                        SELECT 1 FROM files n
+                        WHERE n.directory_id = f.directory_id AND n.name = f.name AND n.inode IS NULL
+                            AND n.status IN ('success', 'duplicate') AND n.id > f.id))
+                FROM files f
+                WHERE f.job_id IN (SELECT id FROM pruned_jobs) OR (f.job_id = 0 AND f.created_at < ?)
+            ''', (before,))
+            
+            cursor.execute('DELETE FROM file_errors WHERE file_id IN (SELECT id FROM pruned_files WHERE NOT keep)')
+            cursor.execute('DELETE FROM files WHERE id IN (SELECT id FROM pruned_files WHERE NOT keep)')
+            counts['files_deleted'] = cursor.rowcount
+            cursor.execute('''
+                UPDATE files SET job_id = 0
+                WHERE job_id != 0 AND id IN (SELECT id FROM pruned_files WHERE keep)
+            ''')
+            cursor.execute('SELECT COUNT(*) FROM pruned_files WHERE keep')
+            counts['files_kept'] = cursor.fetchone()[0]
+            cursor.execute('DELETE FROM import_jobs WHERE id IN (SELECT id FROM pruned_jobs)')
+            counts['jobs'] = cursor.rowcount
+            cursor.execute('''
+                DELETE FROM directories
+                WHERE NOT EXISTS (SELECT 1 FROM files WHERE directory_id = directories.id)
+            ''')
+            counts['directories'] = cursor.rowcount
+            cursor.execute('DELETE FROM chunked_uploads WHERE updated_at < ?', (before,))
+            counts['sessions'] = cursor.rowcount
+            self.conn.commit()
+        except BaseException:
+            self.conn.rollback()
+            raise
+        self._processed = None   # reloaded on next use
+        
+        if self.conn.execute('PRAGMA auto_vacuum').fetchone()[0] != 2:
+            # Incremental auto-vacuum only takes effect through a full VACUUM, done once
+            self.conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+            self.conn.execute('VACUUM')
+        else:
+            # (executescript: a plain execute() steps it once, freeing a single page)
+            self.conn.executescript('PRAGMA incremental_vacuum;')
+        self.conn.execute('ANALYZE')
+        self.conn.commit()
+        self.conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        counts['bytes_freed'] = max(0, size - os.path.getsize(self.db_path))
+        return counts
+    
     def show_error_summary(self, job_id: Optional[int] = None):
         """
         Show quick error summary.
@@ -457,6 +1499,7 @@ class BulkImportTracker:
         Args:
             job_id: Job ID to check (uses current job if None)
         """
+        self.flush()
         cursor = self.conn.cursor()
         if job_id is None:
             job_id = self.job_id
@@ -485,6 +1528,7 @@ class BulkImportTracker:
         Args:
             job_id: Job ID to check (uses current job if None)
         """
+        self.flush()
         cursor = self.conn.cursor()
         if job_id is None:
             job_id = self.job_id
@@ -520,11 +1564,16 @@ class BulkImportTracker:
         """
         if job_id is None:
             job_id = self.job_id
+        self.flush()
         
+        # Ensure connection exists
+        if self.conn is None:
+            self.conn = sqlite3.connect(self.db_path)
+            
         cursor = self.conn.cursor()
         cursor.execute('''
             SELECT started_at, completed_at, status, total_files, processed_files, 
-                   failed_files, script_name, upload_method, command_line
+                   failed_files, script_name, upload_method, command_line, telemetry
             FROM import_jobs 
             WHERE id = ?
         ''', (job_id,))
@@ -534,7 +1583,7 @@ class BulkImportTracker:
             print(f"Job {job_id} not found.")
             return
         
-        started_at, completed_at, status, total_files, processed_files, failed_files, script_name, upload_method, command_line = job
+        started_at, completed_at, status, total_files, processed_files, failed_files, script_name, upload_method, command_line, telemetry = job
         
         print(f"=== JOB {job_id} SUMMARY ===")
         print(f"Script: {script_name}")
@@ -546,24 +1595,48 @@ class BulkImportTracker:
         print(f"Files: {processed_files}/{total_files} processed, {failed_files} failed")
         print(f"Command: {command_line}")
         
+        if telemetry:
+            totals = json.loads(telemetry)
+            print(f"Throughput: {totals['files_per_sec']:.1f} files/s, {totals['mb_per_sec']:.2f} MB/s "
+                  f"over {totals['elapsed']:.0f}s ({totals['bytes_sent']} bytes sent)")
+            stages = ", ".join(f"{stage} {seconds:.1f}s" for stage, seconds in totals['stage_seconds'].items())
+            print(f"Stage time: {stages}")
+        
         # Show stats
         total, success, failed, processing = self.get_job_stats(job_id)
         print(f"Current: {success} success, {failed} failed, {processing} processing")
+        
+        # Server-side processing outcome of the uploaded songs, where followed up
+        cursor.execute('''
+            SELECT COALESCE(server_status, 'not checked'), COUNT(*), AVG(server_processing_time)
+            FROM files 
+            WHERE job_id = ? AND status = 'success'
+            GROUP BY 1
+            ORDER BY 2 DESC
+        ''', (job_id,))
+        outcomes = cursor.fetchall()
+        if any(status != 'not checked' for status, _, _ in outcomes):
+            print("Server processing: " + ", ".join(
+                f"{count} {status}" + (f" (avg {average:.1f}s)" if average is not None else "")
+                for status, count, average in outcomes))
     
     def complete_job(self):
-        """Mark job as completed."""
-        cursor = self.conn.cursor()
-        cursor.execute('''
+        """Mark job as completed (committing everything still queued) and close the database."""
+        job_id, completed_at = self.job_id, datetime.datetime.now()
+        self._write(lambda cursor, row_ids: cursor.execute('''
             UPDATE import_jobs 
             SET status = 'completed', completed_at = ?
             WHERE id = ?
-        ''', (datetime.datetime.now(), self.job_id))
-        self.conn.commit()
-        self.conn.close()
+        ''', (completed_at, job_id)))
+        self.close()
         print(f"✅ Import job {self.job_id} completed")
     
     def close(self):
-        """Close the database connection."""
+        """Commit queued writes (write-behind mode) and close the database connection."""
+        writer, self.writer = self.writer, None
+        if writer is not None:
+            atexit.unregister(self.close)
+            writer.stop()
         if self.conn:
             self.conn.close()
 
@@ -585,6 +1658,20 @@ def get_upload_method(script_name: str) -> str:
         return 'unknown'
 
 
+def remove_database(db_path: str) -> bool:
+    """
+    Delete a tracking database, with the WAL files write-behind mode keeps next to it.
+    
+    Returns:
+        True if the database existed
+    """
+    existed = os.path.exists(db_path)
+    for path in (db_path, f"{db_path}-wal", f"{db_path}-shm"):
+        if os.path.exists(path):
+            os.remove(path)
+    return existed
+
+
 # Convenience functions for common operations
 def create_tracker(db_path: str = 'import_tracking.db') -> BulkImportTracker:
     """Create a tracker instance with default settings."""
@@ -647,6 +1734,8 @@ def show_all_jobs(db_path: str = 'import_tracking.db'):
         print(f"  Started: {job['started_at']}")
         if job['completed_at']:
             print(f"  Completed: {job['completed_at']}")
+        if job['notes']:
+            print(f"  Notes: {job['notes']}")
 
 
 if __name__ == "__main__":
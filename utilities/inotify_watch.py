@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Music Archive Directory Watcher (Linux inotify)
+
+Minimal recursive inotify wrapper used by universal_upload.py --watch. It talks
+to the kernel through ctypes, so no extra package is needed; it only works on
+Linux (and only for local filesystems: NFS/SMB shares don't deliver inotify
+events for changes made by other machines).
+
+inotify watches single directories, not trees, so every directory under the
+root gets its own watch, and directories created (or moved in) later are
+added as their events arrive. The number of watches per user is capped by
+/proc/sys/fs/inotify/max_user_watches; raise it for very large libraries.
+
+Usage:
+    with InotifyWatcher() as watcher:
+        watcher.add_tree("/srv/dropbox")
+        while True:
+            for path, mask in watcher.read_events(timeout=1.0):
+                if mask & IN_CLOSE_WRITE:
+                    print("finished writing", path)
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import select
+import struct
+import sys
+from typing import Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Event bits (see inotify(7))
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+
+# inotify_init1 flags
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+
+# What each watched directory reports: files being written, finished or moved
+# in, and new subdirectories
+WATCH_MASK = (IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+              | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+
+_EVENT_HEADER = struct.Struct('iIII')   # wd, mask, cookie, name length
+_READ_SIZE = 64 * 1024
+
+
+class WatchError(Exception):
+    """inotify is unavailable or a directory could not be watched."""
+
+
+class InotifyWatcher:
+    """Recursive directory watch on one inotify file descriptor."""
+
+    def __init__(self):
+        if not sys.platform.startswith('linux'):
+            raise WatchError("Watching directories needs Linux inotify")
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise WatchError(f"inotify_init1 failed: {os.strerror(ctypes.get_errno())}")
+        self.paths: Dict[int, str] = {}   # watch descriptor -> directory path
+        self._limit_warned = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def add_watch(self, directory: str) -> bool:
+        """Watch one directory; returns False if it could not be watched."""
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err == errno.ENOSPC:
+                if not self._limit_warned:
+                    logger.warning("inotify watch limit reached; raise fs.inotify.max_user_watches "
+                                   "to watch the whole tree")
+                    self._limit_warned = True
+            elif err not in (errno.ENOENT, errno.ENOTDIR):
+                logger.warning(f"Cannot watch {directory}: {os.strerror(err)}")
+            return False
+        # A directory that moved keeps its watch descriptor; remember its new path
+        self.paths[wd] = directory
+        return True
+
+    def add_tree(self, root: str, collect_files: bool = False) -> List[str]:
+        """
+        Watch root and every directory below it (symlinks are not followed).
+
+        Args:
+            root: Top directory
+            collect_files: Also return the regular files found, e.g. for a
+                directory that was copied in before its watch existed
+
+        Returns:
+            Paths of the files found (empty unless collect_files)
+        """
+        files = []
+        pending = [root]
+        while pending:
+            directory = pending.pop()
+            if not self.add_watch(directory):
+                continue
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                pending.append(entry.path)
+                            elif collect_files and entry.is_file():
+                                files.append(entry.path)
+                        except OSError:
+                            continue
+            except OSError as e:
+                logger.debug(f"Cannot list {directory} for watching: {e}")
+        return files
+
+    def read_events(self, timeout: float = 1.0) -> List[Tuple[str, int]]:
+        """
+        Wait up to timeout seconds for events.
+
+        Returns:
+            (path, mask) per event; path is the file or subdirectory the event is
+            about (the watched directory itself for *_SELF events, '' for
+            IN_Q_OVERFLOW, which means events were lost)
+        """
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, _READ_SIZE)
+        except BlockingIOError:
+            return []
+
+        events = []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                events.append(('', mask))
+                continue
+            directory = self.paths.get(wd)
+            if mask & IN_IGNORED:
+                # The directory was deleted or unmounted; its watch is gone
+                self.paths.pop(wd, None)
+                continue
+            if directory is None:
+                continue
+            events.append((os.path.join(directory, os.fsdecode(name)) if name else directory, mask))
+        return events
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+            self.paths.clear()
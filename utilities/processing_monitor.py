@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Music Archive Server Processing Follow-up
+
+A successful upload only means the archive accepted the file; tag extraction
+runs afterwards (inline or in a background job) and can still fail. The
+monitor collects the ids of uploaded songs and asks the archive about them in
+bulk (one request per MAX_STATUS_LOOKUP songs every few seconds), writing each
+song's final processing status, error and server processing time back to the
+tracking database.
+
+It runs as its own task on the upload event loop, sharing the engine's
+connection pool but not its upload slots, so it never holds up an upload.
+Songs still pending when the run ends stay unsettled in the database and can
+be checked later (universal_upload.py --check-processing). A failed poll
+(timeout, 5xx, connection error) keeps every song pending for the next one;
+only an archive without the endpoint (404) ends the follow-up.
+
+Usage:
+    monitor = ProcessingMonitor(engine, tracker)
+    poller = asyncio.ensure_future(monitor.run())
+    ...
+    monitor.add(song_id)            # after each successful upload
+    ...
+    poller.cancel()
+    await monitor.drain(timeout=30) # give the archive time to finish
+"""
+
+import asyncio
+import logging
+import time
+from collections import Counter
+from typing import Dict, Iterable, Optional
+
+import aiohttp
+
+from upload_engine import MAX_STATUS_LOOKUP, ArchiveRequestError, classify_failure
+
+logger = logging.getLogger(__name__)
+
+# Statuses the archive may still change on its own
+UNSETTLED_STATUSES = {'pending', 'processing'}
+
+# Seconds between status requests
+DEFAULT_POLL_INTERVAL = 5.0
+
+
+class ProcessingMonitor:
+    """Bulk polling of server-side processing status for uploaded songs."""
+
+    def __init__(self, engine, tracker, poll_interval: float = DEFAULT_POLL_INTERVAL):
+        """
+        Args:
+            engine: Authenticated UploadEngine
+            tracker: BulkImportTracker the outcomes are written to (used on the
+                event loop thread only, like the rest of the pipeline)
+            poll_interval: Seconds between status requests
+        """
+        self.engine = engine
+        self.tracker = tracker
+        self.poll_interval = poll_interval
+        self.pending: Dict[str, float] = {}   # song id -> when it was uploaded
+        self.outcomes = Counter()             # final status -> songs
+        self.supported = True
+        self.failures = 0                     # polls failed in a row
+
+    def add(self, song_id):
+        """Follow up on an uploaded song."""
+        if self.supported and song_id not in (None, 'unknown'):
+            self.pending.setdefault(str(song_id), time.monotonic())
+
+    def add_all(self, song_ids: Iterable):
+        for song_id in song_ids:
+            self.add(song_id)
+
+    async def poll(self) -> int:
+        """
+        Ask about the oldest pending songs once (one request per batch).
+
+        Returns:
+            Number of songs whose outcome was recorded
+        """
+        if not self.pending or not self.supported:
+            return 0
+
+        song_ids = list(self.pending)[:MAX_STATUS_LOOKUP]
+        try:
+            statuses = await self.engine.fetch_processing_status(song_ids)
+        except (ArchiveRequestError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+            # Transient or not, the songs stay pending and are asked about again next poll
+            self.failures += 1
+            log = logger.warning if self.failures == 1 else logger.debug
+            log(f"Processing status poll failed ({classify_failure(error=e)}: {e}); "
+                f"{len(self.pending)} songs stay pending")
+            return 0
+        if self.failures:
+            logger.info(f"Processing status polls succeed again after {self.failures} failures")
+            self.failures = 0
+        if statuses is None:
+            # An archive without the endpoint
+            logger.warning(f"Archive does not report processing status; "
+                           f"{len(self.pending)} uploaded songs will not be followed up")
+            self.supported = False
+            self.pending.clear()
+            return 0
+
+        settled = []
+        for song_id in song_ids:
+            info = statuses.get(song_id, {})
+            if song_id in statuses and info is None:
+                settled.append((song_id, 'missing', None, None))
+                continue
+            status = info.get('processing_status') or 'unknown'
+            if song_id not in statuses or status in UNSETTLED_STATUSES:
+                # To the back of the line, so more than one batch of slow songs can't starve the rest
+                self.pending[song_id] = self.pending.pop(song_id)
+                continue
+            settled.append((song_id, status, info.get('processing_error'), info.get('processing_seconds')))
+
+        self.tracker.record_server_processing(settled)
+        for song_id, status, error, _seconds in settled:
+            del self.pending[song_id]
+            self.outcomes[status] += 1
+            if status == 'failed':
+                logger.warning(f"Archive failed to process song {song_id}: {error}")
+        return len(settled)
+
+    async def run(self):
+        """Poll pending songs every poll_interval seconds until cancelled."""
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            await self.poll()
+
+    async def drain(self, timeout: float, should_stop=None):
+        """
+        Keep polling until every song has settled or timeout seconds have passed.
+
+        Args:
+            timeout: Longest time to wait for the archive
+            should_stop: Optional callable; polling stops early when it returns True
+        """
+        deadline = time.monotonic() + timeout
+        unasked = 0   # songs not yet asked about in this pass over the pending ones
+        while self.pending and self.supported and time.monotonic() < deadline:
+            if should_stop is not None and should_stop():
+                break
+            if unasked <= 0:
+                unasked = len(self.pending)
+            unasked -= min(len(self.pending), MAX_STATUS_LOOKUP)
+            await self.poll()
+            if self.pending and (self.failures or unasked <= 0):
+                # Every pending song was asked about since the last pause (or the poll
+                # failed); give the archive time before the next pass
+                unasked = 0
+                await asyncio.sleep(min(self.poll_interval, max(0.0, deadline - time.monotonic())))
+
+    def summary(self) -> Optional[str]:
+        """One-line summary of the outcomes, or None if nothing was followed up."""
+        if not self.outcomes and not self.pending:
+            return None
+        parts = [f"{count} {status}" for status, count in self.outcomes.most_common()]
+        if self.pending:
+            parts.append(f"{len(self.pending)} still pending")
+        return ", ".join(parts)
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Music Archive Client-side Tag Reader
+
+Reads the tags of an audio file (ID3 for MP3, MP4 atoms for M4A/AAC, Vorbis
+comments for FLAC, Ogg Vorbis and Opus) and turns them into the optional
+bulk_upload form fields. Sent with client_metadata=true, the archive uses
+these fields as they are and skips its own ffprobe extraction, so the tag
+reading CPU is spent on the uploading machines instead of the single archive
+host.
+
+Only formats whose tags are read reliably here are covered; for anything
+else read_tags() returns None and the archive extracts tags itself, as before.
+read_tags() is a plain function of a path, so it can run in a process pool (started
+with init_worker, so Ctrl+C is handled by the uploader alone).
+
+Usage:
+    from tag_reader import read_tags
+
+    fields = read_tags(path)   # None: let the archive extract
+    if fields is not None:
+        engine.upload_file(path, filename, mime_type, fields=fields)
+
+Dependencies:
+    pip install mutagen
+"""
+
+import logging
+import signal
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+try:
+    import mutagen
+    from mutagen.easymp4 import EasyMP4
+    from mutagen.flac import FLAC
+    from mutagen.mp3 import EasyMP3
+    from mutagen.oggopus import OggOpus
+    from mutagen.oggvorbis import OggVorbis
+except ImportError:  # only needed for --client-tags
+    mutagen = None
+
+# Longest value sent for a text field (the archive's title limit)
+MAX_FIELD_LENGTH = 200
+
+
+def tags_available() -> bool:
+    """Whether the tag reading library is installed."""
+    return mutagen is not None
+
+
+def init_worker():
+    """Process pool initializer: leave Ctrl+C to the uploading process."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def _first(tags, key: str) -> Optional[str]:
+    values = tags.get(key) if tags is not None else None
+    if not values:
+        return None
+    value = str(values[0]).replace('\x00', '').strip()
+    return value[:MAX_FIELD_LENGTH] or None
+
+
+def _positive_int(value: Optional[str]) -> Optional[int]:
+    """'3/12' or '03' -> 3; None for anything that isn't a positive number."""
+    if not value:
+        return None
+    try:
+        number = int(value.split('/')[0].strip())
+    except ValueError:
+        return None
+    return number if number > 0 else None
+
+
+def read_tags(filepath: str) -> Optional[Dict[str, str]]:
+    """
+    Read a file's tags as bulk_upload form fields.
+
+    Args:
+        filepath: Audio file
+
+    Returns:
+        Form fields (client_metadata, and whichever of title, artist_name,
+        album_title, genre_name, track_number, duration and file_format are
+        known), or None if the file's format isn't covered or can't be read
+    """
+    if mutagen is None:
+        return None
+    try:
+        audio = mutagen.File(filepath, easy=True)
+    except Exception as e:  # mutagen raises many types for damaged files
+        logger.debug(f"Cannot read tags of {filepath}: {e}")
+        return None
+
+    if isinstance(audio, EasyMP3):
+        file_format = 'mp3'
+    elif isinstance(audio, EasyMP4):
+        file_format = 'm4a'
+    elif isinstance(audio, FLAC):
+        file_format = 'flac'
+    elif isinstance(audio, (OggVorbis, OggOpus)):
+        file_format = 'ogg'
+    else:
+        return None
+
+    tags = audio.tags
+    fields = {
+        'client_metadata': 'true',
+        'file_format': file_format,
+        'title': _first(tags, 'title'),
+        'artist_name': _first(tags, 'artist'),
+        'album_title': _first(tags, 'album'),
+        'genre_name': _first(tags, 'genre'),
+        'track_number': _positive_int(_first(tags, 'tracknumber')),
+    }
+    length = getattr(audio.info, 'length', None)
+    if length and round(length) > 0:
+        fields['duration'] = round(length)
+    return {key: str(value) for key, value in fields.items() if value is not None}
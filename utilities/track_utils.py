@@ -16,8 +16,9 @@ Commands:
     list-failed [job_id]  List all failed files
     list-success [job_id] List all successful files
     stats                 Show overall statistics
-    cleanup               Remove old tracking data
+    cleanup               Prune jobs older than --days, keeping uploaded files' records (--archive PATH, --dry-run)
     export <job_id>       Export job data to JSON
+    merge --sources DB... Merge per-shard tracking databases into --db and report the combined result
 
 Examples:
     python3 track_utils.py show-all
@@ -25,11 +26,15 @@ Examples:
     python3 track_utils.py show-errors
     python3 track_utils.py show-verbose 2
     python3 track_utils.py stats
+    python3 track_utils.py cleanup --days 90 --archive tracking_archive.db
+    python3 track_utils.py merge --db combined.db --sources shard1.db shard2.db shard3.db
 """
 
+import os
 import sys
 import argparse
 import json
+import sqlite3
 from datetime import datetime, timedelta
 from import_tracker import BulkImportTracker, show_all_jobs
 
@@ -106,23 +111,62 @@ def show_overall_stats(tracker):
         print(f"  {method}: {count} jobs")
 
 
-def cleanup_old_data(tracker, days=30):
-    """Remove tracking data older than specified days."""
+def cleanup_old_data(tracker, days=30, archive=None, dry_run=False):
+    """Prune jobs older than the given days, keeping the records skip checks need."""
     cutoff_date = datetime.now() - timedelta(days=days)
-    
-    # This would require additional functionality in the tracker
-    # For now, just show what would be cleaned up
-    jobs = tracker.get_all_jobs()
-    old_jobs = [j for j in jobs if j['started_at'] and datetime.fromisoformat(j['started_at'].replace('Z', '+00:00')) < cutoff_date]
+    old_ids = set(tracker.get_prunable_jobs(cutoff_date))
+    old_jobs = [j for j in tracker.get_all_jobs() if j['id'] in old_ids]
     
     print(f"=== CLEANUP (Jobs older than {days} days) ===")
-    if old_jobs:
+    if not old_jobs:
+        print("No old jobs found.")
+    else:
         print(f"Found {len(old_jobs)} old jobs:")
         for job in old_jobs:
             print(f"  Job {job['id']}: {job['started_at']} ({job['script_name']})")
-        print("\nNote: Cleanup functionality not yet implemented.")
-    else:
-        print("No old jobs found.")
+    if dry_run:
+        print("\nDry run: nothing removed.")
+        return
+    
+    counts = tracker.prune(cutoff_date, archive)
+    if archive and counts['jobs']:
+        print(f"\nArchived {counts['jobs']} jobs to {archive}")
+    print(f"\nRemoved {counts['jobs']} jobs, {counts['files_deleted']} file records, "
+          f"{counts['directories']} directories, {counts['sessions']} stale upload sessions")
+    print(f"Kept {counts['files_kept']} records of uploaded files (never uploaded again)")
+    print(f"Database compacted: {counts['bytes_freed'] / 1e6:.1f} MB freed")
+
+
+def merge_databases(tracker, sources):
+    """Merge per-shard tracking databases into this one and report the combined result."""
+    print("=== MERGE ===")
+    for source in sources:
+        if os.path.exists(source) and os.path.samefile(source, tracker.db_path):
+            print(f"  {source}: skipped (this is the target database)")
+            continue
+        try:
+            jobs_merged, files_merged = tracker.merge_database(source)
+        except (OSError, sqlite3.DatabaseError) as e:
+            print(f"  {source}: skipped ({e})")
+            continue
+        print(f"  {source}: {jobs_merged} jobs, {files_merged} file records merged")
+    
+    jobs = tracker.get_all_jobs()
+    if not jobs:
+        print("No jobs found in database.")
+        return
+    
+    print("\n=== COMBINED REPORT ===")
+    totals = [0, 0, 0, 0]
+    for job in sorted(jobs, key=lambda j: j['id']):
+        total, success, failed, processing = (count or 0 for count in tracker.get_job_stats(job['id']))
+        totals = [a + b for a, b in zip(totals, (total, success, failed, processing))]
+        label = job['notes'] or job['script_name']
+        print(f"  Job {job['id']} ({label}): {success} success, {failed} failed, "
+              f"{processing} processing, {total} records")
+    print(f"  All jobs: {totals[1]} success, {totals[2]} failed, {totals[3]} processing, {totals[0]} records")
+    print()
+    show_overall_stats(tracker)
 
 
 def export_job_data(tracker, job_id, output_file=None):
@@ -163,6 +207,9 @@ def main():
     parser.add_argument('--db', default='import_tracking.db', help='Tracking database path')
     parser.add_argument('--output', help='Output file for export command')
     parser.add_argument('--days', type=int, default=30, help='Days for cleanup command')
+    parser.add_argument('--archive', metavar='DB', help='Tracking database cleanup copies pruned jobs to')
+    parser.add_argument('--dry-run', action='store_true', help='Only list what cleanup would remove')
+    parser.add_argument('--sources', nargs='+', metavar='DB', help='Tracking databases for merge command')
     
     args = parser.parse_args()
     
@@ -200,7 +247,7 @@ def main():
         show_overall_stats(tracker)
     
     elif args.command == 'cleanup':
-        cleanup_old_data(tracker, args.days)
+        cleanup_old_data(tracker, args.days, args.archive, args.dry_run)
     
     elif args.command == 'export':
         if not args.job_id:
@@ -208,9 +255,15 @@ def main():
             sys.exit(1)
         export_job_data(tracker, args.job_id, args.output)
     
+    elif args.command == 'merge':
+        if not args.sources:
+            print("Error: --sources required for merge command")
+            sys.exit(1)
+        merge_databases(tracker, args.sources)
+    
     else:
         print(f"Unknown command: {args.command}")
-        print("Available commands: show-all, show-job, show-errors, show-verbose, list-failed, list-success, stats, cleanup, export")
+        print("Available commands: show-all, show-job, show-errors, show-verbose, list-failed, list-success, stats, cleanup, export, merge")
         sys.exit(1)
 
 
@@ -26,6 +26,10 @@ Arguments:
 Mode Options:
     --start-over          Start fresh, ignore existing tracking data
     --resume              Resume from last successful import
+    --retry-failed        Upload retryable failures from the tracking database (no filesystem scan)
+    --check-processing    Poll the archive for processing outcomes of songs still pending, then exit
+    --emit-manifest PATH  Scan the directory, write a manifest of its audio files to PATH and exit
+    --from-manifest PATH  Upload the files listed in a manifest instead of scanning the directory
     --show-errors         Show error summary and exit
     --show-errors-verbose Show detailed error information and exit
 
@@ -35,6 +39,7 @@ Processing Limits:
 
 Tracking Options:
     --tracking-db PATH    SQLite database for tracking progress (default: import_tracking.db)
+    --write-behind        Commit tracking writes in groups on a background thread (WAL journal)
 
 Authentication Options:
     --url URL             Base URL of the archive (default: http://localhost:3000)
@@ -44,8 +49,39 @@ Authentication Options:
 Other Options:
     -d, --dry-run         Show what would be uploaded without actually uploading
     -v, --verbose         Verbose output
-    --concurrent CONCURRENT Number of concurrent uploads (default: 5)
+    --concurrent CONCURRENT Number of concurrent uploads (default: 5; starting point with --adaptive)
+    --adaptive            Adapt concurrent uploads to server latency and errors
+    --max-concurrent N    Upper bound on concurrent uploads with --adaptive (default: 32)
+    --http2               Multiplex all uploads over one HTTP/2 connection (needs httpx[http2])
     --limit LIMIT         Limit upload to first N files (useful for testing)
+    --scan-workers N      Threads listing directories in parallel while scanning (default: 8)
+    --shard I/N           Only upload shard I of N (stable path hash), to split an import across processes/hosts
+    --shard-by MODE       Shard by 'file' path (default) or by 'directory' (albums stay together)
+    --watch               After the initial scan, keep uploading new or changed files (Linux inotify)
+    --watch-debounce SECS Seconds a watched file must stay unchanged before upload (default: 5)
+    --full-rescan         List every directory instead of skipping unchanged, fully processed ones
+    --no-dedup            Skip the content-hash duplicate check and upload every file
+    --hash-workers N      Threads used to hash files for the duplicate check
+    --files-per-request N Pack up to N small files into one upload request (1 disables)
+    --request-mb MB       Byte budget of one batch request (larger files go alone)
+    --chunked-mb MB       Upload files of at least this size in resumable chunks (0 disables)
+    --chunk-mb MB         Chunk size of resumable uploads
+    --processing-wait SECS Seconds to keep polling for server processing outcomes after uploading (default: 30)
+    --no-processing-check Don't follow up on the archive's processing of uploaded songs
+    --no-progress         Don't show the live progress bar
+    --stats-json PATH     Append periodic JSON stats lines (rates, ETA, stage timings) to PATH
+    --stats-interval SECS Seconds between JSON stats lines (default: 10)
+    --max-retries N       Cap on in-run retries of a failed upload (default: per failure class; 0 disables)
+    --convert-flac        Convert WAV/AIFF to FLAC (verified lossless) before uploading
+    --convert-workers N   Files converted at the same time with --convert-flac
+    --convert-dir PATH    Where converted files are kept until uploaded
+    --ffmpeg PATH         ffmpeg executable or directory (default: from PATH)
+    --read-order ORDER    Upload in 'scan' order (default), by 'inode' or by 'directory', with read-ahead
+    --read-order-window N Files sorted together while streaming (default: 10000; 0 sorts the whole scan)
+    --manifest-hashes     Record content hashes in --emit-manifest (on --hash-workers threads)
+    --manifest-tags       Record tags in --emit-manifest (on --tag-workers processes, needs mutagen)
+    --client-tags         Read tags here and send them, so the archive skips its own extraction (needs mutagen)
+    --tag-workers N       Processes reading tags with --client-tags (default: CPU count)
     -h, --help            Show this help message
 
 Controls:
@@ -62,6 +98,16 @@ Examples:
     # Test with first 100 files
     python3 universal_upload.py ~/Music --max-count 100
 
+    # Split one import across three hosts mounting the same share (run 1/3, 2/3, 3/3)
+    python3 universal_upload.py /mnt/archive --shard 2/3 --tracking-db shard2.db
+
+    # Upload the library, then keep uploading whatever is copied into it
+    python3 universal_upload.py ~/Music --watch
+
+    # Scan on the NAS, then upload from another host that mounts the share elsewhere
+    python3 universal_upload.py /volume1/music --emit-manifest library.jsonl --manifest-hashes
+    python3 universal_upload.py /mnt/music --from-manifest library.jsonl
+
     # Continue from file 500 (for batch processing)
     python3 universal_upload.py ~/Music --continue-from 500 --max-count 100
 
@@ -82,8 +128,6 @@ import os
 import sys
 import argparse
 import asyncio
-import aiohttp
-import requests
 import getpass
 import signal
 import threading
@@ -95,13 +139,34 @@ import locale
 import datetime
 import json
 import traceback
-import subprocess
-from urllib.parse import urljoin, quote
+import queue
+import itertools
+import re
+import tempfile
+import zlib
+from urllib.parse import quote
 from pathlib import Path, PurePath
 import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import aiohttp
 
 # Import the shared tracking module
-from import_tracker import BulkImportTracker, start_job_with_defaults, resume_from_last_job
+from import_tracker import BulkImportTracker, start_job_with_defaults, resume_from_last_job, remove_database
+from upload_engine import (UploadEngine, file_checksum, classify_failure, MAX_CHECKSUM_LOOKUP,
+                           MAX_BATCH_FILES, DEFAULT_UPLOAD_CHUNK_SIZE, RETRY_POLICIES,
+                           ArchiveRequestError)
+from upload_telemetry import UploadTelemetry
+from processing_monitor import ProcessingMonitor
+from http2_transport import http2_available
+import tag_reader
+from upload_manifest import write_manifest, read_manifest, read_manifest_header
+from disk_locality import READ_ORDERS, DEFAULT_ORDER_WINDOW, locality_ordered, prefetch
+from flac_convert import (ConversionError, find_ffmpeg, needs_conversion, convert_to_flac,
+                          discard_converted)
+from inotify_watch import (InotifyWatcher, WatchError, IN_CREATE, IN_MOVED_TO, IN_ISDIR,
+                           IN_DELETE_SELF, IN_MOVE_SELF, IN_Q_OVERFLOW)
 
 # Global flag for graceful shutdown
 shutdown_requested = False
@@ -109,6 +174,34 @@ shutdown_requested = False
 # Default API URL
 DEFAULT_API_URL = "http://localhost:3000"
 
+# Directory walker: threads listing directories in parallel, and how many found
+# paths may wait for the consumer before the walkers pause
+DEFAULT_SCAN_WORKERS = 8
+SCAN_BUFFER_SIZE = 10000
+
+# Duplicate check: files hashed and looked up together, and how long to wait
+# for a batch to fill before checking what is there
+DEDUP_BATCH_SIZE = 50
+DEDUP_BATCH_WAIT = 0.2
+
+# Batch uploads: default files per request and byte budget per request
+DEFAULT_FILES_PER_REQUEST = 10
+DEFAULT_REQUEST_BYTES = 32 * 1024 * 1024
+
+# Files at least this large are sent as resumable chunked uploads
+DEFAULT_CHUNKED_BYTES = 64 * 1024 * 1024
+
+# Converted FLAC files wait here until uploaded (kept across runs for retries)
+DEFAULT_CONVERT_DIR = os.path.join(tempfile.gettempdir(), 'archive-flac')
+
+# Seconds to keep polling the archive for processing outcomes after the last upload
+DEFAULT_PROCESSING_WAIT = 30.0
+
+# Watch mode: seconds a file must go without changes before it is uploaded, and
+# how often pending events are drained during the catch-up scan
+DEFAULT_WATCH_DEBOUNCE = 5.0
+WATCH_DRAIN_INTERVAL = 0.5
+
 # Setup logging
 logging.basicConfig(
     level=logging.INFO,
@@ -188,108 +281,326 @@ def is_audio_file(filepath):
         logger.error(f"Error checking if file is audio: {filepath}, error: {e}")
         return False
 
-def find_audio_files(directory, limit=None):
-    """Find all audio files in directory recursively with robust error handling."""
+class IncrementalScan:
+    """
+    Directory mtime index for one scan, loaded from and saved to the tracker.
+
+    A directory whose mtime is unchanged since a scan that found every audio file
+    in it already processed is not listed again; the walk just descends into its
+    remembered subdirectories (a directory's mtime changes when entries are
+    added, removed or renamed in it, but not when its subdirectories change).
+    Files already processed are skipped by their device and inode, checked
+    against the tracker's processed set without a query or a stat per file.
+
+    owns(path) tells which files this run uploads (its --shard); only those
+    are remembered as pending, so a directory is complete once this run's own
+    files in it are processed. Each shard keeps its own tracking database,
+    and so its own index.
+    """
+
+    def __init__(self, tracker, owns=None):
+        self.tracker = tracker
+        self.owns = owns or (lambda path: True)
+        self.directories = tracker.get_directory_index()
+        # Loaded here: the walker threads can't use the tracker's connection
+        tracker.load_processed_files()
+        self.records = []   # (path, mtime, subdirs, pending files) per listed directory
+        self.listed = 0
+        self.skipped = 0
+        self._lock = threading.Lock()
+
+    def unchanged_subdirs(self, path, mtime):
+        """Subdirectories to descend into if path can be skipped, else None."""
+        cached = self.directories.get(path)
+        unchanged = bool(cached and cached[0] == mtime and cached[2])
+        with self._lock:
+            if unchanged:
+                self.skipped += 1
+            else:
+                self.listed += 1
+        return cached[1] if unchanged else None
+
+    def is_processed(self, entry, device):
+        """True if the os.scandir() entry of a file on device was already processed."""
+        return self.tracker.is_identity_processed(device, entry.inode(), entry.path)
+
+    def save(self, tracker):
+        """Store this scan's directories, then mark those whose files are now all processed."""
+        tracker.save_directory_index(self.records)
+        tracker.refresh_directory_index()
+        logger.info(f"Incremental scan: {self.listed} directories listed, "
+                    f"{self.skipped} unchanged directories skipped")
+
+def redacted_command_line():
+    """The command line with the password hidden, for storing with the import job."""
+    words = []
+    hide_next = False
+    for word in sys.argv:
+        if hide_next:
+            word, hide_next = '***', False
+        elif word == '--password':
+            hide_next = True
+        elif word.startswith('--password='):
+            word = '--password=***'
+        words.append(word)
+    return ' '.join(words)
+
+def parse_shard(value):
+    """argparse type for --shard: 'I/N' with 1 <= I <= N, returned as (I, N)."""
+    match = re.fullmatch(r'\s*(\d+)\s*/\s*(\d+)\s*', value)
+    if not match:
+        raise argparse.ArgumentTypeError(f"expected I/N (e.g. 2/4), got {value!r}")
+    index, count = int(match.group(1)), int(match.group(2))
+    if not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(f"shard {index}/{count} is out of range (1 to {count})")
+    return index, count
+
+def shard_of(filepath, root, count, by_directory=False):
+    """
+    Shard (1 to count) a file belongs to.
+
+    The shard comes from a CRC32 of the path relative to root (or of its
+    directory), normalized to NFC with '/' separators, so every process and
+    host that points at the same directory computes the same split, whatever
+    the share is mounted as and however the walk is ordered.
+    """
+    relative = os.path.relpath(filepath, root)
+    if by_directory:
+        relative = os.path.dirname(relative)
+    key = unicodedata.normalize('NFC', relative.replace(os.sep, '/'))
+    return zlib.crc32(key.encode('utf-8', 'surrogateescape')) % count + 1
+
+def in_shard(filepaths, root, shard, by_directory=False):
+    """Yield only the files belonging to shard (index, count)."""
+    index, count = shard
+    for filepath in filepaths:
+        if shard_of(filepath, root, count, by_directory) == index:
+            yield filepath
+
+def retryable_failures(tracker, directory):
+    """Files under directory whose last upload attempt failed with a retryable error."""
+    root = os.path.join(os.path.abspath(directory), '')
+    files = []
+    for file_path, failure_class, response_status, error_details in tracker.get_latest_failures():
+        if failure_class is None:
+            # Failures recorded before classification only kept the status in the details
+            match = re.match(r'Response status: (\S+)', error_details or '')
+            failure_class = classify_failure(response_status or (match and match.group(1)))
+        if failure_class in RETRY_POLICIES and os.path.abspath(file_path).startswith(root):
+            files.append(file_path)
+    return files
+
+def find_audio_files(directory, limit=None, workers=DEFAULT_SCAN_WORKERS, incremental=None):
+    """
+    Find all audio files in directory recursively with robust error handling.
+
+    Files are yielded as soon as they are discovered, so callers can start
+    working while the rest of the tree is still being walked. With an
+    IncrementalScan, unchanged directories and known processed files are skipped.
+    """
     try:
-        logger.info(f"Scanning directory: {directory}")
+        logger.info(f"Scanning directory: {directory} ({workers} walker threads)")
         
         # Remove trailing slash for consistency
-        clean_directory = directory.rstrip('/')
+        clean_directory = directory.rstrip('/') or directory
         
-        # Use platform-appropriate file scanning
-        if platform.system() == "Windows":
-            logger.info(f"Using os.walk for Windows/WSL: {clean_directory}")
-            return _find_audio_files_windows(clean_directory, limit)
-        else:
-            logger.info(f"Using find command for Unix: {clean_directory}")
-            return _find_audio_files_unix(clean_directory, limit)
+        yield from _walk_audio_files(clean_directory, limit, workers, incremental)
          
     except Exception as e:
         logger.error(f"Error scanning directory {directory}: {e}")
         return
 
-def _find_audio_files_windows(directory, limit=None):
-    """Find audio files using os.walk (Windows/WSL compatible)."""
-    try:
-        count = 0
-        for root, dirs, files in os.walk(directory):
-            for file in files:
-                filepath = os.path.join(root, file)
-                if is_audio_file(filepath):
-                    logger.debug(f"Found audio file: {filepath}")
-                    yield filepath
-                    count += 1
-                    
-                    if limit and count >= limit:
-                        logger.info(f"Reached limit of {limit} files, stopping scan")
-                        return
-        
-        logger.info(f"Windows scan complete: {count} audio files found")
-        
-    except Exception as e:
-        logger.error(f"Windows file scan failed: {e}")
-        return
+def _walk_audio_files(directory, limit=None, workers=DEFAULT_SCAN_WORKERS, incremental=None):
+    """
+    Walk a directory tree with os.scandir across threads, yielding audio files as found.
 
-def _find_audio_files_unix(directory, limit=None):
-    """Find audio files using find command (Unix systems)."""
-    try:
-        # Build find command to locate audio files with better error handling
-        find_cmd = [
-            'find', directory, 
-            '-type', 'f',
-            '(', '-iname', '*.mp3',
-            '-o', '-iname', '*.m4a', 
-            '-o', '-iname', '*.flac',
-            '-o', '-iname', '*.wav',
-            '-o', '-iname', '*.ogg', ')',
-            '-print0'  # Use null-terminated output to handle special characters
-        ]
-        
-        logger.info(f"Running command: {' '.join(find_cmd)}")
-        
-        # Run find command with binary output to handle null bytes
-        result = subprocess.run(
-            find_cmd,
-            capture_output=True,
-            text=False,  # Use binary mode
-            timeout=300  # 5 minute timeout
-        )
-        
-        if result.returncode != 0:
-            logger.error(f"Find command failed: {result.stderr.decode('utf-8', errors='replace')}")
-            return
-        
-        # Process null-terminated output
-        output = result.stdout.decode('utf-8', errors='replace')
-        files = output.split('\0')
-        
-        logger.info(f"Find command found {len(files)} potential audio files")
-        
-        count = 0
-        for filepath in files:
-            if not filepath.strip():
+    Network shares are latency-bound, so several directory listings in flight
+    are much faster than one. Found paths pass through a bounded queue: walkers
+    pause when the consumer falls behind, keeping memory flat however large the
+    tree is. Directory symlinks are not followed (no loops). With one worker the
+    walk is depth-first in directory order, so the file order is repeatable.
+    """
+    workers = max(1, workers)
+    pending = [directory]           # directories waiting to be listed (LIFO)
+    state = {'listing': 0}          # directories currently being listed
+    cond = threading.Condition()
+    found = queue.Queue(maxsize=SCAN_BUFFER_SIZE)
+    stop = threading.Event()
+    done = object()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                found.put(item, timeout=0.1)
+                return
+            except queue.Full:
                 continue
-                
-            logger.debug(f"Checking file: {filepath}")
-            
-            if is_audio_file(filepath):
-                logger.debug(f"Confirmed audio file: {filepath}")
-                yield filepath
-                count += 1
-                
-                # Stop if we've reached the limit
-                if limit and count >= limit:
-                    logger.info(f"Reached limit of {limit} files, stopping scan")
+
+    def walker():
+        while True:
+            with cond:
+                while not pending and state['listing'] and not stop.is_set():
+                    cond.wait()
+                if stop.is_set() or not pending:
                     return
+                path = pending.pop()
+                state['listing'] += 1
+
+            subdirs = []
+            try:
+                stat = os.stat(path) if incremental else None
+                mtime = stat.st_mtime if incremental else None
+                cached = incremental.unchanged_subdirs(path, mtime) if incremental else None
+                if cached is not None:
+                    subdirs = cached
+                else:
+                    pending_files = []
+                    with os.scandir(path) as entries:
+                        for entry in entries:
+                            if stop.is_set():
+                                break
+                            try:
+                                if entry.is_dir(follow_symlinks=False):
+                                    subdirs.append(entry.path)
+                                elif is_audio_file(entry.name) and entry.is_file():
+                                    # Names that aren't valid UTF-8 can't be tracked or sent
+                                    entry.path.encode('utf-8')
+                                    if incremental and incremental.is_processed(entry, stat.st_dev):
+                                        continue
+                                    logger.debug(f"Found audio file: {entry.path}")
+                                    if incremental and incremental.owns(entry.path):
+                                        pending_files.append(entry.path)
+                                    put(entry.path)
+                            except UnicodeEncodeError:
+                                logger.warning(f"Skipping file with undecodable name: {entry.path!r}")
+                            except OSError as e:
+                                logger.warning(f"Cannot inspect {entry.path}: {e}")
+                    # Only fully listed directories can be trusted on the next scan
+                    if incremental and not stop.is_set():
+                        incremental.records.append((path, mtime, subdirs, pending_files))
+            except FileNotFoundError:
+                logger.debug(f"Directory disappeared while scanning: {path}")
+            except OSError as e:
+                logger.warning(f"Cannot scan directory {path}: {e}")
+
+            with cond:
+                # Reversed so pop() takes subdirectories in listing order
+                pending.extend(reversed(subdirs))
+                state['listing'] -= 1
+                cond.notify_all()
+
+    def finish(threads):
+        for thread in threads:
+            thread.join()
+        put(done)
+
+    threads = [threading.Thread(target=walker, name=f"scan-{i}", daemon=True) for i in range(workers)]
+    for thread in threads:
+        thread.start()
+    threading.Thread(target=finish, args=(threads,), name="scan-finish", daemon=True).start()
+
+    count = 0
+    try:
+        while True:
+            filepath = found.get()
+            if filepath is done:
+                break
+            yield filepath
+            count += 1
+            
+            if limit and count >= limit:
+                logger.info(f"Reached limit of {limit} files, stopping scan")
+                return
         
-        logger.info(f"Unix scan complete: {len(files)} total files, {count} audio files found")
-        
-    except subprocess.TimeoutExpired:
-        logger.error("Find command timed out")
-        return
-    except Exception as e:
-        logger.error(f"Find command failed: {e}")
-        return
+        logger.info(f"Scan complete: {count} audio files found")
+    finally:
+        # Also reached when the consumer stops early: release the walkers
+        stop.set()
+        with cond:
+            cond.notify_all()
+
+def watch_audio_files(directory, debounce=DEFAULT_WATCH_DEBOUNCE, workers=DEFAULT_SCAN_WORKERS,
+                      incremental=None):
+    """
+    Yield the audio files under directory, then keep yielding new or changed ones.
+
+    Watches are set up before the catch-up scan, so nothing added while the
+    tree is being walked is missed. A file is only yielded once it has gone
+    debounce seconds without inotify events (and the catch-up scan defers
+    files modified more recently than that), so files still being copied in
+    are not uploaded half-written. A file is yielded again only if its size or
+    mtime changed; the tracker skips files already uploaded. Runs until
+    shutdown is requested or the watched directory goes away.
+    """
+    clean_directory = directory.rstrip('/') or directory
+    pending = {}    # path -> time of its latest event
+    seen = {}       # path -> (size, mtime_ns) when yielded from an event
+
+    def queue_events(events):
+        now = time.monotonic()
+        rescan = False
+        for path, mask in events:
+            if mask & IN_Q_OVERFLOW:
+                rescan = True
+            elif mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                if path == clean_directory:
+                    raise WatchError(f"Watched directory {clean_directory} was removed or moved")
+            elif mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    # A directory copied or moved in may already hold files
+                    for filepath in watcher.add_tree(path, collect_files=True):
+                        if is_audio_file(filepath):
+                            pending[filepath] = now
+            elif is_audio_file(path):
+                pending[path] = now
+        return rescan
+
+    def catch_up(incremental=None):
+        last_drain = time.monotonic()
+        for filepath in find_audio_files(clean_directory, workers=workers, incremental=incremental):
+            now = time.monotonic()
+            if now - last_drain >= WATCH_DRAIN_INTERVAL:
+                # Keep the kernel event queue from overflowing during a long scan
+                queue_events(watcher.read_events(0))
+                last_drain = now
+            if filepath in pending:
+                continue    # being written; the debounce below takes it
+            try:
+                if time.time() - os.stat(filepath).st_mtime < debounce:
+                    pending[filepath] = now
+                    continue
+            except OSError:
+                continue
+            yield filepath
+
+    with InotifyWatcher() as watcher:
+        watcher.add_tree(clean_directory)
+        logger.info(f"Watching {len(watcher.paths)} directories under {clean_directory}")
+        try:
+            yield from catch_up(incremental)
+            print(f"👀 Catch-up scan done; watching {clean_directory} for new files (Ctrl+C to stop)")
+
+            while not shutdown_requested:
+                if queue_events(watcher.read_events(1.0)):
+                    # Events were lost; walk the tree again and let the tracker skip known files
+                    logger.warning("inotify event queue overflowed; rescanning")
+                    yield from catch_up()
+
+                now = time.monotonic()
+                for filepath in [path for path, changed in pending.items() if now - changed >= debounce]:
+                    del pending[filepath]
+                    try:
+                        stat = os.stat(filepath)
+                    except OSError:
+                        continue    # removed or renamed away before it settled
+                    signature = (stat.st_size, stat.st_mtime_ns)
+                    if seen.get(filepath) == signature:
+                        continue
+                    seen[filepath] = signature
+                    logger.debug(f"New or changed file: {filepath}")
+                    yield filepath
+        except WatchError as e:
+            logger.warning(f"{e}; stopping watch")
 
 def format_size(bytes_size):
     """Format file size in human readable format."""
@@ -404,29 +715,32 @@ def setup_graceful_shutdown():
     
     return None
 
-def authenticate(api_url, username, password):
-    """Authenticate with the API and return the API token."""
-    url = urljoin(api_url, "/api/v1/auth/login")
-    data = {"email": username, "password": password}
-    
-    try:
-        response = requests.post(url, json=data, timeout=30)
-        if response.status_code == 200:
-            result = response.json()
-            if result.get("success") and "api_token" in result:
-                return result["api_token"]
-            else:
-                print(f"Authentication failed: {result.get('message', 'Unknown error')}")
-                return None
-        else:
-            print(f"Authentication failed (HTTP {response.status_code}): {response.text}")
-            return None
-    except requests.exceptions.RequestException as e:
-        print(f"Network error during authentication: {e}")
-        return None
+# Standard MIME type mapping for common audio formats
+AUDIO_MIME_TYPES = {
+    '.mp3': 'audio/mpeg',
+    '.m4a': 'audio/mp4',  # Covers both AAC and ALAC
+    '.ogg': 'audio/ogg',
+    '.oga': 'audio/ogg',
+    '.flac': 'audio/flac',
+    '.wav': 'audio/wav',
+    '.aac': 'audio/aac',
+    '.wma': 'audio/x-ms-wma',
+    '.aiff': 'audio/aiff',
+    '.aif': 'audio/aiff',
+    '.m4b': 'audio/mp4',
+    '.m4p': 'audio/mp4',
+    '.opus': 'audio/opus',
+    '.amr': 'audio/amr',
+    '.3gp': 'audio/3gpp',
+}
+
+async def upload_file_universal(engine, filepath, dry_run=False, verbose=False, fields=None):
+    """
+    Upload a single file through the shared upload engine with robust error handling.
 
-def upload_file_universal(filepath, api_url, api_key, dry_run=False, verbose=False):
-    """Upload a single file to the API with robust error handling."""
+    fields are optional bulk_upload form fields, e.g. the file's tags from
+    tag_reader.read_tags().
+    """
     try:
         # Normalize the filepath
         normalized_path = normalize_path(filepath)
@@ -438,97 +752,670 @@ def upload_file_universal(filepath, api_url, api_key, dry_run=False, verbose=Fal
             print(f"[DRY RUN] Would upload: {filename} ({size_str})")
             return True, None, "201", None
         
-        url = urljoin(api_url, "/api/v1/songs/bulk_upload")
-        headers = {"Authorization": f"Bearer {api_key}"}
-        mime_type, _ = mimetypes.guess_type(normalized_path)
-        
-        # Standard MIME type mapping for common audio formats
-        audio_mime_types = {
-            '.mp3': 'audio/mpeg',
-            '.m4a': 'audio/mp4',  # Covers both AAC and ALAC
-            '.ogg': 'audio/ogg',
-            '.oga': 'audio/ogg',
-            '.flac': 'audio/flac',
-            '.wav': 'audio/wav',
-            '.aac': 'audio/aac',
-            '.wma': 'audio/x-ms-wma',
-            '.aiff': 'audio/aiff',
-            '.aif': 'audio/aiff',
-            '.m4b': 'audio/mp4',
-            '.m4p': 'audio/mp4',
-            '.opus': 'audio/opus',
-            '.amr': 'audio/amr',
-            '.3gp': 'audio/3gpp',
-        }
-        
         # Override MIME type for audio files to ensure consistency
-        suffix = Path(normalized_path).suffix.lower()
-        if suffix in audio_mime_types:
-            mime_type = audio_mime_types[suffix]
-            if verbose:
-                logger.debug(f"Overriding MIME type for {suffix}: {mime_type}")
-        
-        # Prepare form data
-        files = {"audio_file": (filename, open(normalized_path, "rb"), mime_type or "application/octet-stream")}
-        data = {"filename": filename}
+        mime_type = _upload_mime_type(normalized_path, verbose)
         
         # Extract metadata from filename - DISABLED to let Rails extract correct metadata from audio tags
         # metadata = extract_metadata_from_filename(filename)
-        # if metadata:
-        #     data.update(metadata)
         
-        response = requests.post(url, headers=headers, files=files, data=data, timeout=60)
+        success_flag, song, response_status, error_msg = await engine.upload_file(
+            normalized_path, filename, mime_type, fields=fields
+        )
         
-        if response.status_code == 201:
-            result = response.json()
-            song_id = result.get('song', {}).get('id', 'unknown')
-            status = result.get('song', {}).get('processing_status', 'unknown')
+        if success_flag:
+            song_id = song.get('id', 'unknown')
+            status = song.get('processing_status', 'unknown')
             if verbose:
                 print(f"✓ Uploaded: {filename} ({size_str}) -> ID: {song_id}, Status: {status}")
-            return True, song_id, str(response.status_code), None
+            return True, song_id, response_status, None
         else:
-            error_msg = f"HTTP {response.status_code}: {response.text}"
             print(f"✗ Failed to upload: {filename} ({size_str}) [{error_msg}]")
-            return False, None, str(response.status_code), error_msg
+            return False, None, response_status, error_msg
             
     except Exception as e:
-        error_msg = str(e)
+        error_msg = str(e) or type(e).__name__
         print(f"✗ Exception uploading {os.path.basename(filepath)}: {error_msg}")
-        return False, None, "EXCEPTION", error_msg
+        # The caller records the exception itself; its type decides whether to retry
+        raise
 
-async def upload_files_concurrent(filepaths, api_url, api_key, max_concurrent=5, dry_run=False, verbose=False):
-    """Upload multiple files concurrently with semaphore limiting."""
-    semaphore = asyncio.Semaphore(max_concurrent)
-    
-    async def upload_with_semaphore(filepath):
-        # Check for shutdown request before starting upload
-        if shutdown_requested:
-            return None, "shutdown_requested", None, None
-        
-        async with semaphore:
+def _upload_mime_type(normalized_path, verbose=False):
+    """MIME type to send for an audio file, preferring the standard audio mapping."""
+    mime_type, _ = mimetypes.guess_type(normalized_path)
+    suffix = Path(normalized_path).suffix.lower()
+    if suffix in AUDIO_MIME_TYPES:
+        mime_type = AUDIO_MIME_TYPES[suffix]
+        if verbose:
+            logger.debug(f"Overriding MIME type for {suffix}: {mime_type}")
+    return mime_type or "application/octet-stream"
+
+async def upload_batch_universal(engine, filepaths, dry_run=False, verbose=False, fields=None):
+    """
+    Upload several small files in one batch request through the shared engine.
+
+    fields, if given, holds one dict of form fields (or None) per file.
+
+    Returns:
+        One (success, song_id, response_status, error_msg) tuple per file, or None
+        if the archive does not support batch uploads
+    """
+    files = []
+    for filepath, file_fields in zip(filepaths, fields or [None] * len(filepaths)):
+        normalized_path = normalize_path(filepath)
+        filename = normalize_filename(os.path.basename(normalized_path))
+        files.append((normalized_path, filename, _upload_mime_type(normalized_path, verbose),
+                      file_fields or {}))
+
+    if dry_run:
+        for normalized_path, filename, _, _ in files:
+            print(f"[DRY RUN] Would upload: {filename} ({format_size(os.path.getsize(normalized_path))})")
+        return [(True, None, "201", None)] * len(files)
+
+    results = await engine.upload_batch(files)
+    if results is None:
+        return None
+
+    outcomes = []
+    for (normalized_path, filename, _, _), (success_flag, song, response_status, error_msg) in zip(files, results):
+        if success_flag:
+            song_id = song.get('id', 'unknown')
+            if verbose:
+                status = song.get('processing_status', 'unknown')
+                print(f"✓ Uploaded: {filename} (batch of {len(files)}) -> ID: {song_id}, Status: {status}")
+            outcomes.append((True, song_id, response_status, None))
+        else:
+            print(f"✗ Failed to upload: {filename} [{error_msg}]")
+            outcomes.append((False, None, response_status, error_msg))
+    return outcomes
+
+async def upload_file_resumable(engine, tracker, filepath, content_hash=None,
+                                chunk_size=DEFAULT_UPLOAD_CHUNK_SIZE, verbose=False, fields=None):
+    """
+    Upload a large file as a resumable chunked upload session.
+
+    Chunk progress is saved in the tracking database after every acknowledged
+    chunk, so an interrupted upload continues from the last acknowledged chunk on
+    the next run instead of resending the whole file. fields are sent with
+    the finalize request.
+
+    Returns:
+        Tuple of (success, song_id, response_status, error_msg), or None if the
+        archive does not support resumable uploads
+    """
+    normalized_path = normalize_path(filepath)
+    filename = normalize_filename(os.path.basename(normalized_path))
+    size = os.path.getsize(normalized_path)
+    size_str = format_size(size)
+    mime_type = _upload_mime_type(normalized_path, verbose)
+
+    session = None
+    saved = tracker.get_chunked_upload(normalized_path)
+    if saved:
+        session = await engine.get_upload_session(saved['session_id'])
+        if session is not None:
+            chunk_size = saved['chunk_size']
+            print(f"↻ Resuming upload: {filename} at {format_size(session['received_bytes'])} of {size_str}")
+
+    if session is None:
+        if content_hash is None:
+            loop = asyncio.get_running_loop()
+            content_hash = await loop.run_in_executor(None, file_checksum, normalized_path)
+        session = await engine.create_upload_session(filename, mime_type, size, content_hash)
+        if session is None:
+            return None
+        chunk_size = min(chunk_size, session.get('max_chunk_bytes') or chunk_size)
+        tracker.start_chunked_upload(normalized_path, session['id'], chunk_size)
+
+    offset = session['received_bytes']
+    while offset < size:
+        offset = await engine.upload_chunk(session['id'], normalized_path, offset,
+                                           min(chunk_size, size - offset))
+        tracker.record_chunk_progress(session['id'], offset)
+
+    success_flag, song, response_status, error_msg = await engine.finalize_upload_session(session['id'], fields)
+    if success_flag:
+        tracker.clear_chunked_upload(normalized_path)
+        song_id = song.get('id', 'unknown')
+        if verbose:
+            status = song.get('processing_status', 'unknown')
+            print(f"✓ Uploaded: {filename} ({size_str}, chunked) -> ID: {song_id}, Status: {status}")
+        return True, song_id, response_status, None
+
+    if response_status in ('409', '422'):
+        # The session can't become a song as it is (assembled file doesn't match its
+        # checksum, or it is stuck finalizing); resuming it would fail the same way,
+        # so the next attempt opens a fresh one (the archive expires the old one)
+        tracker.clear_chunked_upload(normalized_path)
+    print(f"✗ Failed to upload: {filename} ({size_str}) [{error_msg}]")
+    return False, None, response_status, error_msg
+
+async def upload_pipeline(filepaths, tracker, engine, max_concurrent=5, dry_run=False,
+                          verbose=False, queue_size=None, dedup=True, hash_workers=4,
+                          files_per_request=1, request_bytes=DEFAULT_REQUEST_BYTES,
+                          chunked_bytes=DEFAULT_CHUNKED_BYTES, chunk_size=DEFAULT_UPLOAD_CHUNK_SIZE,
+                          ffmpeg=None, convert_workers=2, convert_dir=DEFAULT_CONVERT_DIR,
+                          max_retries=None, telemetry=None, monitor=None, tag_workers=0,
+                          read_ahead=False):
+    """
+    Upload files through a continuous scan -> track -> convert -> dedup -> upload pipeline.
+
+    Scanning runs in a worker thread and tracking in the event loop; each stage
+    feeds the next through a bounded queue, so exactly max_concurrent uploads stay
+    in flight until the input runs out instead of waiting for the slowest file of
+    a batch.
+
+    With dedup enabled, tracked files are hashed in batches on a thread pool and
+    looked up on the archive in one request per batch; files whose content is
+    already there are recorded as duplicates and never uploaded.
+
+    With files_per_request > 1, each upload worker packs small files that are
+    already queued into one batch request (up to request_bytes in total) and
+    maps the per-file results back onto the tracker.
+
+    Files of at least chunked_bytes (0 disables) go through resumable chunked
+    upload sessions whose progress is kept in the tracking database.
+
+    With ffmpeg given, WAV/AIFF files are converted to FLAC on convert_workers
+    threads (each conversion runs in ffmpeg child processes) and the FLAC file
+    is uploaded instead when its decoded audio matches the original. Original
+    and converted sizes are recorded; converted files are deleted once the
+    archive has them and kept for the next run otherwise.
+
+    Failed uploads are classified (timeout, connection, throttled, server,
+    rejected, ...) and transient ones are retried later in the same run with
+    exponential backoff per RETRY_POLICIES (capped at max_retries). A retry
+    waits in its own task and runs outside the upload workers, so workers keep
+    taking new files meanwhile; only the final outcome is recorded.
+
+    Stage timings and outcomes are reported to telemetry (an UploadTelemetry,
+    normally shared with the engine), which shows live progress while the
+    pipeline runs.
+
+    With a monitor (ProcessingMonitor), every uploaded song is handed to it and
+    its processing status is polled in bulk by a separate task while uploads
+    continue; songs not settled when the pipeline ends stay in the monitor for
+    the caller to drain.
+
+    With tag_workers > 0, each file's tags are read right before its upload on
+    a pool of that many processes (tag parsing is CPU-bound Python, so threads
+    would serialize on the GIL) and sent as form fields with client_metadata,
+    so the archive skips its own extraction. Files whose tags can't be read
+    are uploaded without them and extracted by the archive as before.
+
+    filepaths may hold ManifestPaths (upload_manifest.py); a content hash
+    recorded for one is used instead of hashing the file again, and recorded
+    tags are sent like client-read ones.
+
+    With read_ahead, files pass through one more short queue (one slot per
+    upload worker) right before upload, and each file entering it is
+    prefetched (posix_fadvise WILLNEED), so the disk reads the next files
+    while the current ones are being sent.
+
+    Returns:
+        Tuple of (success_count, fail_count, duplicate_count)
+    """
+    loop = asyncio.get_running_loop()
+    files_per_request = min(files_per_request, MAX_BATCH_FILES)
+    # Keep enough files queued for every worker to fill a batch
+    queue_size = queue_size or max_concurrent * max(2, files_per_request)
+    batch_size = min(DEDUP_BATCH_SIZE, MAX_CHECKSUM_LOOKUP)
+    scanned = asyncio.Queue(maxsize=queue_size)
+    converting = ffmpeg is not None and not dry_run
+    # The dedup stage takes whole batches, so let a batch queue up behind it
+    converted = asyncio.Queue(maxsize=queue_size + batch_size if dedup else queue_size)
+    tracked = asyncio.Queue(maxsize=queue_size) if converting else converted
+    ready = asyncio.Queue(maxsize=queue_size) if dedup else converted
+    read_ahead = read_ahead and not dry_run
+    # Files next in line for the upload workers
+    upcoming = asyncio.Queue(maxsize=max_concurrent * files_per_request) if read_ahead else ready
+    # Uploads are native coroutines; only the scanner, hashing and conversion need threads
+    executor = ThreadPoolExecutor(max_workers=1)
+    hash_executor = ThreadPoolExecutor(max_workers=hash_workers) if dedup else None
+    convert_executor = ThreadPoolExecutor(max_workers=convert_workers) if converting else None
+    # Spawned rather than forked: the pipeline's threads may hold locks at fork time
+    tag_executor = ProcessPoolExecutor(
+        max_workers=tag_workers, mp_context=multiprocessing.get_context('spawn'),
+        initializer=tag_reader.init_worker
+    ) if tag_workers > 0 and not dry_run else None
+    counts = {'success': 0, 'fail': 0, 'duplicate': 0}
+    conversions = {'files': 0, 'original_bytes': 0, 'converted_bytes': 0}
+    retries_made = {}   # file_id -> retries scheduled so far
+    telemetry = telemetry or UploadTelemetry(display=False)
+    if hasattr(filepaths, '__len__'):
+        telemetry.total = len(filepaths)
+    retry_tasks = set()
+    manifest_tags = {}  # file_id -> tags recorded in a manifest, until the file's outcome is final
+    batching = {'enabled': files_per_request > 1}
+    resumable = {'enabled': chunked_bytes > 0 and not dry_run}
+
+    def hand_over(item):
+        """Queue a path (or the end marker) from the scanner thread; False once the loop is closed."""
+        put = scanned.put(item)
+        try:
+            asyncio.run_coroutine_threadsafe(put, loop).result()
+            return True
+        except RuntimeError:
+            # Ctrl+C closed the event loop while the scan (or a --watch) was still running
+            put.close()
+            return False
+
+    def scan_stage():
+        try:
+            paths = iter(filepaths)
+            while not shutdown_requested:
+                # Time spent waiting for the walk to produce the next file
+                with telemetry.timed('scan'):
+                    filepath = next(paths, None)
+                if filepath is None:
+                    telemetry.scan_finished()
+                    break
+                telemetry.file_found()
+                if not hand_over(filepath):
+                    break
+        finally:
+            hand_over(None)
+
+    async def track_stage():
+        # Always drain the scanner so it can never block on a full queue
+        while True:
+            filepath = await scanned.get()
+            if filepath is None:
+                break
+            if shutdown_requested:
+                continue
+
+            with telemetry.timed('track'):
+                file_id = tracker.record_file_start(filepath)
+            if file_id == -1:
+                logger.debug(f"Skipping already processed: {filepath}")
+                telemetry.file_done('skipped')
+                continue
+            if getattr(filepath, 'tags', None):
+                manifest_tags[file_id] = filepath.tags
+            content_hash = getattr(filepath, 'content_hash', None)
+            await tracked.put((filepath, file_id, datetime.datetime.now(), content_hash, None))
+
+        for _ in range(1 if dedup or converting else max_concurrent):
+            await tracked.put(None)
+
+    async def convert_file(item):
+        filepath = item[0]
+        try:
+            conversion = await loop.run_in_executor(
+                convert_executor, convert_to_flac, ffmpeg, normalize_path(filepath), convert_dir
+            )
+        except ConversionError as e:
+            logger.info(f"Uploading {os.path.basename(filepath)} unconverted: {e}")
+        except Exception as e:
+            logger.warning(f"Could not convert {filepath} to FLAC: {e}")
+        else:
+            flac_path, original_size, converted_size = conversion
+            conversions['files'] += 1
+            conversions['original_bytes'] += original_size
+            conversions['converted_bytes'] += converted_size
+            if verbose:
+                print(f"♪ Converted to FLAC: {os.path.basename(filepath)} "
+                      f"({format_size(original_size)} -> {format_size(converted_size)})")
+            # A recorded hash was of the original, not of the FLAC file
+            item = (flac_path,) + item[1:3] + (None, conversion)
+        await converted.put(item)
+
+    async def convert_stage():
+        running = set()
+        while True:
+            item = await tracked.get()
+            if item is None:
+                break
+            if shutdown_requested:
+                continue
+            if not needs_conversion(item[0]):
+                await converted.put(item)
+                continue
+            running.add(asyncio.ensure_future(convert_file(item)))
+            if len(running) >= convert_workers:
+                _, running = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+        if running:
+            await asyncio.wait(running)
+
+        for _ in range(1 if dedup else max_concurrent):
+            await converted.put(None)
+
+    async def content_hash_of(item):
+        if item[3] is not None:
+            return item[3]
+        return await loop.run_in_executor(hash_executor, hash_file, item[0])
+
+    def hash_file(filepath):
+        try:
+            with telemetry.timed('hash'):
+                return file_checksum(normalize_path(filepath))
+        except OSError as e:
+            # Let the upload stage report unreadable files
+            logger.debug(f"Could not hash {filepath}: {e}")
+            return None
+
+    async def next_batch():
+        """Collect up to batch_size tracked items; returns (batch, finished)."""
+        item = await converted.get()
+        if item is None:
+            return [], True
+        batch = [item]
+        deadline = loop.time() + DEDUP_BATCH_WAIT
+        while len(batch) < batch_size and loop.time() < deadline:
             try:
-                # Use the synchronous upload function in a thread pool
-                loop = asyncio.get_event_loop()
-                result = await loop.run_in_executor(
-                    None, 
-                    upload_file_universal, 
-                    filepath, 
-                    api_url, 
-                    api_key, 
-                    dry_run, 
-                    verbose
+                item = converted.get_nowait()
+            except asyncio.QueueEmpty:
+                await asyncio.sleep(0.01)
+                continue
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    async def lookup_existing(checksums):
+        """
+        Existing songs for checksums, retrying transient failures like uploads;
+        None if the archive has no duplicate checks, {} if this lookup failed.
+        """
+        retry = 0
+        while True:
+            try:
+                return await engine.lookup_checksums(checksums)
+            except (ArchiveRequestError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+                failure_class = classify_failure(error=e)
+                policy = RETRY_POLICIES.get(failure_class)
+                limit = 0 if policy is None else (
+                    policy.max_retries if max_retries is None else min(policy.max_retries, max_retries))
+                retry += 1
+                if retry > limit or shutdown_requested:
+                    logger.warning(f"Duplicate check failed ({failure_class}: {e}); "
+                                   f"uploading {len(checksums)} files without it")
+                    return {}
+                await asyncio.sleep(policy.delay(retry))
+
+    async def dedup_stage():
+        lookup_supported = True
+        finished = False
+        while not finished:
+            batch, finished = await next_batch()
+            if shutdown_requested or not batch:
+                continue
+
+            if lookup_supported:
+                hashes = await asyncio.gather(*(content_hash_of(item) for item in batch))
+                existing = await lookup_existing([h for h in set(hashes) if h])
+                if existing is None:
+                    logger.info("Archive does not support duplicate checks; uploading all files")
+                    lookup_supported = False
+                    existing = {}
+            else:
+                hashes = [item[3] for item in batch]
+                existing = {}
+
+            for (filepath, file_id, start_time, _, conversion), content_hash in zip(batch, hashes):
+                song_id = existing.get(content_hash) if content_hash else None
+                if song_id is None:
+                    await ready.put((filepath, file_id, start_time, content_hash, conversion))
+                    continue
+                manifest_tags.pop(file_id, None)
+                tracker.record_file_duplicate(
+                    file_id,
+                    str(song_id),
+                    content_hash,
+                    processing_time=(datetime.datetime.now() - start_time).total_seconds(),
+                    upload_method="direct_fs"
                 )
-                return filepath, *result
+                counts['duplicate'] += 1
+                telemetry.file_done('duplicate')
+                if conversion:
+                    discard_converted(filepath)
+                if verbose:
+                    print(f"= Already in archive: {os.path.basename(filepath)} -> ID: {song_id}")
+
+        for _ in range(max_concurrent):
+            await ready.put(None)
+
+    async def read_ahead_stage():
+        while True:
+            item = await ready.get()
+            if item is None:
+                break
+            await upcoming.put(item)
+            # Only now is the file a few uploads away from being read
+            if not shutdown_requested:
+                loop.run_in_executor(None, prefetch, normalize_path(item[0]))
+
+        for _ in range(max_concurrent):
+            await upcoming.put(None)
+
+    def record_result(item, result):
+        filepath, file_id, start_time, content_hash, conversion = item
+        success_flag, song_id, response_status, error_msg = result
+        processing_time = (datetime.datetime.now() - start_time).total_seconds()
+
+        if success_flag:
+            manifest_tags.pop(file_id, None)
+            tracker.record_file_success(
+                file_id,
+                file_size=conversion[1] if conversion else None,
+                format_type="flac" if conversion else None,
+                processing_time=processing_time,
+                song_id=song_id,
+                response_status=response_status,
+                upload_method="direct_fs",
+                content_hash=content_hash,
+                converted_size=conversion[2] if conversion else None
+            )
+            counts['success'] += 1
+            telemetry.file_done('success')
+            if monitor is not None:
+                monitor.add(song_id)
+            if conversion and not dry_run:
+                discard_converted(filepath)
+        else:
+            record_failure(item, (
+                error_msg or "Upload failed",
+                "UPLOAD_ERROR",
+                f"Response status: {response_status}",
+                response_status,
+                classify_failure(response_status)
+            ))
+
+    def record_exception(item, e):
+        record_failure(item, (
+            str(e),
+            type(e).__name__,
+            traceback.format_exc(),
+            None,
+            classify_failure(error=e)
+        ))
+
+    def record_failure(item, failure):
+        """Schedule a retry for a transient failure; record the rest as failed."""
+        if not schedule_retry(item, failure):
+            save_failure(item, failure)
+
+    def save_failure(item, failure):
+        error_msg, error_type, error_details, response_status, failure_class = failure
+        manifest_tags.pop(item[1], None)
+        tracker.record_file_failure(
+            item[1],
+            error_msg,
+            error_type,
+            error_details,
+            upload_method="direct_fs",
+            response_status=response_status,
+            failure_class=failure_class
+        )
+        counts['fail'] += 1
+        telemetry.file_done('failed')
+
+    def schedule_retry(item, failure):
+        failure_class = failure[4]
+        policy = RETRY_POLICIES.get(failure_class)
+        if policy is None or shutdown_requested:
+            return False
+        limit = policy.max_retries if max_retries is None else min(policy.max_retries, max_retries)
+        retry = retries_made.get(item[1], 0) + 1
+        if retry > limit:
+            return False
+
+        retries_made[item[1]] = retry
+        delay = policy.delay(retry)
+        print(f"↻ Retrying {os.path.basename(item[0])} in {delay:.0f}s "
+              f"({failure_class}, retry {retry}/{limit})")
+        task = asyncio.ensure_future(retry_later(item, failure, delay))
+        retry_tasks.add(task)
+        task.add_done_callback(retry_tasks.discard)
+        return True
+
+    async def retry_later(item, failure, delay):
+        deadline = loop.time() + delay
+        while not shutdown_requested and loop.time() < deadline:
+            await asyncio.sleep(min(1.0, deadline - loop.time()))
+        if shutdown_requested:
+            # Leave it for the next run (or --retry-failed)
+            save_failure(item, failure)
+            return
+        await upload_one(item)
+
+    async def read_tags(item):
+        """The file's tags as form fields, or None to leave extraction to the archive."""
+        if item[1] in manifest_tags:
+            return manifest_tags[item[1]]
+        filepath = item[0]
+        if tag_executor is None:
+            return None
+        try:
+            with telemetry.timed('tags'):
+                return await loop.run_in_executor(tag_executor, tag_reader.read_tags,
+                                                  normalize_path(filepath))
+        except Exception as e:
+            # Includes a broken pool (a worker died); the archive extracts instead
+            logger.debug(f"Could not read tags of {filepath}: {e}")
+            return None
+
+    def file_size(item):
+        try:
+            return os.path.getsize(normalize_path(item[0]))
+        except OSError:
+            # Unreadable files go alone so their error is reported per file
+            return request_bytes + 1
+
+    async def upload_one(item):
+        try:
+            fields = await read_tags(item)
+            if resumable['enabled'] and file_size(item) >= chunked_bytes:
+                result = await upload_file_resumable(engine, tracker, item[0], item[3],
+                                                     chunk_size, verbose, fields)
+                if result is not None:
+                    record_result(item, result)
+                    return
+                if resumable['enabled']:
+                    logger.info("Archive does not support resumable uploads; sending large files whole")
+                    resumable['enabled'] = False
+            record_result(item, await upload_file_universal(engine, item[0], dry_run, verbose, fields))
+        except Exception as e:
+            record_exception(item, e)
+
+    async def upload_stage():
+        carry = None
+        finished = False
+        while True:
+            if carry is not None:
+                item, carry = carry, None
+            elif finished:
+                return
+            else:
+                item = await upcoming.get()
+            if item is None:
+                return
+            if shutdown_requested:
+                continue
+
+            # Pack further small files that are already waiting into the same request
+            batch = [item]
+            if batching['enabled'] and files_per_request > 1:
+                total = file_size(item)
+                while total <= request_bytes and len(batch) < files_per_request:
+                    try:
+                        candidate = upcoming.get_nowait()
+                    except asyncio.QueueEmpty:
+                        break
+                    if candidate is None:
+                        finished = True
+                        break
+                    size = file_size(candidate)
+                    if total + size > request_bytes:
+                        carry = candidate
+                        break
+                    batch.append(candidate)
+                    total += size
+
+            if len(batch) == 1:
+                await upload_one(item)
+                continue
+
+            try:
+                fields = await asyncio.gather(*(read_tags(b) for b in batch))
+                results = await upload_batch_universal(engine, [b[0] for b in batch], dry_run,
+                                                       verbose, fields)
             except Exception as e:
-                return filepath, False, "EXCEPTION", str(e)
-    
-    # Create tasks for all files
-    tasks = [upload_with_semaphore(filepath) for filepath in filepaths]
-    
-    # Execute all tasks concurrently
-    results = await asyncio.gather(*tasks, return_exceptions=True)
-    
-    return results
+                for batch_item in batch:
+                    record_exception(batch_item, e)
+                continue
+
+            if results is None:
+                if batching['enabled']:
+                    logger.info("Archive does not support batch uploads; uploading files one per request")
+                    batching['enabled'] = False
+                for batch_item in batch:
+                    await upload_one(batch_item)
+                continue
+
+            for batch_item, result in zip(batch, results):
+                record_result(batch_item, result)
+
+    stages = [loop.run_in_executor(executor, scan_stage), track_stage()]
+    if converting:
+        stages.append(convert_stage())
+    if dedup:
+        stages.append(dedup_stage())
+    if read_ahead:
+        stages.append(read_ahead_stage())
+    stages.extend(upload_stage() for _ in range(max_concurrent))
+
+    reporter = asyncio.ensure_future(telemetry.run(lambda: engine.concurrency.in_flight))
+    poller = asyncio.ensure_future(monitor.run()) if monitor is not None else None
+    try:
+        await asyncio.gather(*stages)
+        # Retries can schedule further retries; wait until none are left
+        while retry_tasks:
+            await asyncio.gather(*retry_tasks)
+    finally:
+        reporter.cancel()
+        await asyncio.gather(reporter, return_exceptions=True)
+        if poller is not None:
+            poller.cancel()
+            await asyncio.gather(poller, return_exceptions=True)
+        telemetry.finish()
+        executor.shutdown(wait=False)
+        if hash_executor is not None:
+            hash_executor.shutdown(wait=False)
+        if convert_executor is not None:
+            convert_executor.shutdown(wait=False)
+        if tag_executor is not None:
+            tag_executor.shutdown(wait=False, cancel_futures=True)
+
+    if retries_made:
+        logger.info(f"Retried {len(retries_made)} files ({sum(retries_made.values())} retries)")
+
+    if conversions['files']:
+        saved = conversions['original_bytes'] - conversions['converted_bytes']
+        logger.info(f"FLAC conversion: {conversions['files']} files, "
+                    f"{format_size(conversions['original_bytes'])} -> "
+                    f"{format_size(conversions['converted_bytes'])} ({format_size(saved)} saved)")
+
+    return counts['success'], counts['fail'], counts['duplicate']
 
 def main():
     parser = argparse.ArgumentParser(description="Universal upload audio files to Music Archive API with comprehensive tracking.")
@@ -540,6 +1427,14 @@ def main():
                        help='Clear the tracking database and start fresh (same as --start-over)')
     parser.add_argument('--resume', action='store_true',
                        help='Resume from last successful import')
+    parser.add_argument('--retry-failed', action='store_true',
+                       help='Upload files whose last attempt failed with a retryable error, taken from the tracking database instead of a filesystem scan')
+    parser.add_argument('--check-processing', action='store_true',
+                       help='Poll the archive for the processing outcome of uploaded songs still pending in the tracking database, then exit')
+    parser.add_argument('--emit-manifest', metavar='PATH',
+                       help='Scan the directory, write a manifest (JSON lines: path, size, mtime, inode, optional hash and tags) to PATH and exit without uploading')
+    parser.add_argument('--from-manifest', metavar='PATH',
+                       help='Upload the files listed in a manifest (relative to the directory given) instead of scanning the directory')
     parser.add_argument('--show-errors', action='store_true',
                        help='Show error summary and exit')
     parser.add_argument('--show-errors-verbose', action='store_true',
@@ -557,6 +1452,8 @@ def main():
     parser.add_argument("directory", help="Directory to scan for audio files")
     parser.add_argument('--tracking-db', default='import_tracking.db',
                        help='SQLite database for tracking progress')
+    parser.add_argument('--write-behind', action='store_true',
+                       help='Queue tracking writes for a background thread committing them in groups on a WAL journal, instead of one commit per file')
     
     # Authentication
     parser.add_argument("--url", default=DEFAULT_API_URL, help=f"Base URL of the archive (default: {DEFAULT_API_URL})")
@@ -566,13 +1463,75 @@ def main():
     # Other options
     parser.add_argument("-d", "--dry-run", action="store_true", help="Show what would be uploaded without actually uploading")
     parser.add_argument("-v", "--verbose", action="store_true", help="Verbose output")
-    parser.add_argument("--concurrent", type=int, default=5, help="Number of concurrent uploads (default: 5)")
+    parser.add_argument("--concurrent", type=int, default=5, help="Number of concurrent uploads (default: 5; starting point with --adaptive)")
+    parser.add_argument("--adaptive", action="store_true",
+                       help="Grow concurrent uploads while throughput rises and latency stays flat; back off on 429/503/504 and timeouts")
+    parser.add_argument("--max-concurrent", type=int, default=32,
+                       help="Upper bound on concurrent uploads with --adaptive (default: 32)")
+    parser.add_argument("--http2", action="store_true",
+                       help="Send all uploads, lookups and status polls as HTTP/2 streams over one connection instead of one HTTP/1.1 connection per upload (needs httpx[http2])")
     parser.add_argument("--limit", type=int, help="Limit upload to first N files (useful for testing)")
+    parser.add_argument("--full-rescan", action="store_true",
+                       help="List every directory instead of skipping ones unchanged since their files were all processed")
+    parser.add_argument("--shard", type=parse_shard, metavar="I/N",
+                        help="Only upload shard I of N (split by path hash), so N processes or hosts can share one import")
+    parser.add_argument("--shard-by", choices=['file', 'directory'], default='file',
+                        help="Split shards by file path, or keep each directory's files together (default: file)")
+    parser.add_argument("--watch", action="store_true",
+                        help="After the initial scan, keep running and upload new or changed files as they appear (Linux)")
+    parser.add_argument("--watch-debounce", type=float, default=DEFAULT_WATCH_DEBOUNCE, metavar="SECS",
+                        help=f"Seconds a watched file must stay unchanged before upload (default: {DEFAULT_WATCH_DEBOUNCE:g})")
+    parser.add_argument("--scan-workers", type=int, default=DEFAULT_SCAN_WORKERS,
+                       help=f"Threads listing directories in parallel while scanning (default: {DEFAULT_SCAN_WORKERS})")
+    parser.add_argument("--no-dedup", action="store_true",
+                       help="Upload every file without first checking the archive for identical content")
+    parser.add_argument("--hash-workers", type=int, default=min(4, os.cpu_count() or 1),
+                       help="Threads used to hash files for the duplicate check (default: min(4, CPUs))")
+    parser.add_argument("--files-per-request", type=int, default=DEFAULT_FILES_PER_REQUEST,
+                       help=f"Pack up to N small files into one upload request; 1 disables batching (default: {DEFAULT_FILES_PER_REQUEST}, max: {MAX_BATCH_FILES})")
+    parser.add_argument("--request-mb", type=float, default=DEFAULT_REQUEST_BYTES / (1024 * 1024),
+                       help="Byte budget of one batch request in MB; larger files are sent alone (default: 32)")
+    parser.add_argument("--chunked-mb", type=float, default=DEFAULT_CHUNKED_BYTES / (1024 * 1024),
+                       help="Upload files of at least this many MB in resumable chunks; 0 disables (default: 64)")
+    parser.add_argument("--chunk-mb", type=float, default=DEFAULT_UPLOAD_CHUNK_SIZE / (1024 * 1024),
+                       help="Chunk size of resumable uploads in MB (default: 8)")
+    parser.add_argument("--max-retries", type=int,
+                       help="Cap on in-run retries of a failed upload; 0 disables (default: per failure class)")
+    parser.add_argument("--no-progress", action="store_true",
+                       help="Don't show the live progress bar (it is only shown on a terminal anyway)")
+    parser.add_argument("--processing-wait", type=float, default=DEFAULT_PROCESSING_WAIT, metavar="SECS",
+                        help=f"Seconds to keep polling for server processing outcomes after the last upload (default: {DEFAULT_PROCESSING_WAIT:g})")
+    parser.add_argument("--no-processing-check", action="store_true",
+                        help="Don't follow up on the archive's processing of uploaded songs")
+    parser.add_argument("--stats-json", metavar="PATH",
+                       help="Append periodic JSON lines with rates, ETA and stage timings to PATH ('-' for stdout)")
+    parser.add_argument("--stats-interval", type=float, default=10.0,
+                       help="Seconds between --stats-json lines (default: 10)")
+    parser.add_argument("--convert-flac", action="store_true",
+                       help="Convert WAV/AIFF files to FLAC before uploading; the decoded audio is verified to match")
+    parser.add_argument("--convert-workers", type=int, default=max(1, (os.cpu_count() or 2) // 2),
+                       help="Files converted to FLAC at the same time (default: half the CPUs)")
+    parser.add_argument("--convert-dir", default=DEFAULT_CONVERT_DIR,
+                       help=f"Where converted files are kept until the archive has them (default: {DEFAULT_CONVERT_DIR})")
+    parser.add_argument("--ffmpeg",
+                       help="ffmpeg executable or the directory holding ffmpeg and ffprobe (default: from PATH)")
+    parser.add_argument("--read-order", choices=READ_ORDERS, default='scan',
+                       help="Order files by (device, inode) or by directory and prefetch the next files while uploading, so spinning disks read nearly sequentially (default: scan order)")
+    parser.add_argument("--read-order-window", type=int, default=DEFAULT_ORDER_WINDOW, metavar="N",
+                       help=f"Files sorted together while streaming with --read-order (default: {DEFAULT_ORDER_WINDOW}; 0 waits for the whole scan)")
+    parser.add_argument("--manifest-hashes", action="store_true",
+                       help="With --emit-manifest, record each file's content hash (on --hash-workers threads) so uploads skip hashing")
+    parser.add_argument("--manifest-tags", action="store_true",
+                       help="With --emit-manifest, record each file's tags (on --tag-workers processes; needs mutagen); they are sent like --client-tags")
+    parser.add_argument("--client-tags", action="store_true",
+                       help="Read MP3/M4A/FLAC/Ogg tags on this machine and send them with each upload, so the archive skips its own extraction")
+    parser.add_argument("--tag-workers", type=int, default=os.cpu_count() or 1,
+                       help="Processes reading tags with --client-tags (default: CPU count)")
     
     args = parser.parse_args()
 
     # Initialize tracker
-    tracker = BulkImportTracker(args.tracking_db)
+    tracker = BulkImportTracker(args.tracking_db, write_behind=args.write_behind)
     
     # Handle reporting modes
     if args.show_errors:
@@ -585,8 +1544,8 @@ def main():
 
     # Handle clear-db mode (no authentication needed)
     if args.clear_db:
-        if os.path.exists(args.tracking_db):
-            os.remove(args.tracking_db)
+        tracker.close()
+        if remove_database(args.tracking_db):
             print("🗑️  Cleared tracking database")
         else:
             print("📝 No tracking database found to clear")
@@ -599,11 +1558,55 @@ def main():
         print(f"Error: Directory does not exist: {args.directory}")
         sys.exit(1)
 
+    if args.watch:
+        if args.batch_size or args.resume or args.continue_from or args.retry_failed:
+            print("Error: --watch can't be combined with --batch-size, --resume, --continue-from or --retry-failed")
+            sys.exit(1)
+        if not sys.platform.startswith('linux'):
+            print("Error: --watch needs Linux (inotify)")
+            sys.exit(1)
+        if args.read_order != 'scan':
+            print("Error: --read-order can't be combined with --watch (files are uploaded as they settle)")
+            sys.exit(1)
+
+    if args.convert_flac:
+        args.ffmpeg = find_ffmpeg(args.ffmpeg)
+        if not args.ffmpeg:
+            print("Error: --convert-flac needs ffmpeg and ffprobe (install them or pass --ffmpeg)")
+            sys.exit(1)
+
+    if (args.client_tags or args.manifest_tags) and not tag_reader.tags_available():
+        print("Error: --client-tags and --manifest-tags need mutagen (pip install mutagen)")
+        sys.exit(1)
+
+    if args.emit_manifest:
+        if args.from_manifest:
+            print("Error: --emit-manifest and --from-manifest can't be combined")
+            sys.exit(1)
+        emit_manifest(args)
+        return
+
+    if args.from_manifest:
+        if args.watch or args.retry_failed:
+            print("Error: --from-manifest can't be combined with --watch or --retry-failed")
+            sys.exit(1)
+        try:
+            header = read_manifest_header(args.from_manifest)
+        except (OSError, ValueError) as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        print(f"📜 Manifest {args.from_manifest}: scanned {header['created']} on {header['host']} "
+              f"from {header['root']}")
+
     # Validate URL
     if not args.url.startswith(('http://', 'https://')):
         print(f"Error: Invalid URL format: {args.url}")
         sys.exit(1)
 
+    if args.http2 and not http2_available():
+        print("Error: --http2 needs httpx with HTTP/2 support (pip install 'httpx[http2]')")
+        sys.exit(1)
+
     # Get authentication credentials
     username = args.username
     password = args.password
@@ -623,54 +1626,170 @@ def main():
         print("Error: Username and password are required")
         sys.exit(1)
 
+    asyncio.run(run_upload(args, tracker, username, password))
+
+def emit_manifest(args):
+    """Scan the directory once and write its audio files to a manifest (no upload)."""
+    files = find_audio_files(args.directory, args.limit, args.scan_workers)
+    if args.shard:
+        files = in_shard(files, args.directory, args.shard, args.shard_by == 'directory')
+        print(f"🧩 Shard {args.shard[0]}/{args.shard[1]} (split by {args.shard_by})")
+    if args.max_count:
+        files = itertools.islice(files, args.max_count)
+
+    print(f"📜 Writing manifest of {args.directory} to {args.emit_manifest}...")
+    started = time.monotonic()
+    count, total, complete = write_manifest(
+        args.emit_manifest, args.directory, files,
+        hash_workers=args.hash_workers if args.manifest_hashes else 0,
+        tag_workers=max(1, args.tag_workers) if args.manifest_tags else 0,
+        should_stop=lambda: shutdown_requested
+    )
+    if not complete:
+        print(f"⏹️  Manifest stopped after {count} files; {args.emit_manifest} was not written")
+        sys.exit(1)
+    print(f"✅ {count} files ({format_size(total)}) recorded in {time.monotonic() - started:.1f}s")
+
+async def run_upload(args, tracker, username, password):
+    """Run authentication and the upload pipeline in one event loop sharing one HTTP session."""
+    max_connections = max(args.max_concurrent, args.concurrent) if args.adaptive else args.concurrent
+    telemetry = UploadTelemetry(display=False if args.no_progress else None,
+                                json_path=args.stats_json, json_interval=args.stats_interval)
+    async with UploadEngine(args.url, max_connections=max_connections, adaptive=args.adaptive,
+                            initial_concurrency=args.concurrent, telemetry=telemetry,
+                            http2=args.http2) as engine:
+        await _run_upload(args, tracker, engine, username, password)
+
+async def check_processing(tracker, monitor, wait):
+    """Poll the processing outcome of uploaded songs the tracking database has no final status for."""
+    monitor.add_all(tracker.get_unsettled_songs())
+    if not monitor.pending:
+        print("No uploaded songs are waiting for a processing outcome.")
+        return
+    print(f"⏳ Checking processing of {len(monitor.pending)} uploaded songs (waiting up to {wait:.0f}s)...")
+    await monitor.drain(wait, lambda: shutdown_requested)
+    if monitor.supported:
+        print(f"🛠️  Server processing: {monitor.summary()}")
+    tracker.close()
+
+async def _run_upload(args, tracker, engine, username, password):
+    """Authenticate, select files and upload them over the engine's shared connection pool."""
     # Authenticate and get API token
     print(f"Authenticating with API at {args.url}...")
-    api_key = authenticate(args.url, username, password)
+    api_key = await engine.authenticate(username, password)
     if not api_key:
         print("Authentication failed. Please check your credentials.")
         sys.exit(1)
     
     print("✓ Authentication successful!")
 
+    # Handle start-over before scanning, so nothing is skipped as already processed
+    if args.start_over or args.clear_db:
+        # Clear tracking data and start fresh
+        tracker.close()
+        if remove_database(args.tracking_db):
+            print("🗑️  Cleared existing tracking data")
+        tracker = BulkImportTracker(args.tracking_db, write_behind=args.write_behind)
+
+    monitor = None if args.no_processing_check or args.dry_run else ProcessingMonitor(engine, tracker)
+    if args.check_processing:
+        await check_processing(tracker, monitor or ProcessingMonitor(engine, tracker), args.processing_wait)
+        return
+
+    # Plain runs stream the directory walk straight into the upload pipeline, so
+    # uploads start as soon as the first files are found. Resume and offset modes
+    # need the whole list first; offsets also need a repeatable (single-walker) order.
+    streaming = not (args.batch_size or args.resume or args.continue_from or args.retry_failed)
+    scan_workers = 1 if args.continue_from else args.scan_workers
+    scanned = {'count': 0}
+
+    # Incremental rescans skip directories unchanged since everything in them was processed
+    def owned(path):
+        return shard_of(path, args.directory, args.shard[1], args.shard_by == 'directory') == args.shard[0]
+
+    incremental = None
+    if not (args.full_rescan or args.retry_failed or args.from_manifest):
+        incremental = IncrementalScan(tracker, owned if args.shard else None)
+
+    # Files come from the directory walk, or from a manifest without touching directories
+    def discover(limit=None, workers=scan_workers):
+        if args.from_manifest:
+            files = read_manifest(args.from_manifest, args.directory)
+            return itertools.islice(files, limit) if limit else files
+        return find_audio_files(args.directory, limit, workers, incremental)
+
+    # With --shard, every source of files is filtered down to this process's share
+    def sharded(paths):
+        if not args.shard:
+            return paths
+        return in_shard(paths, args.directory, args.shard, args.shard_by == 'directory')
+
+    if args.shard:
+        print(f"🧩 Shard {args.shard[0]}/{args.shard[1]} (split by {args.shard_by})")
+
     # Find audio files - FAST MODE: scan only what we need
-    if args.batch_size:
-        # For batch processing, scan all files and filter for unprocessed ones
+    if args.retry_failed:
+        # Failed files come straight from the tracking database; nothing is scanned
+        audio_files = list(sharded(retryable_failures(tracker, args.directory)))
+        print(f"🔁 {len(audio_files)} failed files under {args.directory} can be retried")
+    elif args.batch_size:
+        # Walk once, stopping as soon as the batch is full
         print(f"🔍 Scanning for {args.batch_size} unprocessed files...")
-        processed_files = set(tracker.get_processed_files('all'))
-        
-        # Get all files and filter for unprocessed ones
-        all_files = list(find_audio_files(args.directory))
-        unprocessed_files = [f for f in all_files if f not in processed_files]
+        audio_files = []
+        files_checked = 0
         
-        # Take the next batch_size files
-        audio_files = unprocessed_files[:args.batch_size]
+        scan = discover()
+        for filepath in sharded(scan):
+            files_checked += 1
+            
+            # Check if file is already processed using inode tracking
+            if tracker.is_file_processed(filepath):
+                continue  # Skip already processed files
+            
+            audio_files.append(filepath)
+            
+            # Stop when we have enough files
+            if len(audio_files) >= args.batch_size:
+                break
+        scan.close()
         
-        print(f"📊 Found {len(processed_files)} already processed files")
-        print(f"📊 Found {len(unprocessed_files)} unprocessed files")
+        print(f"📊 Checked {files_checked} files")
         print(f"📦 Processing next batch of {len(audio_files)} files")
         
         if len(audio_files) == 0:
+            if incremental:
+                incremental.save(tracker)
             print("No more unprocessed files found.")
             sys.exit(0)
+    elif streaming:
+        # Count files as the pipeline pulls them, for the summary
+        def counted(paths):
+            for path in paths:
+                scanned['count'] += 1
+                yield path
+        
+        if args.watch:
+            audio_files = counted(sharded(watch_audio_files(args.directory, max(0.0, args.watch_debounce),
+                                                            scan_workers, incremental)))
+        else:
+            audio_files = counted(sharded(discover(args.limit)))
+        if args.max_count:
+            audio_files = itertools.islice(audio_files, args.max_count)
+            print(f"📊 Limited to {args.max_count} files")
+        print(f"🔍 Streaming audio files from {args.directory} into the upload pipeline")
     else:
         # For regular processing, use the limit if specified
-        audio_files = list(find_audio_files(args.directory, args.limit))
+        audio_files = list(sharded(discover(args.limit)))
     
-    total = len(audio_files)
-    if total == 0:
-        print("No audio files found.")
-        sys.exit(0)
+    if not streaming:
+        total = len(audio_files)
+        if total == 0:
+            print("No failed files to retry." if args.retry_failed else "No audio files found.")
+            sys.exit(0)
 
-    print(f"Found {total} audio files in {args.directory}")
+        print(f"Found {total} audio files in {args.directory}")
     
     # Handle resume logic
-    if args.start_over or args.clear_db:
-        # Clear tracking data and start fresh
-        if os.path.exists(args.tracking_db):
-            os.remove(args.tracking_db)
-            print("🗑️  Cleared existing tracking data")
-        tracker = BulkImportTracker(args.tracking_db)
-    
     if args.resume:
         # Resume from last job using the shared module
         audio_files = resume_from_last_job(tracker, audio_files)
@@ -680,43 +1799,19 @@ def main():
         audio_files = audio_files[args.continue_from:]
         print(f"📂 Continuing from offset {args.continue_from}: {len(audio_files)} files")
     
-    if args.max_count:
+    if args.max_count and not streaming:
         audio_files = audio_files[:args.max_count]
         print(f"📊 Limited to {args.max_count} files: {len(audio_files)} files")
     
-    # Handle batch processing
-    if args.batch_size:
-        print(f"🎯 Processing up to {args.batch_size} new files...")
-        
-        # Collect files to process
-        files_to_process = []
-        files_checked = 0
-        
-        for filepath in find_audio_files(args.directory, limit=None):
-            files_checked += 1
-            
-            # Check if file is already processed using inode tracking
-            if tracker.is_file_processed(filepath):
-                continue  # Skip already processed files
-            
-            # File is not processed, add it to our list
-            files_to_process.append(filepath)
-            
-            # Stop when we have enough files
-            if len(files_to_process) >= args.batch_size:
-                break
-        
-        print(f"📊 Checked {files_checked} files")
-        print(f"📊 Found {len(files_to_process)} new files to process")
-        
-        audio_files = files_to_process
-    
-    if len(audio_files) == 0:
+    if not streaming and len(audio_files) == 0:
         print("No files to process.")
         sys.exit(0)
     
-    # Don't start a new job - use global tracking instead
-    # start_job_with_defaults(tracker, len(audio_files))
+    # Files are still skipped by global (inode) tracking; the job row holds this
+    # run's counts and telemetry totals
+    start_job_with_defaults(tracker, 0 if streaming else len(audio_files),
+                            command_line=redacted_command_line(),
+                            notes=f"shard {args.shard[0]}/{args.shard[1]} by {args.shard_by}" if args.shard else None)
     
     if args.dry_run:
         print("DRY RUN MODE - No files will be uploaded")
@@ -724,101 +1819,65 @@ def main():
     print(f"\n💡 Press 'q' at any time to stop gracefully after current upload completes.")
     print(f"💡 Press Ctrl+C to stop immediately.\n")
     
-    # Upload files
-    success = 0
-    fail = 0
+    if args.read_order != 'scan':
+        audio_files = locality_ordered(audio_files, args.read_order, max(0, args.read_order_window))
+        print(f"💽 Reading files in {args.read_order} order with read-ahead")
+
+    # Upload files through a single continuous pipeline
+    success, fail, duplicates = await upload_pipeline(
+        audio_files,
+        tracker,
+        engine,
+        engine.concurrency.maximum,
+        args.dry_run,
+        args.verbose,
+        dedup=not args.no_dedup,
+        hash_workers=args.hash_workers,
+        files_per_request=max(1, args.files_per_request),
+        request_bytes=int(args.request_mb * 1024 * 1024),
+        chunked_bytes=int(args.chunked_mb * 1024 * 1024),
+        chunk_size=max(1, int(args.chunk_mb * 1024 * 1024)),
+        ffmpeg=args.ffmpeg if args.convert_flac else None,
+        convert_workers=max(1, args.convert_workers),
+        convert_dir=args.convert_dir,
+        max_retries=args.max_retries,
+        telemetry=engine.telemetry,
+        monitor=monitor,
+        tag_workers=max(1, args.tag_workers) if args.client_tags else 0,
+        read_ahead=args.read_order != 'scan'
+    )
     
-    # Process files in batches for concurrent upload
-    batch_size = args.concurrent
-    for i in range(0, len(audio_files), batch_size):
-        batch = audio_files[i:i + batch_size]
-        
-        # Check for shutdown request
-        if shutdown_requested:
-            print(f"\n🛑 Graceful shutdown requested. Stopping after current batch...")
-            break
-        
-        print(f"Processing batch {i//batch_size + 1}/{(len(audio_files) + batch_size - 1)//batch_size} ({len(batch)} files)")
-        
-        # Record file starts for this batch
-        file_ids = {}
-        start_times = {}
-        files_to_process = []
-        for filepath in batch:
-            # Create tracking record for this file
-            file_id = tracker.record_file_start(filepath)
-            file_ids[filepath] = file_id
-            start_times[filepath] = datetime.datetime.now()
-            files_to_process.append(filepath)
-        
-        if not files_to_process:
-            print("All files in this batch were already processed, skipping batch")
-            continue
-        
-        try:
-            # Upload batch concurrently
-            results = asyncio.run(upload_files_concurrent(
-                files_to_process, 
-                args.url, 
-                api_key, 
-                args.concurrent, 
-                args.dry_run, 
-                args.verbose
-            ))
-            
-            # Process results
-            for filepath, success_flag, song_id, response_status, error_msg in results:
-                if filepath is None:
-                    continue  # Skip shutdown requests
-                
-                file_id = file_ids.get(filepath)
-                if file_id is None:
-                    continue
-                
-                processing_time = (datetime.datetime.now() - start_times[filepath]).total_seconds()
-                
-                if success_flag:
-                    tracker.record_file_success(
-                        file_id, 
-                        processing_time=processing_time,
-                        song_id=song_id,
-                        response_status=response_status,
-                        upload_method="direct_fs"
-                    )
-                    success += 1
-                else:
-                    tracker.record_file_failure(
-                        file_id, 
-                        error_msg or "Upload failed",
-                        "UPLOAD_ERROR",
-                        f"Response status: {response_status}",
-                        upload_method="direct_fs"
-                    )
-                    fail += 1
-                    
-        except Exception as e:
-            # Handle batch-level errors
-            for filepath in batch:
-                file_id = file_ids.get(filepath)
-                if file_id:
-                    processing_time = (datetime.datetime.now() - start_times[filepath]).total_seconds()
-                    error_details = traceback.format_exc()
-                    tracker.record_file_failure(
-                        file_id, 
-                        str(e), 
-                        type(e).__name__, 
-                        error_details,
-                        upload_method="direct_fs"
-                    )
-                    fail += 1
+    if monitor is not None:
+        if monitor.pending and not shutdown_requested:
+            print(f"⏳ Waiting up to {args.processing_wait:.0f}s for the archive to process "
+                  f"{len(monitor.pending)} songs...")
+            await monitor.drain(args.processing_wait, lambda: shutdown_requested)
+        summary = monitor.summary()
+        if summary:
+            print(f"🛠️  Server processing: {summary}")
+    
+    if incremental:
+        incremental.save(tracker)
+    
+    if args.adaptive and engine.concurrency.history:
+        windows = [entry[1] for entry in engine.concurrency.history]
+        print(f"📈 Concurrency window: {min(windows):.1f}-{max(windows):.1f}, "
+              f"final {engine.concurrency.window:.1f}")
+    
+    total = scanned['count'] if streaming else len(audio_files)
+    tracker.record_job_totals(total, engine.telemetry.totals())
     
     # Complete job
     tracker.complete_job()
     
+    if streaming and total == 0:
+        print("No audio files found.")
+        return
+    
     if shutdown_requested:
-        print(f"\n⏹️  Upload stopped by user. Summary: {success} succeeded, {fail} failed, {len(audio_files)} total files.")
+        print(f"\n⏹️  Upload stopped by user. Summary: {success} succeeded, {duplicates} already in archive, {fail} failed, {total} total files.")
     else:
-        print(f"\n✅ Upload completed. Summary: {success} succeeded, {fail} failed, {len(audio_files)} total.")
+        print(f"\n✅ Upload completed. Summary: {success} succeeded, {duplicates} already in archive, {fail} failed, {total} total.")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
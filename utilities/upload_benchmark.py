@@ -0,0 +1,765 @@
+#!/usr/bin/env python3
+"""
+Music Archive Upload Benchmark
+
+Reproducible throughput benchmark for universal_upload.py and bulk_upload.py
+that needs no real archive: a synthetic library of tagged MP3 files and a
+local stub archive emulating the login and bulk_upload endpoints, with
+configurable latency, bandwidth and error rates. Each uploader run reports
+files/s, MB/s and the uploader's peak RSS, once per concurrency level, so a
+regression shows up here before it shows up in a real import.
+
+The stub answers 404 to every other endpoint (duplicate checks, batch and
+resumable uploads, processing status), exactly like an archive without those
+features, so universal_upload.py falls back to one plain upload per file.
+
+With --protocols http1 http2, every level is run over both HTTP/1.1 and
+HTTP/2 (universal_upload.py --http2) against the same stub, served by
+hypercorn, which speaks both on one port; the client connections the stub
+saw are reported next to the throughput.
+
+The tracker command times the tracking database on its own: skip checks
+against a synthetic database of a million rows (or --rows), as a full-table
+scan, through the (file_id_key, status) index, and from the tracker's
+in-memory set of processed files.
+
+Usage:
+    python3 upload_benchmark.py [command] [options]
+
+Commands:
+    generate DIR          Write a synthetic library of tagged MP3 files to DIR
+    serve                 Run the stub archive in the foreground
+    run DIR               Start a stub archive and time an uploader against DIR
+    tracker               Time skip checks against a large tracking database
+
+Examples:
+    # 3000 files, log-normal sizes around 1 MB (--median-kb 4096 for real-world tracks)
+    python3 upload_benchmark.py generate /tmp/benchlib --files 3000
+
+    # Compare concurrency levels over a 200 Mbit/s link with 80 ms server time
+    python3 upload_benchmark.py run /tmp/benchlib --concurrency 1 4 8 16 \\
+        --latency-ms 80 --bandwidth-mbps 200 --json results.json
+
+    # Same run later, flagging levels that got slower than the saved results
+    python3 upload_benchmark.py run /tmp/benchlib --concurrency 1 4 8 16 \\
+        --latency-ms 80 --bandwidth-mbps 200 --baseline results.json
+
+    # Pass extra options to the uploader
+    python3 upload_benchmark.py run /tmp/benchlib --uploader-args "--files-per-request 8"
+
+    # HTTP/1.1 against HTTP/2 over the same link
+    python3 upload_benchmark.py run /tmp/benchlib --concurrency 8 32 --protocols http1 http2 \
+        --bandwidth-mbps 500
+
+    # The sequential bulk_upload.py (concurrency levels don't apply)
+    python3 upload_benchmark.py run /tmp/benchlib --tool bulk
+
+    # Skip checks against a tracking database of a million files
+    python3 upload_benchmark.py tracker --rows 1000000
+
+Dependencies:
+    pip install aiohttp
+    pip install hypercorn 'httpx[http2]'   # for --protocols http2 / serve --server hypercorn
+"""
+
+import os
+import sys
+import argparse
+import asyncio
+import json
+import random
+import shlex
+import socket
+import sqlite3
+import subprocess
+import tempfile
+import time
+import tracemalloc
+import urllib.request
+import uuid
+
+from aiohttp import web
+
+from import_tracker import BulkImportTracker
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+UPLOADERS = {
+    'universal': 'universal_upload.py',
+    'bulk': 'bulk_upload.py',
+}
+
+# One MPEG-1 Layer III frame at 128 kbit/s, 44.1 kHz, no padding
+MP3_FRAME_HEADER = b'\xff\xfb\x90\x00'
+MP3_FRAME_BYTES = 417
+MP3_FRAME_SECONDS = 1152 / 44100
+
+TRACKS_PER_ALBUM = 12
+ALBUMS_PER_ARTIST = 4
+GENRES = ('Rock', 'Jazz', 'Classical', 'Electronic', 'Hip-Hop', 'Folk', 'Metal', 'Pop')
+
+# Seconds to wait for the stub archive to start
+SERVER_START_TIMEOUT = 10.0
+# Share of files/s lost against the baseline that is reported as a regression
+REGRESSION_THRESHOLD = 0.10
+# Concurrent streams the stub allows per HTTP/2 connection
+H2_MAX_STREAMS = 256
+PROTOCOLS = ('http1', 'http2')
+
+
+def format_size(bytes_size):
+    """Format file size in human readable format."""
+    for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
+        if bytes_size < 1024.0:
+            return f"{bytes_size:.2f} {unit}"
+        bytes_size /= 1024.0
+    return f"{bytes_size:.2f} PB"
+
+
+# Synthetic library
+
+def _synchsafe(n):
+    return bytes(((n >> 21) & 0x7f, (n >> 14) & 0x7f, (n >> 7) & 0x7f, n & 0x7f))
+
+
+def id3_tag(tags):
+    """ID3v2.4 tag holding UTF-8 text frames, e.g. {'TIT2': 'Title', 'TPE1': 'Artist'}."""
+    frames = b''
+    for frame_id, text in tags.items():
+        payload = b'\x03' + text.encode('utf-8')
+        frames += frame_id.encode('ascii') + _synchsafe(len(payload)) + b'\x00\x00' + payload
+    return b'ID3\x04\x00\x00' + _synchsafe(len(frames)) + frames
+
+
+def mp3_frames(size, rng):
+    """About size bytes of valid MP3 frame headers around random (incompressible) frame data."""
+    count = max(1, size // MP3_FRAME_BYTES)
+    data = bytearray(rng.randbytes(count * MP3_FRAME_BYTES))
+    for offset, value in enumerate(MP3_FRAME_HEADER):
+        data[offset::MP3_FRAME_BYTES] = bytes((value,)) * count
+    return bytes(data), count * MP3_FRAME_SECONDS
+
+
+def generate_library(directory, files, median_kb, sigma, seed):
+    """
+    Write files tagged MP3s as Artist/Album/NN Title.mp3 below directory.
+
+    Sizes follow a log-normal distribution around median_kb, like a real
+    library (a few long tracks, many near the median). The same seed always
+    produces the same library, and every file's content is unique, so no
+    duplicate detection can skip any of them.
+
+    Returns:
+        Tuple of (files written, total bytes)
+    """
+    rng = random.Random(seed)
+    total = 0
+    for index in range(files):
+        album_index, track = divmod(index, TRACKS_PER_ALBUM)
+        artist_index = album_index // ALBUMS_PER_ARTIST
+        # Some non-ASCII names, since path normalization is part of the work
+        artist = f"Artist {artist_index:04d}" if artist_index % 7 else f"Artíst Ünïcode {artist_index:04d}"
+        album = f"Album {album_index:05d}"
+        title = f"Track {index:06d}"
+
+        size = int(rng.lognormvariate(0, sigma) * median_kb * 1024)
+        audio, duration = mp3_frames(max(size, MP3_FRAME_BYTES), rng)
+        tag = id3_tag({
+            'TIT2': title,
+            'TPE1': artist,
+            'TALB': album,
+            'TCON': GENRES[artist_index % len(GENRES)],
+            'TRCK': f"{track + 1}/{TRACKS_PER_ALBUM}",
+            'TLEN': str(int(duration * 1000)),
+        })
+
+        album_dir = os.path.join(directory, artist, album)
+        os.makedirs(album_dir, exist_ok=True)
+        with open(os.path.join(album_dir, f"{track + 1:02d} {title}.mp3"), 'wb') as f:
+            f.write(tag)
+            f.write(audio)
+        total += len(tag) + len(audio)
+        if (index + 1) % 500 == 0:
+            print(f"  {index + 1}/{files} files ({format_size(total)})")
+    return files, total
+
+
+def library_size(directory):
+    """Tuple of (files, bytes) of the audio files below directory."""
+    files = total = 0
+    for root, _, names in os.walk(directory):
+        for name in names:
+            if name.lower().endswith('.mp3'):
+                files += 1
+                total += os.path.getsize(os.path.join(root, name))
+    return files, total
+
+
+# Stub archive
+
+class Bandwidth:
+    """One link shared by all uploads: bytes are let through at rate bytes/s."""
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.next_free = 0.0
+
+    async def take(self, nbytes):
+        if not self.rate:
+            return
+        now = time.monotonic()
+        self.next_free = max(now, self.next_free) + nbytes / self.rate
+        await asyncio.sleep(self.next_free - now)
+
+
+class StubArchive:
+    """Archive stand-in for the login and bulk_upload endpoints, served by aiohttp or hypercorn."""
+
+    def __init__(self, latency=0.05, jitter=0.5, bandwidth=0, error_rate=0.0, busy_rate=0.0, seed=1):
+        """
+        Args:
+            latency: Mean seconds the archive spends on an upload once received
+            jitter: Spread of the latency (0.5: uniformly 50%..150% of it)
+            bandwidth: Link bytes/s shared by all uploads (0: unlimited)
+            error_rate: Share of uploads answered with 500 (not retried)
+            busy_rate: Share of uploads answered with 503 (retried by universal_upload.py)
+            seed: Random seed for latency and errors
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.bandwidth = Bandwidth(bandwidth)
+        self.error_rate = error_rate
+        self.busy_rate = busy_rate
+        self.rng = random.Random(seed)
+        self.reset()
+
+    def reset(self):
+        self.stats = {'uploads': 0, 'bytes': 0, 'errors': 0, 'busy': 0, 'in_flight': 0, 'peak_in_flight': 0,
+                      'http2_requests': 0, 'connections': 0}
+        self.peers = set()
+
+    async def handle(self, method, path, body, peer, http_version):
+        """
+        Answer one request.
+
+        Args:
+            body: Async iterator over the request body's chunks
+            peer: Client (address, port), which tells connections apart
+            http_version: '1.1' or '2'
+
+        Returns:
+            Tuple of (status, extra headers, JSON payload)
+        """
+        if path == '/__stats':
+            return 200, {}, self.stats
+        if path == '/__reset':
+            self.reset()
+            return 200, {}, self.stats
+
+        if peer not in self.peers:
+            self.peers.add(peer)
+            self.stats['connections'] = len(self.peers)
+        if http_version == '2':
+            self.stats['http2_requests'] += 1
+
+        if method == 'POST' and path == '/api/v1/auth/login':
+            return 200, {}, {'success': True, 'api_token': 'benchmark'}
+        if method == 'POST' and path == '/api/v1/songs/bulk_upload':
+            return await self.bulk_upload(body)
+        # Like an archive without duplicate checks, batch or resumable uploads
+        return 404, {}, {'success': False, 'message': 'Not found'}
+
+    async def bulk_upload(self, body):
+        stats = self.stats
+        stats['in_flight'] += 1
+        stats['peak_in_flight'] = max(stats['peak_in_flight'], stats['in_flight'])
+        try:
+            # The body is counted and thrown away at link speed; nothing is parsed or stored
+            received = 0
+            async for chunk in body:
+                received += len(chunk)
+                await self.bandwidth.take(len(chunk))
+
+            spread = self.jitter * (2 * self.rng.random() - 1)
+            await asyncio.sleep(max(0.0, self.latency * (1 + spread)))
+
+            roll = self.rng.random()
+            if roll < self.error_rate:
+                stats['errors'] += 1
+                return 500, {}, {'success': False, 'message': 'Simulated server error'}
+            if roll < self.error_rate + self.busy_rate:
+                stats['busy'] += 1
+                return 503, {'Retry-After': '1'}, {'success': False, 'message': 'Simulated overload'}
+
+            stats['uploads'] += 1
+            stats['bytes'] += received
+            return 201, {}, {
+                'success': True,
+                'message': 'Song uploaded successfully',
+                'song': {'id': str(uuid.uuid4()), 'processing_status': 'completed'},
+            }
+        finally:
+            stats['in_flight'] -= 1
+
+    # aiohttp (HTTP/1.1)
+
+    def aiohttp_app(self):
+        async def handler(request):
+            async def body():
+                while True:
+                    chunk = await request.content.readany()
+                    if not chunk:
+                        return
+                    yield chunk
+
+            peer = request.transport.get_extra_info('peername') if request.transport else None
+            status, headers, payload = await self.handle(
+                request.method, request.path, body(), peer, f"{request.version.major}.{request.version.minor}"
+            )
+            return web.json_response(payload, status=status, headers=headers)
+
+        app = web.Application()
+        app.router.add_route('*', '/{tail:.*}', handler)
+        return app
+
+    # ASGI, for hypercorn (HTTP/1.1 and HTTP/2 on one port)
+
+    async def asgi(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            while True:
+                message = await receive()
+                if message['type'] == 'lifespan.startup':
+                    await send({'type': 'lifespan.startup.complete'})
+                elif message['type'] == 'lifespan.shutdown':
+                    await send({'type': 'lifespan.shutdown.complete'})
+                    return
+        if scope['type'] != 'http':
+            return
+
+        async def body():
+            while True:
+                message = await receive()
+                if message['type'] != 'http.request':
+                    return
+                if message.get('body'):
+                    yield message['body']
+                if not message.get('more_body'):
+                    return
+
+        chunks = body()
+        status, headers, payload = await self.handle(
+            scope['method'], scope['path'], chunks, scope.get('client'), scope['http_version']
+        )
+        # Read what the handler left, so no DATA frame arrives for a finished HTTP/2 stream
+        async for _ in chunks:
+            pass
+        content = json.dumps(payload).encode('utf-8')
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(content)).encode())]
+                       + [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+        })
+        await send({'type': 'http.response.body', 'body': content})
+
+
+def serve(args):
+    archive = StubArchive(
+        latency=args.latency_ms / 1000,
+        jitter=args.jitter,
+        bandwidth=args.bandwidth_mbps * 1_000_000 / 8,
+        error_rate=args.error_rate,
+        busy_rate=args.busy_rate,
+        seed=args.seed,
+    )
+    print(f"Stub archive on http://{args.host}:{args.port} ({args.server}; latency {args.latency_ms:.0f} ms, "
+          f"bandwidth {args.bandwidth_mbps or 'unlimited'} Mbit/s, "
+          f"errors {args.error_rate:.1%}, busy {args.busy_rate:.1%})", flush=True)
+    if args.server == 'hypercorn':
+        from hypercorn.asyncio import serve as hypercorn_serve
+        from hypercorn.config import Config
+
+        config = Config()
+        config.bind = [f"{args.host}:{args.port}"]
+        config.accesslog = None
+        config.h2_max_concurrent_streams = H2_MAX_STREAMS
+        asyncio.run(hypercorn_serve(archive.asgi, config))
+    else:
+        web.run_app(archive.aiohttp_app(), host=args.host, port=args.port, print=None, access_log=None)
+
+
+# Benchmark runner
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _stub_request(url, path, method='GET'):
+    request = urllib.request.Request(url + path, data=b'' if method == 'POST' else None, method=method)
+    with urllib.request.urlopen(request, timeout=5) as response:
+        return json.loads(response.read())
+
+
+def start_stub_archive(args):
+    """Start `upload_benchmark.py serve` in a child process; returns (process, url)."""
+    port = _free_port()
+    command = [sys.executable, os.path.abspath(__file__), 'serve', '--port', str(port),
+               '--server', 'hypercorn' if 'http2' in args.protocols else 'aiohttp',
+               '--latency-ms', str(args.latency_ms), '--jitter', str(args.jitter),
+               '--bandwidth-mbps', str(args.bandwidth_mbps), '--error-rate', str(args.error_rate),
+               '--busy-rate', str(args.busy_rate), '--seed', str(args.seed)]
+    # Its own process, so the stub's CPU time never competes with the uploader's event loop
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + SERVER_START_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Stub archive exited with status {process.returncode}")
+        try:
+            _stub_request(url, '/__stats')
+            return process, url
+        except OSError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("Stub archive did not start")
+
+
+def uploader_command(args, url, library, tracking_db, concurrency, protocol):
+    script = os.path.join(SCRIPT_DIR, UPLOADERS[args.tool])
+    command = [sys.executable, script, library, '--url', url, '--username', 'benchmark',
+               '--password', 'benchmark', '--start-over', '--tracking-db', tracking_db]
+    if args.tool == 'universal':
+        command += ['--concurrent', str(concurrency), '--no-progress', '--no-processing-check']
+        if protocol == 'http2':
+            command.append('--http2')
+    return command + shlex.split(args.uploader_args or '')
+
+
+def run_level(args, url, library, concurrency, protocol):
+    """Upload the whole library once at one concurrency level and protocol; returns the measurements."""
+    _stub_request(url, '/__reset', 'POST')
+    with tempfile.TemporaryDirectory(prefix='upload-benchmark-') as workdir:
+        log_path = os.path.join(workdir, 'uploader.out')
+        command = uploader_command(args, url, library, os.path.join(workdir, 'tracking.db'),
+                                   concurrency, protocol)
+        with open(log_path, 'wb') as log:
+            started = time.monotonic()
+            # The uploader's log file and tracking database land in workdir
+            process = subprocess.Popen(command, cwd=workdir, stdin=subprocess.DEVNULL,
+                                       stdout=log, stderr=subprocess.STDOUT)
+            # wait4() gives this child's own resource usage, including its peak RSS
+            _, status, usage = os.wait4(process.pid, 0)
+            seconds = time.monotonic() - started
+            process.returncode = os.waitstatus_to_exitcode(status)
+        if process.returncode != 0:
+            with open(log_path, 'rb') as log:
+                tail = log.read()[-2000:].decode('utf-8', 'replace')
+            print(f"⚠️  {args.tool} exited with status {process.returncode}:\n{tail}")
+
+    stats = _stub_request(url, '/__stats')
+    # ru_maxrss is in KB on Linux and in bytes on macOS
+    peak_rss = usage.ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+    return {
+        'tool': args.tool,
+        'protocol': protocol,
+        'concurrency': concurrency,
+        'seconds': round(seconds, 3),
+        'files': stats['uploads'],
+        'bytes': stats['bytes'],
+        'files_per_second': round(stats['uploads'] / seconds, 2),
+        'mb_per_second': round(stats['bytes'] / seconds / (1024 * 1024), 2),
+        'peak_rss_mb': round(peak_rss / (1024 * 1024), 1),
+        'cpu_seconds': round(usage.ru_utime + usage.ru_stime, 2),
+        'peak_in_flight': stats['peak_in_flight'],
+        'connections': stats['connections'],
+        'http2_requests': stats['http2_requests'],
+        'errors': stats['errors'],
+        'busy': stats['busy'],
+        'exit_status': process.returncode,
+    }
+
+
+def print_results(results, baseline=None):
+    print("\n" + "=" * 112)
+    print("UPLOAD BENCHMARK")
+    print("=" * 112)
+    print(f"{'Tool':<10} {'Proto':<5} {'Conc.':>5} {'Seconds':>8} {'Files':>7} {'Files/s':>8} {'MB/s':>8} "
+          f"{'Peak RSS':>9} {'CPU s':>7} {'In flight':>9} {'Conns':>5} {'500/503':>9}  vs baseline")
+    print("-" * 112)
+    # Results saved before protocols were compared are HTTP/1.1
+    previous = {(r['tool'], r.get('protocol', 'http1'), r['concurrency']): r for r in baseline or []}
+    regressions = 0
+    for r in results:
+        change = ''
+        before = previous.get((r['tool'], r['protocol'], r['concurrency']))
+        if before and before['files_per_second']:
+            delta = r['files_per_second'] / before['files_per_second'] - 1
+            change = f"{delta:+.1%}"
+            if delta < -REGRESSION_THRESHOLD:
+                change += "  ⚠️  slower"
+                regressions += 1
+        print(f"{r['tool']:<10} {r['protocol']:<5} {r['concurrency']:>5} {r['seconds']:>8.1f} {r['files']:>7} "
+              f"{r['files_per_second']:>8.1f} {r['mb_per_second']:>8.1f} {r['peak_rss_mb']:>7.1f}MB "
+              f"{r['cpu_seconds']:>7.1f} {r['peak_in_flight']:>9} {r['connections']:>5} "
+              f"{r['errors']:>4}/{r['busy']:<4}  {change}")
+    if regressions:
+        print(f"\n⚠️  {regressions} level(s) more than {REGRESSION_THRESHOLD:.0%} slower than the baseline")
+    return regressions
+
+
+def run_benchmark(args):
+    library = os.path.abspath(args.directory)
+    if not os.path.isdir(library):
+        print(f"Error: {library} does not exist (create it with: upload_benchmark.py generate {args.directory})")
+        sys.exit(1)
+    files, total = library_size(library)
+    print(f"📚 Library: {files} files, {format_size(total)} in {library}")
+
+    levels = args.concurrency if args.tool == 'universal' else [1]
+    protocols = list(dict.fromkeys(args.protocols))
+    if args.tool == 'bulk':
+        if args.concurrency != [1]:
+            print("bulk_upload.py uploads one file at a time; running a single level")
+        if 'http2' in protocols:
+            print("bulk_upload.py only speaks HTTP/1.1; skipping http2")
+            protocols = ['http1']
+
+    process, url = start_stub_archive(args)
+    results = []
+    try:
+        for concurrency in levels:
+            for protocol in protocols:
+                for repeat in range(args.repeat):
+                    print(f"⏱️  {args.tool} over {protocol} at concurrency {concurrency} "
+                          f"(run {repeat + 1}/{args.repeat})...", flush=True)
+                    result = run_level(args, url, library, concurrency, protocol)
+                    print(f"   {result['files_per_second']:.1f} files/s, {result['mb_per_second']:.1f} MB/s, "
+                          f"peak RSS {result['peak_rss_mb']:.1f} MB, {result['connections']} connections")
+                    if protocol == 'http2' and not result['http2_requests']:
+                        print("   ⚠️  no request arrived over HTTP/2")
+                    results.append(result)
+    finally:
+        process.terminate()
+        process.wait()
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+    regressions = print_results(results, baseline)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({
+                'library': {'path': library, 'files': files, 'bytes': total},
+                'stub': {'latency_ms': args.latency_ms, 'jitter': args.jitter,
+                         'bandwidth_mbps': args.bandwidth_mbps, 'error_rate': args.error_rate,
+                         'busy_rate': args.busy_rate},
+                'uploader_args': args.uploader_args,
+                'results': results,
+            }, f, indent=2)
+        print(f"\n💾 Results written to {args.json}")
+    if regressions:
+        sys.exit(2)
+
+
+# Tracking database benchmark
+
+def fill_tracking_db(db_path, rows, probes):
+    """
+    Write a tracking database of rows processed files, plus the probe files.
+
+    Every other probe file is recorded as uploaded, so checks hit and miss
+    equally often. Synthetic rows carry device/inode numbers of files that
+    don't exist, like the records of a library mounted elsewhere, 12 files
+    per directory.
+    """
+    BulkImportTracker(db_path)   # schema and indexes
+    conn = sqlite3.connect(db_path)
+    conn.execute("""
+        INSERT INTO import_jobs (started_at, status, total_files, processed_files, failed_files,
+                                 command_line, script_name, upload_method)
+        VALUES (datetime('now'), 'completed', ?, ?, 0, 'upload_benchmark.py tracker', 'benchmark', 'benchmark')
+    """, (rows, rows))
+    statuses = ['success'] * 18 + ['duplicate', 'failed']
+    conn.executemany("INSERT INTO directories (id, path) VALUES (?, ?)",
+                     ((d + 1, f"/library/{d:06d}/") for d in range((rows + 11) // 12)))
+    conn.executemany("""
+        INSERT INTO files (job_id, directory_id, name, device, inode, status, created_at)
+        VALUES (1, ?, ?, 2049, ?, ?, datetime('now'))
+    """, ((i // 12 + 1, f"{i % 12:02d}.mp3", 1000000 + i, statuses[i % len(statuses)])
+          for i in range(rows)))
+    conn.commit()
+    conn.close()
+
+    tracker = BulkImportTracker(db_path, write_behind=True)
+    for path in probes[::2]:
+        tracker.record_file_success(tracker.record_file_start(path))
+    tracker.close()
+
+
+def file_key(path):
+    st = os.stat(path)
+    return (st.st_ino, st.st_dev)
+
+
+def time_per_check(check, items):
+    started = time.perf_counter()
+    for item in items:
+        check(item)
+    return (time.perf_counter() - started) / max(1, len(items))
+
+
+def run_tracker_benchmark(args):
+    workdir = tempfile.mkdtemp(prefix='tracker-benchmark-')
+    db_path = args.db or os.path.join(workdir, 'tracking.db')
+    if os.path.exists(db_path):
+        print(f"Error: {db_path} already exists")
+        sys.exit(1)
+    try:
+        probes = []
+        for i in range(args.checks):
+            path = os.path.join(workdir, f"probe{i:05d}.mp3")
+            open(path, 'wb').close()
+            probes.append(path)
+
+        print(f"🗄️  Writing {args.rows:,} rows to {db_path}...", flush=True)
+        started = time.perf_counter()
+        fill_tracking_db(db_path, args.rows, probes)
+        size = os.path.getsize(db_path)
+        print(f"   {time.perf_counter() - started:.1f}s, {format_size(size)} "
+              f"({size / max(1, args.rows):.0f} bytes per file)")
+
+        keys = [file_key(path) for path in probes]
+        conn = sqlite3.connect(db_path)
+
+        def sql_check(key):
+            return conn.execute("""
+                SELECT id FROM files
+                WHERE inode = ? AND device = ? AND status IN ('success', 'duplicate')
+            """, key).fetchone()
+
+        results = []
+        # Without the index every check reads the whole table, so only a sample is timed
+        index_sql, = conn.execute("SELECT sql FROM sqlite_master WHERE name = 'idx_files_identity_status'").fetchone()
+        conn.execute('DROP INDEX idx_files_identity_status')
+        print("⏱️  Full-table-scan checks...", flush=True)
+        results.append(('SQL, no index', time_per_check(sql_check, keys[:args.scan_checks])))
+
+        print("⏱️  Indexed checks...", flush=True)
+        started = time.perf_counter()
+        conn.execute(index_sql)
+        conn.commit()
+        index_seconds = time.perf_counter() - started
+        results.append(('SQL, (inode, device, status) index', time_per_check(sql_check, keys)))
+        conn.close()
+
+        print("⏱️  Processed set...", flush=True)
+        tracker = BulkImportTracker(db_path)
+        started = time.perf_counter()
+        processed = tracker._processed_keys()
+        load_seconds = time.perf_counter() - started
+        results.append(('is_file_processed() (stat + set)', time_per_check(tracker.is_file_processed, probes)))
+        # A new file: the processed set, the indexed 'processing' check and the insert
+        results.append(('record_file_start(), new file', time_per_check(tracker.record_file_start, probes[1::2])))
+        tracker.close()
+
+        # Memory of the set on its own, from a second load
+        tracemalloc.start()
+        tracker = BulkImportTracker(db_path)
+        tracker._processed_keys()
+        set_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        tracker.close()
+    finally:
+        if not args.db:
+            for name in os.listdir(workdir):
+                os.remove(os.path.join(workdir, name))
+            os.rmdir(workdir)
+
+    print("\n" + "=" * 72)
+    print(f"TRACKER BENCHMARK ({args.rows:,} rows)")
+    print("=" * 72)
+    print(f"{'Skip check':<36} {'Per check':>12} {'Checks/s':>12}")
+    print("-" * 72)
+    for name, seconds in results:
+        print(f"{name:<36} {seconds * 1e6:>10.1f}us {1 / seconds if seconds else 0:>12,.0f}")
+    print("-" * 72)
+    print(f"Index built in {index_seconds:.1f}s; processed set of {len(processed):,} keys "
+          f"loaded in {load_seconds:.1f}s, {format_size(set_bytes)}")
+
+
+def add_stub_arguments(parser):
+    parser.add_argument('--latency-ms', type=float, default=50.0,
+                        help='Mean milliseconds the stub spends on each upload once received (default: 50)')
+    parser.add_argument('--jitter', type=float, default=0.5,
+                        help='Latency spread: 0.5 means uniformly 50%%..150%% of it (default: 0.5)')
+    parser.add_argument('--bandwidth-mbps', type=float, default=0.0,
+                        help='Link speed in Mbit/s shared by all uploads (default: unlimited)')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='Share of uploads answered with HTTP 500 (default: 0)')
+    parser.add_argument('--busy-rate', type=float, default=0.0,
+                        help='Share of uploads answered with HTTP 503, which universal_upload.py retries (default: 0)')
+    parser.add_argument('--seed', type=int, default=1, help='Random seed (default: 1)')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the upload scripts against a local stub archive.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    generate = commands.add_parser('generate', help='Write a synthetic library of tagged MP3 files')
+    generate.add_argument('directory', help='Where to write the library')
+    generate.add_argument('--files', type=int, default=2000, help='Number of files (default: 2000)')
+    generate.add_argument('--median-kb', type=int, default=1024,
+                          help='Median file size in KB (default: 1024; about 4096 for real-world MP3s)')
+    generate.add_argument('--sigma', type=float, default=0.5,
+                          help='Spread of the log-normal size distribution (default: 0.5)')
+    generate.add_argument('--seed', type=int, default=1, help='Random seed (default: 1)')
+
+    stub = commands.add_parser('serve', help='Run the stub archive in the foreground')
+    stub.add_argument('--host', default='127.0.0.1', help='Address to listen on (default: 127.0.0.1)')
+    stub.add_argument('--port', type=int, default=8765, help='Port to listen on (default: 8765)')
+    stub.add_argument('--server', choices=['aiohttp', 'hypercorn'], default='aiohttp',
+                      help='HTTP server: aiohttp (HTTP/1.1) or hypercorn (HTTP/1.1 and HTTP/2) (default: aiohttp)')
+    add_stub_arguments(stub)
+
+    run = commands.add_parser('run', help='Time an uploader against a stub archive')
+    run.add_argument('directory', help='Library to upload (see generate)')
+    run.add_argument('--tool', choices=sorted(UPLOADERS), default='universal',
+                     help='Uploader to benchmark (default: universal)')
+    run.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 8, 16],
+                     help='Concurrency levels to compare (default: 1 4 8 16)')
+    run.add_argument('--repeat', type=int, default=1, help='Runs per concurrency level (default: 1)')
+    run.add_argument('--protocols', nargs='+', choices=PROTOCOLS, default=['http1'],
+                     help='Protocols to compare at every level (default: http1; http2 needs hypercorn and httpx[http2])')
+    run.add_argument('--uploader-args', help='Extra options for the uploader, as one quoted string')
+    run.add_argument('--json', metavar='PATH', help='Write the results to PATH')
+    run.add_argument('--baseline', metavar='PATH',
+                     help='Earlier --json results; levels more than 10%% slower are flagged (exit status 2)')
+    add_stub_arguments(run)
+
+    tracker = commands.add_parser('tracker', help='Time skip checks against a large tracking database')
+    tracker.add_argument('--rows', type=int, default=1000000, help='Rows in the synthetic database (default: 1000000)')
+    tracker.add_argument('--checks', type=int, default=2000,
+                         help='Files checked, half of them already processed (default: 2000)')
+    tracker.add_argument('--scan-checks', type=int, default=20,
+                         help='Checks timed without the index, each a full table scan (default: 20)')
+    tracker.add_argument('--db', metavar='PATH', help='Keep the database at PATH (default: a temporary file)')
+
+    args = parser.parse_args()
+
+    if args.command == 'generate':
+        print(f"🎵 Generating {args.files} files in {args.directory}...")
+        files, total = generate_library(args.directory, args.files, args.median_kb, args.sigma, args.seed)
+        print(f"✅ {files} files, {format_size(total)}")
+    elif args.command == 'serve':
+        serve(args)
+    elif args.command == 'run':
+        run_benchmark(args)
+    elif args.command == 'tracker':
+        run_tracker_benchmark(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,781 @@
+#!/usr/bin/env python3
+"""
+Music Archive Upload Engine Module
+
+This module provides the asynchronous HTTP engine used by the upload scripts.
+A single aiohttp session is shared by authentication and every upload, so
+connections to the archive are pooled and kept alive instead of paying TCP
+(and TLS) setup for each file.
+
+Features:
+- Shared keep-alive connection pool with a per-host connection limit
+- DNS cache so tens of thousands of requests don't re-resolve the archive host
+- Multipart bodies streamed from disk in fixed-size chunks (constant memory
+  per in-flight upload, see multipart_stream.py)
+- Upload timeouts on connect/read instead of a total deadline, so large files
+  are not cut off while they are still streaming
+- Same result tuple as the synchronous upload functions for easy tracking
+- Content-hash lookups so files the archive already holds are never sent
+- Several small files packed into one bulk_upload_batch request
+- Resumable chunked upload sessions for large files
+- Optional AIMD concurrency control: the number of uploads in flight grows
+  while latency stays flat and throughput rises, and is cut on 429/503/504
+  responses and timeouts, with the chosen window logged over time
+- Optional telemetry: each upload's time split into disk read, network send
+  and server response, plus bytes sent (see upload_telemetry.py)
+- Failure classification with per-class retry policies (exponential backoff
+  for timeouts, connection errors, 429 and 5xx; never for 422 and other 4xx)
+- Bulk processing-status lookups for songs uploaded earlier
+- Optional HTTP/2 transport: every request multiplexed over one connection
+  instead of one connection per upload in flight (see http2_transport.py)
+
+Usage:
+    from upload_engine import UploadEngine
+
+    async with UploadEngine(api_url, max_connections=5) as engine:
+        if await engine.authenticate(username, password):
+            success, song, status, error = await engine.upload_file(
+                filepath, filename, mime_type)
+
+            # Several small files in one request, one result per file
+            results = await engine.upload_batch([(path, name, mime, {}), ...])
+
+            # Large file in resumable chunks (continue a saved session by id)
+            session = await engine.create_upload_session(filename, mime, size, checksum)
+            received = await engine.upload_chunk(session['id'], path, 0, chunk_size)
+            success, song, status, error = await engine.finalize_upload_session(session['id'])
+
+            # Which of these files does the archive already have?
+            existing = await engine.lookup_checksums([file_checksum(path), ...])
+
+            # Did the archive finish processing these songs?
+            statuses = await engine.fetch_processing_status([song_id, ...])
+
+    # Should a failed upload be tried again, and when?
+    policy = RETRY_POLICIES.get(classify_failure(response_status, error))
+    if policy and attempt <= policy.max_retries:
+        await asyncio.sleep(policy.delay(attempt))
+
+Dependencies:
+    pip install aiohttp
+"""
+
+import asyncio
+import base64
+import hashlib
+import logging
+import random
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urljoin
+
+import aiohttp
+
+from multipart_stream import MultipartEncoder, MultipartFileEncoder, DEFAULT_CHUNK_SIZE
+from disk_locality import advise_sequential
+from http2_transport import Http2Session
+
+logger = logging.getLogger(__name__)
+
+# Upload result: (success, song, response_status, error_message)
+UploadResult = Tuple[bool, Dict[str, Any], str, Optional[str]]
+
+# Most checksums the archive accepts in one check_duplicates request
+MAX_CHECKSUM_LOOKUP = 1000
+
+# Most song ids the archive accepts in one processing_statuses request
+MAX_STATUS_LOOKUP = 1000
+
+# Most files the archive accepts in one bulk_upload_batch request
+MAX_BATCH_FILES = 50
+
+# Batch responses that refuse the request as a whole (too large, or one bad
+# file failing the form); the batch is split and retried rather than failing
+# every file in it
+BATCH_SPLIT_STATUSES = {413, 422}
+
+# One file of a batch upload: (filepath, filename, mime_type, extra form fields)
+BatchFile = Tuple[str, str, str, Dict[str, Any]]
+
+# Default chunk size of resumable uploads
+DEFAULT_UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+
+
+# Pool connections kept beyond the upload slots, so duplicate and processing
+# status lookups never queue behind uploads that occupy every connection
+CONTROL_CONNECTIONS = 2
+
+# Responses that mean the archive is overloaded and we should send less
+CONGESTION_STATUSES = {429, 503, 504}
+
+
+class ConcurrencyController:
+    """
+    Limit the uploads in flight, optionally adapting the limit AIMD-style.
+
+    Every upload request runs inside a slot(). With adaptive control the window
+    grows additively (about +1 per window of completed uploads) while the
+    smoothed upload latency per MB stays within latency_tolerance of the best
+    seen and each logging interval's throughput beats the last, and is cut
+    multiplicatively on 429/503/504 responses and timeouts (at most once per
+    typical upload time, so one burst of errors counts as one signal). Without
+    adaptive control the window stays at its initial value.
+    """
+
+    # Uploads smaller than this are costed as this size, so tiny files don't
+    # make the per-MB latency swing wildly
+    MIN_COST_BYTES = 256 * 1024
+
+    def __init__(self, initial: int, minimum: int = 1, maximum: Optional[int] = None,
+                 adaptive: bool = False, latency_tolerance: float = 2.0,
+                 decrease_factor: float = 0.5, log_interval: float = 10.0):
+        """
+        Args:
+            initial: Starting window (uploads in flight)
+            minimum: Smallest window after backing off
+            maximum: Largest window (defaults to initial)
+            adaptive: Adapt the window to latency, throughput and congestion
+            latency_tolerance: Grow only while latency/MB <= tolerance x best seen
+            decrease_factor: Window multiplier on a congestion signal
+            log_interval: Seconds between window/throughput log lines
+        """
+        self.maximum = max(maximum or initial, 1)
+        self.minimum = max(min(minimum, self.maximum), 1)
+        self.window = float(min(max(initial, self.minimum), self.maximum))
+        self.adaptive = adaptive
+        self.latency_tolerance = latency_tolerance
+        self.decrease_factor = decrease_factor
+        self.log_interval = log_interval
+        self.in_flight = 0
+        self.history = []  # (seconds since start, window, files/s, MB/s) per interval
+        self._condition = asyncio.Condition()
+        self._started = time.monotonic()
+        self._latency = None     # smoothed seconds per MB
+        self._baseline = None    # best smoothed seconds per MB seen
+        self._duration = 1.0     # smoothed seconds per upload
+        self._last_decrease = 0.0
+        self._interval_start = self._started
+        self._interval_files = 0
+        self._interval_bytes = 0
+        self._last_throughput = None
+        self._interval_start_window = self.window
+
+    @property
+    def limit(self) -> int:
+        return max(self.minimum, int(self.window))
+
+    def slot(self, nbytes: int) -> "_UploadSlot":
+        """Context manager holding one in-flight upload of nbytes."""
+        return _UploadSlot(self, nbytes)
+
+    async def _acquire(self):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+
+    async def _release(self):
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def _record(self, elapsed: float, nbytes: int, congestion: Optional[str]):
+        now = time.monotonic()
+        if congestion is not None:
+            if self.adaptive and now - self._last_decrease >= self._duration:
+                old = self.window
+                self.window = max(float(self.minimum), self.window * self.decrease_factor)
+                self._last_decrease = now
+                logger.info(f"Concurrency window {old:.1f} -> {self.window:.1f} ({congestion})")
+            return
+
+        self._duration = 0.8 * self._duration + 0.2 * elapsed
+        cost = elapsed / (max(nbytes, self.MIN_COST_BYTES) / (1024 * 1024))
+        self._latency = cost if self._latency is None else 0.8 * self._latency + 0.2 * cost
+        if self._baseline is None or self._latency < self._baseline:
+            self._baseline = self._latency
+        else:
+            # Let the baseline follow slow drift (server load, other traffic)
+            self._baseline += (self._latency - self._baseline) * 0.01
+
+        # Only grow a window that is actually used, and only while latency is flat
+        if (self.adaptive and self.in_flight >= self.limit
+                and self._latency <= self._baseline * self.latency_tolerance):
+            self.window = min(float(self.maximum), self.window + 1.0 / self.window)
+
+        self._interval_files += 1
+        self._interval_bytes += nbytes
+        if now - self._interval_start >= self.log_interval:
+            self._end_interval(now)
+
+    def _end_interval(self, now: float):
+        seconds = now - self._interval_start
+        files_per_sec = self._interval_files / seconds
+        mb_per_sec = self._interval_bytes / seconds / (1024 * 1024)
+
+        # A bigger window that didn't buy more throughput only adds queueing
+        if (self.adaptive and self._last_throughput is not None
+                and self.window > self._interval_start_window
+                and mb_per_sec <= self._last_throughput):
+            self.window = max(float(self.minimum), self._interval_start_window)
+
+        self.history.append((now - self._started, self.window, files_per_sec, mb_per_sec))
+        logger.info(f"Concurrency window {self.window:.1f} ({self.in_flight} in flight): "
+                    f"{files_per_sec:.1f} files/s, {mb_per_sec:.1f} MB/s, "
+                    f"{(self._latency or 0):.2f} s/MB")
+        self._last_throughput = mb_per_sec
+        self._interval_start = now
+        self._interval_start_window = self.window
+        self._interval_files = 0
+        self._interval_bytes = 0
+
+
+class _UploadSlot:
+    """One in-flight upload; set .status to the HTTP status once it is known."""
+
+    def __init__(self, controller: ConcurrencyController, nbytes: int):
+        self.controller = controller
+        self.nbytes = nbytes
+        self.status = None
+        self.started = None   # time.monotonic() when the slot was granted
+
+    async def __aenter__(self):
+        await self.controller._acquire()
+        self.started = time.monotonic()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        elapsed = time.monotonic() - self.started
+        try:
+            if exc_type is not None and issubclass(exc_type, asyncio.TimeoutError):
+                self.controller._record(elapsed, self.nbytes, "timeout")
+            elif self.status in CONGESTION_STATUSES:
+                self.controller._record(elapsed, self.nbytes, f"HTTP {self.status}")
+            elif exc_type is None and self.status is not None and self.status < 500:
+                self.controller._record(elapsed, self.nbytes, None)
+        finally:
+            await self.controller._release()
+        return False
+
+
+class ArchiveRequestError(Exception):
+    """A request to the archive failed (status is the HTTP status, if there was a response)."""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+class UploadSessionError(ArchiveRequestError):
+    """A resumable upload session request failed."""
+
+
+# Statuses meaning the archive has no such endpoint (an older server), not a failure
+UNSUPPORTED_STATUSES = {404, 405}
+
+
+def _read_chunk(filepath: str, offset: int, length: int) -> bytes:
+    with open(filepath, 'rb') as f:
+        f.seek(offset)
+        return f.read(length)
+
+
+class RetryPolicy:
+    """Exponential backoff (with jitter) for one class of upload failure."""
+
+    def __init__(self, max_retries: int, base_delay: float, max_delay: float = 300.0):
+        """
+        Args:
+            max_retries: Retries after the first attempt
+            base_delay: Seconds before the first retry (doubled for each further one)
+            max_delay: Upper bound of any one delay
+        """
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, retry: int) -> float:
+        """Seconds to wait before retry number retry (1-based)."""
+        ceiling = min(self.max_delay, self.base_delay * 2 ** (retry - 1))
+        # Half fixed, half random, so failures from one outage don't retry in lockstep
+        return ceiling / 2 + random.uniform(0, ceiling / 2)
+
+
+# How each class of failure is retried. Classes without a policy are permanent:
+# "rejected" (422 and other 4xx: the archive refused this file, sending it again
+# cannot help), "local" (the file could not be read) and "unknown".
+RETRY_POLICIES = {
+    'timeout': RetryPolicy(max_retries=3, base_delay=5.0),
+    'connection': RetryPolicy(max_retries=5, base_delay=2.0),
+    'throttled': RetryPolicy(max_retries=6, base_delay=10.0),
+    'server': RetryPolicy(max_retries=4, base_delay=5.0),
+}
+
+
+def classify_failure(response_status: Optional[Any] = None,
+                     error: Optional[BaseException] = None) -> str:
+    """
+    Classify a failed upload for retry decisions.
+
+    Args:
+        response_status: HTTP status of the failed response, if there was one
+        error: Exception raised by the upload, if any
+
+    Returns:
+        One of 'timeout', 'connection', 'throttled', 'server', 'rejected',
+        'local' or 'unknown'
+    """
+    if isinstance(error, ArchiveRequestError) and error.status is not None:
+        response_status = error.status
+    elif error is not None:
+        # aiohttp's timeout errors are also connection errors; timeouts come first
+        if isinstance(error, asyncio.TimeoutError):
+            return 'timeout'
+        if isinstance(error, (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError,
+                              ConnectionError)):
+            return 'connection'
+        if isinstance(error, OSError):
+            return 'local'
+        return 'unknown'
+
+    try:
+        status = int(response_status)
+    except (TypeError, ValueError):
+        return 'unknown'
+    if status == 429:
+        return 'throttled'
+    if status == 408:
+        return 'timeout'
+    if status >= 500:
+        return 'server'
+    if status >= 400:
+        return 'rejected'
+    return 'unknown'
+
+
+def file_checksum(filepath: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> str:
+    """
+    Hash a file the way ActiveStorage does (base64-encoded MD5 of the content).
+
+    The file is read in chunks so memory stays constant; hashlib releases the GIL
+    while digesting, so several files can be hashed in parallel threads.
+    """
+    digest = hashlib.md5()
+    with open(filepath, 'rb') as f:
+        advise_sequential(f.fileno())
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return base64.b64encode(digest.digest()).decode('ascii')
+
+
+class UploadEngine:
+    """Pooled aiohttp client for the archive's auth and bulk upload endpoints."""
+
+    def __init__(self, api_url: str, max_connections: int = 5,
+                 limit_per_host: Optional[int] = None, dns_cache_ttl: int = 300,
+                 keepalive_timeout: float = 30, connect_timeout: float = 30,
+                 read_timeout: float = 60, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 adaptive: bool = False, initial_concurrency: Optional[int] = None,
+                 min_concurrency: int = 1, telemetry=None, http2: bool = False):
+        """
+        Initialize the engine. The HTTP session is created by open() / async with.
+
+        Args:
+            api_url: Base URL of the archive
+            max_connections: Connections available to uploads (the pool keeps
+                CONTROL_CONNECTIONS more for lookups)
+            limit_per_host: Connections allowed to one host (defaults to max_connections)
+            dns_cache_ttl: Seconds to cache DNS lookups
+            keepalive_timeout: Seconds an idle pooled connection is kept open
+            connect_timeout: Seconds allowed to establish a connection
+            read_timeout: Seconds allowed between reads from the server
+            chunk_size: Bytes of the file read per chunk while streaming a body
+            adaptive: Adapt uploads in flight between min_concurrency and
+                max_connections (see ConcurrencyController)
+            initial_concurrency: Starting uploads in flight (defaults to max_connections)
+            min_concurrency: Fewest uploads in flight after backing off
+            telemetry: Optional UploadTelemetry that receives read/send/server
+                timings and bytes sent per upload request
+            http2: Multiplex all requests over HTTP/2 (needs httpx[http2]);
+                max_connections then limits uploads in flight, not connections
+        """
+        self.api_url = api_url
+        self.max_connections = max_connections
+        self.limit_per_host = limit_per_host or max_connections
+        self.dns_cache_ttl = dns_cache_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self.chunk_size = chunk_size
+        self.timeout = aiohttp.ClientTimeout(total=None, sock_connect=connect_timeout,
+                                             sock_read=read_timeout)
+        self.api_key = None
+        self.session = None
+        self.telemetry = telemetry
+        self.http2 = http2
+        self.concurrency = ConcurrencyController(
+            initial_concurrency or max_connections,
+            minimum=min_concurrency,
+            maximum=max_connections,
+            adaptive=adaptive
+        )
+
+    async def open(self):
+        """Create the shared session and connection pool."""
+        if self.session is None and self.http2:
+            self.session = Http2Session(
+                self.api_url,
+                max_connections=self.max_connections + CONTROL_CONNECTIONS,
+                connect_timeout=self.timeout.sock_connect,
+                read_timeout=self.timeout.sock_read,
+                keepalive_timeout=self.keepalive_timeout
+            )
+        elif self.session is None:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections + CONTROL_CONNECTIONS,
+                limit_per_host=self.limit_per_host + CONTROL_CONNECTIONS,
+                use_dns_cache=True,
+                ttl_dns_cache=self.dns_cache_ttl,
+                keepalive_timeout=self.keepalive_timeout
+            )
+            self.session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+        return self
+
+    def _record_timing(self, slot: "_UploadSlot", body: MultipartEncoder):
+        """Split a finished upload request into disk read, network send and server time."""
+        if self.telemetry is None:
+            return
+        responded = time.monotonic()
+        sent = body.finished_at or responded
+        self.telemetry.add('read', body.read_seconds)
+        self.telemetry.add('send', max(sent - slot.started - body.read_seconds, 0.0))
+        self.telemetry.add('server', max(responded - sent, 0.0))
+        self.telemetry.add_bytes(len(body))
+
+    async def close(self):
+        """Close the session and every pooled connection."""
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def __aenter__(self):
+        return await self.open()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def _auth_headers(self) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+
+    async def authenticate(self, username: str, password: str) -> Optional[str]:
+        """
+        Authenticate with the API and remember the API token.
+
+        Returns:
+            The API token, or None if authentication failed
+        """
+        url = urljoin(self.api_url, "/api/v1/auth/login")
+        data = {"email": username, "password": password}
+
+        try:
+            async with self.session.post(url, json=data) as response:
+                if response.status == 200:
+                    result = await response.json(content_type=None)
+                    if result.get("success") and "api_token" in result:
+                        self.api_key = result["api_token"]
+                        return self.api_key
+                    print(f"Authentication failed: {result.get('message', 'Unknown error')}")
+                    return None
+                print(f"Authentication failed (HTTP {response.status}): {await response.text()}")
+                return None
+        except (aiohttp.ClientError, OSError) as e:
+            print(f"Network error during authentication: {e}")
+            return None
+
+    async def lookup_checksums(self, checksums: List[str]) -> Optional[Dict[str, Any]]:
+        """
+        Ask the archive which content checksums it already holds.
+
+        Args:
+            checksums: Checksums from file_checksum() (at most MAX_CHECKSUM_LOOKUP)
+
+        Returns:
+            Dict of checksum -> existing song id for the hits only, or None if the
+            archive does not support the lookup (older server)
+
+        Raises:
+            ArchiveRequestError, aiohttp.ClientError or asyncio.TimeoutError if the
+            request failed (see classify_failure())
+        """
+        url = urljoin(self.api_url, "/api/v1/songs/check_duplicates")
+
+        async with self.session.post(url, json={"checksums": checksums},
+                                     headers=self._auth_headers()) as response:
+            text = await response.text()
+            if response.status in UNSUPPORTED_STATUSES:
+                return None
+            if response.status != 200:
+                raise ArchiveRequestError(f"HTTP {response.status}: {text[:200]}", response.status)
+            try:
+                result = await response.json(content_type=None)
+            except ValueError:
+                result = {}
+            if not result.get("success"):
+                raise ArchiveRequestError(f"Invalid duplicate check response: {text[:200]}")
+            return result.get("existing", {})
+
+    async def fetch_processing_status(self, song_ids: List[str]) -> Optional[Dict[str, Optional[Dict[str, Any]]]]:
+        """
+        Ask the archive how processing of uploaded songs went.
+
+        Args:
+            song_ids: Song ids returned by uploads (at most MAX_STATUS_LOOKUP)
+
+        Returns:
+            Dict of song id -> {"processing_status", "processing_error",
+            "processing_seconds"} (None for songs that no longer exist), or None
+            if the archive does not support the lookup (older server)
+
+        Raises:
+            ArchiveRequestError, aiohttp.ClientError or asyncio.TimeoutError if the
+            request failed (see classify_failure())
+        """
+        url = urljoin(self.api_url, "/api/v1/songs/processing_statuses")
+
+        async with self.session.post(url, json={"ids": song_ids},
+                                     headers=self._auth_headers()) as response:
+            text = await response.text()
+            if response.status in UNSUPPORTED_STATUSES:
+                return None
+            if response.status != 200:
+                raise ArchiveRequestError(f"HTTP {response.status}: {text[:200]}", response.status)
+            try:
+                result = await response.json(content_type=None)
+            except ValueError:
+                result = {}
+            if not result.get("success"):
+                raise ArchiveRequestError(f"Invalid processing status response: {text[:200]}")
+            statuses = dict(result.get("songs", {}))
+            statuses.update(dict.fromkeys(result.get("missing", [])))
+            return statuses
+
+    async def upload_file(self, filepath: str, filename: str, mime_type: str,
+                          fields: Optional[Dict[str, str]] = None) -> UploadResult:
+        """
+        Upload one file to /api/v1/songs/bulk_upload over the shared pool.
+
+        Args:
+            filepath: Path of the file to send
+            filename: Name to report to the archive
+            mime_type: Content type of the audio part
+            fields: Extra form fields (filename is always sent)
+
+        Returns:
+            Tuple of (success, song, response_status, error_message) where song is
+            the "song" object of the response ({} on failure)
+        """
+        url = urljoin(self.api_url, "/api/v1/songs/bulk_upload")
+
+        form_fields = {"filename": filename}
+        form_fields.update({key: str(value) for key, value in (fields or {}).items()})
+        body = MultipartFileEncoder(form_fields, "audio_file", filepath, filename, mime_type,
+                                    chunk_size=self.chunk_size)
+        headers = {**self._auth_headers(), **body.headers()}
+
+        async with self.concurrency.slot(len(body)) as slot, \
+                self.session.post(url, data=body, headers=headers) as response:
+            slot.status = response.status
+            text = await response.text()
+            self._record_timing(slot, body)
+            if response.status == 201:
+                try:
+                    song = (await response.json(content_type=None)).get('song', {})
+                except ValueError:
+                    song = {}
+                return True, song, str(response.status), None
+            return False, {}, str(response.status), f"HTTP {response.status}: {text}"
+
+    async def upload_batch(self, files: List[BatchFile]) -> Optional[List[UploadResult]]:
+        """
+        Upload several files in one request to /api/v1/songs/bulk_upload_batch.
+
+        Saves the per-request auth, routing and connection overhead that dominates
+        when tracks are small. Each file is still saved (or rejected) on its own.
+        A batch refused as a whole (BATCH_SPLIT_STATUSES) is split in halves and
+        sent again, down to single files sent through upload_file(), so only the
+        files the archive refuses on their own fail.
+
+        Args:
+            files: Up to MAX_BATCH_FILES (filepath, filename, mime_type, fields) tuples
+
+        Returns:
+            One (success, song, response_status, error_message) tuple per file in
+            input order, or None if the archive has no batch endpoint (older server)
+        """
+        url = urljoin(self.api_url, "/api/v1/songs/bulk_upload_batch")
+
+        form_fields = {}
+        parts = []
+        for index, (filepath, filename, mime_type, fields) in enumerate(files):
+            prefix = f"files[{index}]"
+            form_fields[f"{prefix}[filename]"] = filename
+            for key, value in (fields or {}).items():
+                form_fields[f"{prefix}[{key}]"] = str(value)
+            parts.append((f"{prefix}[audio_file]", filepath, filename, mime_type))
+        body = MultipartEncoder(form_fields, parts, chunk_size=self.chunk_size)
+        headers = {**self._auth_headers(), **body.headers()}
+
+        async with self.concurrency.slot(len(body)) as slot, \
+                self.session.post(url, data=body, headers=headers) as response:
+            slot.status = response.status
+            text = await response.text()
+            self._record_timing(slot, body)
+            if response.status == 404:
+                return None
+            status = str(response.status)
+            if response.status in BATCH_SPLIT_STATUSES:
+                results = None
+            elif response.status != 200:
+                return [(False, {}, status, f"HTTP {response.status}: {text}")] * len(files)
+            else:
+                try:
+                    results = {r.get('index'): r for r in (await response.json(content_type=None)).get('results', [])}
+                except ValueError:
+                    return [(False, {}, status, f"Invalid batch response: {text[:200]}")] * len(files)
+
+        if results is None:
+            logger.info(f"Batch of {len(files)} files refused with HTTP {status}; splitting it")
+            return await self._upload_split_batch(files)
+
+        outcomes = []
+        for index in range(len(files)):
+            result = results.get(index)
+            if result is None:
+                outcomes.append((False, {}, status, "No result for file in batch response"))
+            elif result.get('success'):
+                outcomes.append((True, result.get('song', {}), "201", None))
+            else:
+                errors = '; '.join(result.get('errors') or [])
+                message = result.get('message', 'Upload failed') + (f": {errors}" if errors else "")
+                outcomes.append((False, {}, "422", message))
+        return outcomes
+
+    async def _upload_split_batch(self, files: List[BatchFile]) -> List[UploadResult]:
+        """Upload a refused batch again as two halves, or a single file on its own."""
+        if len(files) == 1:
+            return [await self.upload_file(*files[0])]
+        middle = len(files) // 2
+        outcomes = []
+        for half in (files[:middle], files[middle:]):
+            results = await self.upload_batch(half)
+            outcomes.extend(results if results is not None else
+                            [await self.upload_file(*batch_file) for batch_file in half])
+        return outcomes
+
+    async def create_upload_session(self, filename: str, mime_type: str, byte_size: int,
+                                    checksum: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Open a resumable upload session on the archive.
+
+        Args:
+            filename: Name to report to the archive
+            mime_type: Content type of the file
+            byte_size: Size of the file in bytes
+            checksum: Base64 MD5 of the whole file, verified by the archive on finalize
+
+        Returns:
+            The upload_session object (id, received_bytes, max_chunk_bytes, ...), or
+            None if the archive does not support resumable uploads (older server)
+        """
+        url = urljoin(self.api_url, "/api/v1/upload_sessions")
+        data = {"filename": filename, "content_type": mime_type, "byte_size": byte_size}
+        if checksum:
+            data["checksum"] = checksum
+
+        async with self.session.post(url, json=data, headers=self._auth_headers()) as response:
+            text = await response.text()
+            if response.status == 404:
+                return None
+            if response.status != 201:
+                raise UploadSessionError(f"HTTP {response.status}: {text}", response.status)
+            return (await response.json(content_type=None))["upload_session"]
+
+    async def get_upload_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Fetch an upload session's progress from the archive.
+
+        Returns:
+            The upload_session object, or None if the archive no longer knows it
+        """
+        url = urljoin(self.api_url, f"/api/v1/upload_sessions/{session_id}")
+
+        async with self.session.get(url, headers=self._auth_headers()) as response:
+            text = await response.text()
+            if response.status == 404:
+                return None
+            if response.status != 200:
+                raise UploadSessionError(f"HTTP {response.status}: {text}", response.status)
+            return (await response.json(content_type=None))["upload_session"]
+
+    async def upload_chunk(self, session_id: str, filepath: str, offset: int, length: int) -> int:
+        """
+        Send one chunk of a file, with its MD5, at the given offset.
+
+        Returns:
+            Bytes of the file the archive has stored after this chunk. On an offset
+            conflict this is where the archive wants the next chunk to start.
+        """
+        url = urljoin(self.api_url, f"/api/v1/upload_sessions/{session_id}/chunk")
+        loop = asyncio.get_running_loop()
+        read_started = time.monotonic()
+        data = await loop.run_in_executor(None, _read_chunk, filepath, offset, length)
+        if self.telemetry is not None:
+            self.telemetry.add('read', time.monotonic() - read_started)
+        if len(data) != length:
+            raise IOError(f"File shrank while uploading: {filepath}")
+        headers = {
+            **self._auth_headers(),
+            "Content-Type": "application/octet-stream",
+            "Content-MD5": base64.b64encode(hashlib.md5(data).digest()).decode('ascii')
+        }
+
+        async with self.concurrency.slot(len(data)) as slot, \
+                self.session.put(url, params={"offset": str(offset)}, data=data,
+                                 headers=headers) as response:
+            slot.status = response.status
+            text = await response.text()
+            if self.telemetry is not None:
+                # The body is sent in one write, so send and server time can't be told apart
+                self.telemetry.add('send', time.monotonic() - slot.started)
+                self.telemetry.add_bytes(len(data))
+            if response.status in (200, 409):
+                try:
+                    return int((await response.json(content_type=None))["received_bytes"])
+                except (ValueError, KeyError, TypeError):
+                    pass
+            raise UploadSessionError(f"HTTP {response.status}: {text}", response.status)
+
+    async def finalize_upload_session(self, session_id: str,
+                                      fields: Optional[Dict[str, str]] = None) -> UploadResult:
+        """
+        Turn a fully uploaded session into a song.
+
+        Args:
+            session_id: Upload session ID
+            fields: Optional bulk_upload metadata fields
+
+        Returns:
+            Tuple of (success, song, response_status, error_message), as upload_file()
+        """
+        url = urljoin(self.api_url, f"/api/v1/upload_sessions/{session_id}/finalize")
+        data = {key: str(value) for key, value in (fields or {}).items()}
+
+        started = time.monotonic()
+        async with self.session.post(url, json=data, headers=self._auth_headers()) as response:
+            text = await response.text()
+            if self.telemetry is not None:
+                self.telemetry.add('server', time.monotonic() - started)
+            if response.status in (200, 201):
+                try:
+                    song = (await response.json(content_type=None)).get('song', {})
+                except ValueError:
+                    song = {}
+                return True, song, "201", None
+            return False, {}, str(response.status), f"HTTP {response.status}: {text}"
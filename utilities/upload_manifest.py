@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Music Archive Upload Manifest
+
+Separates finding files from sending them. A manifest is written in one scan
+pass (universal_upload.py --emit-manifest), ideally on the NAS itself, and a
+later run uploads from it (--from-manifest) without walking the filesystem,
+so a transfer can start or restart immediately however large the library is.
+
+The format is JSON Lines, so a manifest can be inspected and filtered with
+ordinary tools (grep, jq) before it is used. The first line is a header; every
+other line is one file:
+
+    {"manifest": 1, "root": "/volume1/music", "created": "...", "host": "nas", "hashes": true, "tags": false}
+    {"path": "Artist/Album/01 Song.mp3", "size": 5120334, "mtime": 1700000000.0, "inode": "2049:131", "hash": "..."}
+
+Paths are relative to the root, so the uploading machine can mount the library
+elsewhere (the directory given to universal_upload.py is used as the root).
+"hash" (the content checksum used for duplicate checks) and "tags" (form
+fields from tag_reader.read_tags()) are optional. When a file's size or mtime
+no longer match its entry, its hash and tags are dropped and worked out again
+during upload; files that no longer exist are skipped.
+
+Usage:
+    write_manifest("library.jsonl", root, find_audio_files(root), hash_workers=4)
+
+    for path in read_manifest("library.jsonl", root):
+        path.content_hash, path.tags   # None unless recorded and still valid
+"""
+
+import datetime
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import platform
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Iterable, Iterator, Optional, Tuple
+
+import tag_reader
+from upload_engine import file_checksum
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+
+# Files stat'ed, hashed and tagged together while writing
+WRITE_BATCH = 1000
+
+
+class ManifestPath(str):
+    """A path from a manifest, carrying the content hash and tags recorded for it."""
+
+    content_hash: Optional[str] = None
+    tags: Optional[dict] = None
+
+
+def _checksum(filepath: str) -> Optional[str]:
+    try:
+        return file_checksum(filepath)
+    except OSError as e:
+        logger.debug(f"Could not hash {filepath}: {e}")
+        return None
+
+
+def write_manifest(manifest_path: str, root: str, filepaths: Iterable[str], hash_workers: int = 0,
+                   tag_workers: int = 0, should_stop=None) -> Tuple[int, int]:
+    """
+    Write a manifest of filepaths (all under root).
+
+    The manifest is written to a temporary file next to manifest_path and only
+    moved into place once complete, so an interrupted scan never leaves a
+    truncated manifest behind.
+
+    Args:
+        manifest_path: File to write
+        root: Directory the recorded paths are relative to
+        filepaths: Files to record, e.g. from find_audio_files()
+        hash_workers: Threads computing content hashes (0: no hashes)
+        tag_workers: Processes reading tags (0: no tags; needs mutagen)
+        should_stop: Optional callable; writing stops early when it returns True
+
+    Returns:
+        Tuple of (files recorded, their total bytes, complete), where complete is
+        False if should_stop ended the scan early and nothing was written
+    """
+    root = os.path.abspath(root)
+    hash_pool = ThreadPoolExecutor(max_workers=hash_workers) if hash_workers > 0 else None
+    tag_pool = ProcessPoolExecutor(
+        max_workers=tag_workers, mp_context=multiprocessing.get_context('spawn'),
+        initializer=tag_reader.init_worker
+    ) if tag_workers > 0 else None
+    temp_path = f"{manifest_path}.tmp"
+    count = total = 0
+    complete = False
+    paths = iter(filepaths)
+
+    try:
+        with open(temp_path, 'w', encoding='utf-8') as out:
+            out.write(json.dumps({
+                'manifest': MANIFEST_VERSION,
+                'root': root,
+                'created': datetime.datetime.now().isoformat(timespec='seconds'),
+                'host': platform.node(),
+                'hashes': hash_pool is not None,
+                'tags': tag_pool is not None,
+            }) + '\n')
+
+            while not (should_stop and should_stop()):
+                batch = list(itertools.islice(paths, WRITE_BATCH))
+                if not batch:
+                    complete = True
+                    break
+                entries = []
+                for filepath in batch:
+                    try:
+                        st = os.stat(filepath)
+                    except OSError as e:
+                        logger.warning(f"Cannot stat {filepath}: {e}")
+                        continue
+                    entries.append((filepath, {
+                        'path': os.path.relpath(os.path.abspath(filepath), root).replace(os.sep, '/'),
+                        'size': st.st_size,
+                        'mtime': st.st_mtime,
+                        'inode': f"{st.st_dev}:{st.st_ino}",
+                    }))
+
+                files = [filepath for filepath, _ in entries]
+                hashes = hash_pool.map(_checksum, files) if hash_pool else itertools.repeat(None)
+                tags = tag_pool.map(tag_reader.read_tags, files, chunksize=32) if tag_pool else itertools.repeat(None)
+                for (_, entry), content_hash, fields in zip(entries, hashes, tags):
+                    if content_hash:
+                        entry['hash'] = content_hash
+                    if fields:
+                        entry['tags'] = fields
+                    out.write(json.dumps(entry, ensure_ascii=False) + '\n')
+                    count += 1
+                    total += entry['size']
+                logger.info(f"Manifest: {count} files recorded")
+        if complete:
+            os.replace(temp_path, manifest_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        if hash_pool is not None:
+            hash_pool.shutdown(wait=False)
+        if tag_pool is not None:
+            tag_pool.shutdown(wait=False, cancel_futures=True)
+    return count, total, complete
+
+
+def read_manifest_header(manifest_path: str) -> dict:
+    """The header line of a manifest; ValueError if the file isn't one."""
+    with open(manifest_path, encoding='utf-8') as f:
+        try:
+            header = json.loads(f.readline())
+        except ValueError:
+            header = None
+    if not isinstance(header, dict) or header.get('manifest') != MANIFEST_VERSION:
+        raise ValueError(f"{manifest_path} is not an upload manifest (version {MANIFEST_VERSION})")
+    return header
+
+
+def read_manifest(manifest_path: str, root: Optional[str] = None) -> Iterator[ManifestPath]:
+    """
+    Yield the files of a manifest as ManifestPaths, in manifest order.
+
+    Args:
+        manifest_path: Manifest written by write_manifest()
+        root: Where the files are on this machine (default: the root recorded
+            in the manifest)
+    """
+    root = root or read_manifest_header(manifest_path)['root']
+    missing = stale = 0
+    with open(manifest_path, encoding='utf-8') as f:
+        f.readline()
+        for line_number, line in enumerate(f, 2):
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+                path = ManifestPath(os.path.join(root, *entry['path'].split('/')))
+            except (ValueError, KeyError, AttributeError):
+                logger.warning(f"Skipping malformed manifest line {line_number}")
+                continue
+            try:
+                st = os.stat(path)
+            except OSError:
+                missing += 1
+                logger.debug(f"Listed in the manifest but gone: {path}")
+                continue
+            if st.st_size == entry.get('size') and st.st_mtime == entry.get('mtime'):
+                path.content_hash = entry.get('hash')
+                path.tags = entry.get('tags')
+            else:
+                # Changed since the scan: whatever was recorded about its content is stale
+                stale += 1
+            yield path
+
+    if missing or stale:
+        logger.info(f"Manifest: {missing} listed files no longer exist, "
+                    f"{stale} changed since the scan (hash and tags worked out again)")
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Music Archive Upload Telemetry
+
+Live throughput counters and per-stage timers for the upload pipeline, so a
+slow import can be attributed to the disk, the network or the archive.
+
+Stages timed:
+- scan:   waiting for the directory walk to produce the next file
+- track:  stat + tracking database lookup/insert per file
+- hash:   content hashing for the duplicate check (summed over hash threads)
+- tags:   reading tags on the client (--client-tags; summed over tag processes)
+- read:   reading upload bodies from disk
+- send:   sending request bodies over the network
+- server: waiting for the archive's response once the body is sent
+
+Stage seconds are summed over all concurrent work, so with 8 uploads in
+flight a minute of wall time can hold 8 minutes of "send". Compare stages by
+their share of the total rather than against the elapsed time.
+
+Live counters (files/s, MB/s, uploads in flight, ETA) are shown as a progress
+bar on a terminal and can also be written as periodic JSON lines; the final
+totals are returned by totals() for storing with the import job.
+
+Usage:
+    telemetry = UploadTelemetry(json_path="stats.jsonl")
+    async with UploadEngine(api_url, telemetry=telemetry) as engine:
+        ...
+        with telemetry.timed('track'):
+            tracker.record_file_start(path)
+        reporter = asyncio.ensure_future(telemetry.run(lambda: engine.concurrency.in_flight))
+
+Dependencies:
+    pip install tqdm
+"""
+
+import asyncio
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+from tqdm import tqdm
+
+STAGES = ('scan', 'track', 'hash', 'tags', 'read', 'send', 'server')
+
+# Seconds between progress bar refreshes
+DISPLAY_INTERVAL = 1.0
+
+
+class UploadTelemetry:
+    """Stage timers, throughput counters, progress display and JSON-lines output."""
+
+    def __init__(self, display: Optional[bool] = None, json_path: Optional[str] = None,
+                 json_interval: float = 10.0):
+        """
+        Args:
+            display: Show a progress bar (None: only when stderr is a terminal)
+            json_path: File to append periodic JSON stats lines to ('-' for stdout)
+            json_interval: Seconds between JSON lines
+        """
+        self.display = display
+        self.json_path = json_path
+        self.json_interval = json_interval
+        self.started = time.monotonic()
+        self.stage_seconds = dict.fromkeys(STAGES, 0.0)
+        self.stage_counts = dict.fromkeys(STAGES, 0)
+        self.outcomes = {'success': 0, 'duplicate': 0, 'failed': 0, 'skipped': 0}
+        self.bytes_sent = 0
+        self.discovered = 0
+        self.total = None        # files to process, once known
+        self.in_flight = 0
+        self._in_flight_fn = None
+        self._lock = threading.Lock()   # hashing reports from worker threads
+        self._rate_files = None  # smoothed files/s
+        self._rate_bytes = None  # smoothed bytes/s
+        self._last_sample = (self.started, 0, 0)
+        self._bar = None
+        self._json_file = None
+
+    # Recording (cheap; safe to call from the event loop and, for add(), from threads)
+
+    def add(self, stage: str, seconds: float):
+        """Add seconds spent in a stage."""
+        with self._lock:
+            self.stage_seconds[stage] += seconds
+            self.stage_counts[stage] += 1
+
+    @contextmanager
+    def timed(self, stage: str):
+        """Time the enclosed block as one unit of the given stage."""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.add(stage, time.monotonic() - start)
+
+    def add_bytes(self, nbytes: int):
+        """Count request body bytes sent to the archive (retries included)."""
+        self.bytes_sent += nbytes
+
+    def file_found(self):
+        self.discovered += 1
+
+    def scan_finished(self):
+        """The file list is complete, so the total (and an ETA) is known."""
+        self.total = self.discovered
+
+    def file_done(self, outcome: str):
+        """Count a file that reached a final outcome (success, duplicate, failed, skipped)."""
+        self.outcomes[outcome] += 1
+
+    @property
+    def files_done(self) -> int:
+        return sum(self.outcomes.values())
+
+    # Reporting
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current counters, rates and stage totals as a JSON-friendly dict."""
+        now = time.monotonic()
+        elapsed = now - self.started
+        files_done = self.files_done
+        files_per_sec = self._rate_files if self._rate_files is not None else (
+            files_done / elapsed if elapsed > 0 else 0.0)
+        bytes_per_sec = self._rate_bytes if self._rate_bytes is not None else (
+            self.bytes_sent / elapsed if elapsed > 0 else 0.0)
+        eta = None
+        if self.total is not None and files_per_sec > 0:
+            eta = max(self.total - files_done, 0) / files_per_sec
+        return {
+            'time': time.time(),
+            'elapsed': round(elapsed, 3),
+            'discovered': self.discovered,
+            'total': self.total,
+            'files_done': files_done,
+            'outcomes': dict(self.outcomes),
+            'bytes_sent': self.bytes_sent,
+            'files_per_sec': round(files_per_sec, 3),
+            'mb_per_sec': round(bytes_per_sec / (1024 * 1024), 3),
+            'in_flight': self.in_flight,
+            'eta_seconds': round(eta, 1) if eta is not None else None,
+            'stage_seconds': {stage: round(seconds, 3) for stage, seconds in self.stage_seconds.items()},
+        }
+
+    def totals(self) -> Dict[str, Any]:
+        """Whole-run totals (average rates) for storing with the import job."""
+        elapsed = time.monotonic() - self.started
+        return {
+            'elapsed': round(elapsed, 3),
+            'files_done': self.files_done,
+            'outcomes': dict(self.outcomes),
+            'bytes_sent': self.bytes_sent,
+            'files_per_sec': round(self.files_done / elapsed, 3) if elapsed > 0 else 0.0,
+            'mb_per_sec': round(self.bytes_sent / elapsed / (1024 * 1024), 3) if elapsed > 0 else 0.0,
+            'stage_seconds': {stage: round(seconds, 3) for stage, seconds in self.stage_seconds.items()},
+            'stage_counts': dict(self.stage_counts),
+        }
+
+    def _sample(self):
+        """Update the smoothed rates from the counters since the last sample."""
+        now = time.monotonic()
+        last_time, last_files, last_bytes = self._last_sample
+        seconds = now - last_time
+        if seconds <= 0:
+            return
+        files_rate = (self.files_done - last_files) / seconds
+        bytes_rate = (self.bytes_sent - last_bytes) / seconds
+        # Smooth over roughly the last 10 samples so the ETA doesn't jump around
+        if self._rate_files is None:
+            self._rate_files, self._rate_bytes = files_rate, bytes_rate
+        else:
+            self._rate_files += 0.1 * (files_rate - self._rate_files)
+            self._rate_bytes += 0.1 * (bytes_rate - self._rate_bytes)
+        self._last_sample = (now, self.files_done, self.bytes_sent)
+        if self._in_flight_fn is not None:
+            self.in_flight = self._in_flight_fn()
+
+    def _render(self):
+        if self._bar is None:
+            return
+        if self.total is not None and self._bar.total != self.total:
+            self._bar.total = self.total
+        self._bar.n = self.files_done
+        outcomes = self.outcomes
+        self._bar.set_postfix_str(
+            f"{(self._rate_bytes or 0) / (1024 * 1024):.1f} MB/s, {self.in_flight} in flight, "
+            f"✓{outcomes['success']} ={outcomes['duplicate']} ✗{outcomes['failed']}",
+            refresh=False
+        )
+        self._bar.refresh()
+
+    def _write_json(self, final: bool = False):
+        if self._json_file is None:
+            return
+        line = self.snapshot()
+        if final:
+            line['final'] = True
+            line['totals'] = self.totals()
+        self._json_file.write(json.dumps(line) + '\n')
+        self._json_file.flush()
+
+    async def run(self, in_flight: Optional[Callable[[], int]] = None):
+        """
+        Refresh the progress display and write JSON lines until cancelled.
+
+        Args:
+            in_flight: Returns the number of uploads currently in flight
+        """
+        self._in_flight_fn = in_flight
+        self._bar = tqdm(total=self.total, desc="Uploading", unit="file", dynamic_ncols=True,
+                         disable=None if self.display is None else not self.display)
+        if self._bar.disable:
+            self._bar = None
+        if self.json_path:
+            self._json_file = sys.stdout if self.json_path == '-' else open(self.json_path, 'a')
+
+        next_json = time.monotonic() + self.json_interval
+        while True:
+            await asyncio.sleep(DISPLAY_INTERVAL)
+            self._sample()
+            self._render()
+            if time.monotonic() >= next_json:
+                self._write_json()
+                next_json += self.json_interval
+
+    def finish(self):
+        """Close the display, write the final JSON line and print the stage breakdown."""
+        self._sample()
+        self._render()
+        if self._bar is not None:
+            self._bar.close()
+            self._bar = None
+        self._write_json(final=True)
+        if self._json_file is not None and self._json_file is not sys.stdout:
+            self._json_file.close()
+        self._json_file = None
+
+        totals = self.totals()
+        stage_total = sum(totals['stage_seconds'].values())
+        if stage_total > 0:
+            shares = ", ".join(f"{stage} {seconds:.1f}s ({seconds / stage_total:.0%})"
+                               for stage, seconds in totals['stage_seconds'].items() if seconds > 0)
+            print(f"⏱️  Stage time: {shares}")
+        print(f"⚡ Throughput: {totals['files_per_sec']:.1f} files/s, {totals['mb_per_sec']:.2f} MB/s "
+              f"over {totals['elapsed']:.0f}s")